@@ -11,6 +11,21 @@ Environment Variables:
     PHONE_AGENT_API_KEY: API key for model authentication (default: EMPTY)
     PHONE_AGENT_MAX_STEPS: Maximum steps per task (default: 100)
     PHONE_AGENT_DEVICE_ID: ADB device ID for multi-device setups
+    PHONE_AGENT_IMAGE_FORMAT: Screenshot encoding sent to the model (png, jpeg, webp)
+    PHONE_AGENT_IMAGE_QUALITY: JPEG/WebP quality for model screenshots (default: 85)
+    PHONE_AGENT_IMAGE_MAX_LONG_EDGE: Downscale screenshots to this long edge
+    PHONE_AGENT_IMAGE_MAX_PIXELS: Downscale screenshots to this pixel budget
+    PHONE_AGENT_ADB_TRANSPORT: ADB command transport (subprocess, shell, socket)
+    PHONE_AGENT_EARLY_DISPATCH: Act on the streamed action before generation ends
+    PHONE_AGENT_STABLE_PREFIX: Prefix-cache friendly message layout (text first)
+    PHONE_AGENT_INCLUDE_USAGE: Request token usage to report prefix cache hits
+    PHONE_AGENT_HISTORY_KEEP_TURNS: Resend only the last N turns verbatim
+    PHONE_AGENT_ACTION_CACHE: Action cache file, replays actions for known screens
+    PHONE_AGENT_TRACE_DIR: Record every step (screenshot, output, action) to a trace
+    PHONE_AGENT_MJPEG_URL: WDA MJPEG stream URL for iOS screenshots (port 9100)
+    PHONE_AGENT_SETTLE_MODE: Post-action wait, fixed delays or adaptive frame diffing
+    PHONE_AGENT_TIMING_PROFILES: Learn and reuse per-app settle times (default: 0)
+    PHONE_AGENT_TIMING_PROFILE_PATH: Timing profile store location
 """
 
 import argparse
@@ -23,14 +38,22 @@ from urllib.parse import urlparse
 from openai import OpenAI
 
 from phone_agent import PhoneAgent
+from phone_agent.action_cache import ActionCache
+from phone_agent.actions import ActionHandler
+from phone_agent.actions.handler_ios import IOSActionHandler
 from phone_agent.agent import AgentConfig
 from phone_agent.agent_ios import IOSAgentConfig, IOSPhoneAgent
 from phone_agent.config.apps import list_supported_apps
 from phone_agent.config.apps_harmonyos import list_supported_apps as list_harmonyos_apps
 from phone_agent.config.apps_ios import list_supported_apps as list_ios_apps
 from phone_agent.device_factory import DeviceType, get_device_factory, set_device_type
+from phone_agent.history import HistoryPolicy
+from phone_agent.imaging import ImageConfig
 from phone_agent.model import ModelConfig
+from phone_agent.timing_profiles import get_timing_profiles
+from phone_agent.trace import replay_trace
 from phone_agent.xctest import XCTestConnection
+from phone_agent.xctest import get_screenshot as get_ios_screenshot
 from phone_agent.xctest import list_devices as list_ios_devices
 
 
@@ -383,6 +406,10 @@ Examples:
     # List supported apps
     python main.py --list-apps
 
+    # Inspect or reset learned per-app timings
+    python main.py --show-timing-profiles
+    python main.py --reset-timing-profiles 淘宝
+
     # iOS specific examples
     # Run with iOS device
     python main.py --device-type ios "Open Safari and search for iPhone tips"
@@ -438,6 +465,133 @@ Examples:
         help="Custom system prompt to override default behavior (e.g., force strict step-by-step execution)",
     )
 
+    # Model input image options
+    parser.add_argument(
+        "--image-format",
+        type=str,
+        choices=["png", "jpeg", "webp"],
+        default=os.getenv("PHONE_AGENT_IMAGE_FORMAT"),
+        help="Encoding of screenshots sent to the model (default: keep device format)",
+    )
+
+    parser.add_argument(
+        "--image-quality",
+        type=int,
+        default=int(os.getenv("PHONE_AGENT_IMAGE_QUALITY", "85")),
+        help="JPEG/WebP quality for screenshots sent to the model (default: 85)",
+    )
+
+    parser.add_argument(
+        "--image-max-long-edge",
+        type=int,
+        default=(
+            int(os.getenv("PHONE_AGENT_IMAGE_MAX_LONG_EDGE"))
+            if os.getenv("PHONE_AGENT_IMAGE_MAX_LONG_EDGE")
+            else None
+        ),
+        metavar="PIXELS",
+        help="Downscale screenshots so the longer side is at most this many pixels",
+    )
+
+    parser.add_argument(
+        "--image-max-pixels",
+        type=int,
+        default=(
+            int(os.getenv("PHONE_AGENT_IMAGE_MAX_PIXELS"))
+            if os.getenv("PHONE_AGENT_IMAGE_MAX_PIXELS")
+            else None
+        ),
+        metavar="PIXELS",
+        help="Downscale screenshots to at most this many pixels (width * height)",
+    )
+
+    parser.add_argument(
+        "--early-dispatch",
+        action="store_true",
+        default=os.getenv("PHONE_AGENT_EARLY_DISPATCH", "").lower() in ("1", "true"),
+        help="Execute the action as soon as it has streamed, cancelling the rest",
+    )
+
+    parser.add_argument(
+        "--include-usage",
+        action="store_true",
+        default=os.getenv("PHONE_AGENT_INCLUDE_USAGE", "").lower() in ("1", "true"),
+        help="Request token usage in the stream to report prefix cache hits "
+        "(the server must support stream_options)",
+    )
+
+    parser.add_argument(
+        "--stable-prefix",
+        action="store_true",
+        default=os.getenv("PHONE_AGENT_STABLE_PREFIX", "").lower() in ("1", "true"),
+        help="Lay out messages so the server can reuse its prefix cache across steps",
+    )
+
+    # History compaction options
+    parser.add_argument(
+        "--history-keep-turns",
+        type=int,
+        default=(
+            int(os.getenv("PHONE_AGENT_HISTORY_KEEP_TURNS"))
+            if os.getenv("PHONE_AGENT_HISTORY_KEEP_TURNS")
+            else None
+        ),
+        metavar="N",
+        help="Resend only the last N turns verbatim (default: all)",
+    )
+
+    parser.add_argument(
+        "--history-drop-thinking",
+        action="store_true",
+        help="With --history-keep-turns: keep older turns without their thinking",
+    )
+
+    parser.add_argument(
+        "--history-summarize",
+        action="store_true",
+        help="With --history-keep-turns: collapse older turns into one summary",
+    )
+
+    # Action cache options
+    parser.add_argument(
+        "--action-cache",
+        type=str,
+        default=os.getenv("PHONE_AGENT_ACTION_CACHE"),
+        metavar="PATH",
+        help="Cache actions per task step and screen in PATH and replay them",
+    )
+
+    parser.add_argument(
+        "--action-cache-distance",
+        type=int,
+        default=4,
+        help="Maximum screen hash distance (0-64) for a cache match (default: 4)",
+    )
+
+    parser.add_argument(
+        "--action-cache-min-observations",
+        type=int,
+        default=2,
+        help="Consistent model answers required before an action is replayed "
+        "(default: 2)",
+    )
+
+    # Trace options
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=os.getenv("PHONE_AGENT_TRACE_DIR"),
+        metavar="DIR",
+        help="Record every step of the run to a trace directory",
+    )
+
+    parser.add_argument(
+        "--replay",
+        type=str,
+        metavar="DIR",
+        help="Replay the last run recorded in a trace directory, without the model",
+    )
+
     # Device options
     parser.add_argument(
         "--device-id",
@@ -485,6 +639,14 @@ Examples:
         help="WebDriverAgent URL for iOS (default: http://localhost:8100)",
     )
 
+    parser.add_argument(
+        "--mjpeg-url",
+        type=str,
+        default=os.getenv("PHONE_AGENT_MJPEG_URL"),
+        help="WDA MJPEG stream URL for iOS screenshots, e.g. http://localhost:9100 "
+        "(falls back to WDA /screenshot while the stream has no frame)",
+    )
+
     parser.add_argument(
         "--pair",
         action="store_true",
@@ -506,6 +668,20 @@ Examples:
         "--list-apps", action="store_true", help="List supported apps and exit"
     )
 
+    parser.add_argument(
+        "--show-timing-profiles",
+        action="store_true",
+        help="Show learned per-app settle timings and exit",
+    )
+
+    parser.add_argument(
+        "--reset-timing-profiles",
+        nargs="?",
+        const="",
+        metavar="APP",
+        help="Reset learned timings for APP (or all apps if omitted) and exit",
+    )
+
     parser.add_argument(
         "--lang",
         type=str,
@@ -522,6 +698,15 @@ Examples:
         help="Device type: adb for Android, hdc for HarmonyOS, ios for iPhone (default: adb)",
     )
 
+    parser.add_argument(
+        "--adb-transport",
+        type=str,
+        choices=["subprocess", "shell", "socket"],
+        default=os.getenv("PHONE_AGENT_ADB_TRANSPORT", "subprocess"),
+        help="How ADB commands reach the device: one adb process per command, "
+        "a persistent adb shell, or the ADB server socket (default: subprocess)",
+    )
+
     parser.add_argument(
         "task",
         nargs="?",
@@ -705,6 +890,12 @@ def main():
     if device_type != DeviceType.IOS:
         set_device_type(device_type)
 
+    # The ADB transport is process-wide, like the ADB module functions
+    if device_type == DeviceType.ADB:
+        from phone_agent.adb import ADBTransport, set_adb_transport
+
+        set_adb_transport(ADBTransport(args.adb_transport))
+
     # Enable HDC verbose mode if using HDC
     if device_type == DeviceType.HDC:
         from phone_agent.hdc import set_hdc_verbose
@@ -735,6 +926,31 @@ def main():
             )
         return
 
+    # Handle timing profile commands (no system check needed)
+    if args.show_timing_profiles:
+        profiles = get_timing_profiles()
+        summary = profiles.profiles()
+        print(f"Timing profiles ({profiles.path}):")
+        if not summary:
+            print(
+                "  No timings learned yet "
+                "(they are learned with PHONE_AGENT_SETTLE_MODE=adaptive)"
+            )
+        for app, actions in summary.items():
+            print(f"  {app}:")
+            for action, stats in sorted(actions.items()):
+                print(
+                    f"    {action:<12} delay {stats['delay']:.2f}s, "
+                    f"median {stats['median']:.2f}s ({stats['samples']} samples)"
+                )
+        return
+
+    if args.reset_timing_profiles is not None:
+        app = args.reset_timing_profiles or None
+        get_timing_profiles().reset(app)
+        print(f"Reset timing profiles for {app or 'all apps'}")
+        return
+
     # Handle device commands (these may need partial system checks)
     if handle_device_commands(args):
         return
@@ -748,6 +964,38 @@ def main():
     ):
         sys.exit(1)
 
+    # Replay a recorded run (no model needed)
+    if args.replay:
+        if device_type == DeviceType.IOS:
+            action_handler = IOSActionHandler(wda_url=args.wda_url)
+        else:
+            action_handler = ActionHandler(
+                device_id=args.device_id, settle_mode="adaptive"
+            )
+
+        def print_step(record: dict, result) -> None:
+            status = "OK" if result.success else f"FAILED: {result.message}"
+            name = record["action"].get("action", "Finish")
+            print(f"Step {record['step']}: {name} {status}")
+
+        def get_screen_size() -> tuple[int, int]:
+            if device_type == DeviceType.IOS:
+                screenshot = get_ios_screenshot(wda_url=args.wda_url)
+            else:
+                screenshot = get_device_factory().get_screenshot(args.device_id)
+            return screenshot.width, screenshot.height
+
+        results = replay_trace(
+            args.replay,
+            action_handler,
+            on_step=print_step,
+            get_screen_size=get_screen_size,
+        )
+        if isinstance(action_handler, ActionHandler):
+            action_handler.restore_keyboard()
+        print(f"Replayed {len(results)} steps")
+        return
+
     # Check model API connectivity and model availability
     if not check_model_api(args.base_url, args.model, args.apikey):
         sys.exit(1)
@@ -759,20 +1007,54 @@ def main():
         model_name=args.model,
         api_key=args.apikey,
         lang=args.lang,
+        include_usage=args.include_usage,
     )
 
     # 兼容方式注入严格模式提示词
     if args.system_prompt:
         model_config.system_prompt = args.system_prompt  # 动态添加属性
 
+    # Screenshot preparation for the model, only when something is configured
+    image_config = None
+    if args.image_format or args.image_max_long_edge or args.image_max_pixels:
+        image_config = ImageConfig(
+            format=args.image_format,
+            quality=args.image_quality,
+            max_long_edge=args.image_max_long_edge,
+            max_pixels=args.image_max_pixels,
+        )
+
+    history_policy = None
+    if args.history_keep_turns is not None:
+        history_policy = HistoryPolicy(
+            keep_last_turns=args.history_keep_turns,
+            drop_old_thinking=args.history_drop_thinking,
+            summarize_old_turns=args.history_summarize,
+        )
+
+    action_cache = None
+    if args.action_cache:
+        action_cache = ActionCache(
+            args.action_cache,
+            max_distance=args.action_cache_distance,
+            min_observations=args.action_cache_min_observations,
+        )
+
     if device_type == DeviceType.IOS:
         # Create iOS agent
         agent_config = IOSAgentConfig(
             max_steps=args.max_steps,
             wda_url=args.wda_url,
+            mjpeg_url=args.mjpeg_url,
             device_id=args.device_id,
             verbose=not args.quiet,
             lang=args.lang,
+            image_config=image_config,
+            early_dispatch=args.early_dispatch,
+            history_policy=history_policy,
+            stable_prefix=args.stable_prefix,
+            action_cache=action_cache,
+            trace_dir=args.trace,
         )
 
         agent = IOSPhoneAgent(
@@ -786,6 +1068,12 @@ def main():
             device_id=args.device_id,
             verbose=not args.quiet,
             lang=args.lang,
+            image_config=image_config,
+            early_dispatch=args.early_dispatch,
+            history_policy=history_policy,
+            stable_prefix=args.stable_prefix,
+            action_cache=action_cache,
+            trace_dir=args.trace,
         )
 
         agent = PhoneAgent(
@@ -805,10 +1093,15 @@ def main():
     print(f"Max Steps: {agent_config.max_steps}")
     print(f"Language: {agent_config.lang}")
     print(f"Device Type: {args.device_type.upper()}")
+    if action_cache is not None:
+        entries = action_cache.stats()["entries"]
+        print(f"Action Cache: {args.action_cache} ({entries} entries)")
 
     # Show iOS-specific config
     if device_type == DeviceType.IOS:
         print(f"WDA URL: {args.wda_url}")
+        if args.mjpeg_url:
+            print(f"MJPEG Stream: {args.mjpeg_url}")
 
     # Show device info
     if device_type == DeviceType.IOS:
@@ -831,10 +1124,21 @@ def main():
     print("=" * 50)
 
     # Run with provided task or enter interactive mode
+    try:
+        run_tasks(agent, args, action_cache)
+    finally:
+        agent.close()
+
+
+def run_tasks(agent, args, action_cache) -> None:
+    """Run the task from the command line, or read tasks interactively."""
     if args.task:
         print(f"\nTask: {args.task}\n")
         result = agent.run(args.task)
         print(f"\nResult: {result}")
+        if action_cache is not None:
+            stats = action_cache.stats()
+            print(f"Action cache: {stats['hits']} hits, {stats['misses']} misses")
     else:
         # Interactive mode
         print("\nEntering interactive mode. Type 'quit' to exit.\n")
@@ -0,0 +1,292 @@
+"""Observation-keyed cache of model actions for repeated deterministic flows."""
+
+import atexit
+import base64
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from typing import Any
+
+from PIL import Image
+
+# dHash grid: 8 rows of 9 columns give 64 left/right comparisons
+_HASH_WIDTH = 9
+_HASH_HEIGHT = 8
+
+# Minimum seconds between writes of stored actions, the rest is written by
+# flush() (registered at exit)
+SAVE_INTERVAL = 30.0
+
+
+def dhash(image_base64: str) -> int:
+    """
+    Compute a 64-bit difference hash of a base64-encoded screenshot.
+
+    Similar screens (status bar clock, blinking cursor) hash to values a few
+    bits apart, which the cache compares by Hamming distance.
+
+    Args:
+        image_base64: Base64-encoded PNG/JPEG/WEBP screenshot.
+
+    Returns:
+        The hash as an integer.
+    """
+    img = Image.open(BytesIO(base64.b64decode(image_base64)))
+    if img.format == "JPEG":
+        img.draft("L", (img.width // 8, img.height // 8))
+    pixels = (
+        img.convert("L")
+        .resize((_HASH_WIDTH, _HASH_HEIGHT), Image.Resampling.BOX)
+        .tobytes()
+    )
+
+    value = 0
+    for row in range(_HASH_HEIGHT):
+        offset = row * _HASH_WIDTH
+        for col in range(_HASH_WIDTH - 1):
+            bit = pixels[offset + col] > pixels[offset + col + 1]
+            value = (value << 1) | bit
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class CacheEntry:
+    """A cached action for one observation."""
+
+    task: str
+    step: int
+    app: str
+    screen_hash: int
+    action: dict[str, Any]  # Parsed action, as returned by parse_action
+    answer: str  # Raw action text, replayed into the conversation history
+    created_at: float
+    last_used: float
+    observations: int = 1  # Times the model chose this action here
+
+
+class ActionCache:
+    """
+    Cache of parsed actions keyed on (task, step, current app, screen hash).
+
+    Entries match when task, step and app are equal and the screenshot hashes
+    (see dhash) are within max_distance bits. A hit is only served once the
+    model has chosen the same action for that observation min_observations
+    times. Stores are written to disk at most every SAVE_INTERVAL seconds
+    and on flush().
+
+    Args:
+        path: JSON file to persist the cache to. If None, the cache lives in
+            memory only.
+        max_distance: Maximum Hamming distance (0-64) between screen hashes.
+        min_observations: Consistent model answers required before replaying.
+        max_entries: Entries kept before least recently used ones are evicted.
+        ttl: Entry lifetime in seconds. None keeps entries until evicted.
+
+    Example:
+        >>> cache = ActionCache("~/.phone_agent/action_cache.json")
+        >>> screen_hash = dhash(screenshot.base64_data)
+        >>> entry = cache.lookup("打开微信", 1, "System Home", screen_hash)
+        >>> if entry is None:
+        ...     cache.store("打开微信", 1, "System Home", screen_hash,
+        ...                 action, response.action)
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_distance: int = 4,
+        min_observations: int = 2,
+        max_entries: int = 5000,
+        ttl: float | None = 7 * 24 * 3600,
+    ):
+        self.path = os.path.expanduser(path) if path else None
+        self.max_distance = max_distance
+        self.min_observations = min_observations
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        # Ordered by recency of use, oldest first
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load()
+        if self.path is not None:
+            atexit.register(self.flush)
+
+    def lookup(
+        self, task: str, step: int, app: str, screen_hash: int
+    ) -> CacheEntry | None:
+        """
+        Find a confident cached action for an observation.
+
+        Args:
+            task: Task text.
+            step: 1-based step index.
+            app: Current app name.
+            screen_hash: dhash() of the screenshot.
+
+        Returns:
+            The closest matching entry, or None on a miss.
+        """
+        with self._lock:
+            entry = self._find(task, step, app, screen_hash)
+            if entry is None or entry.observations < self.min_observations:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            entry.last_used = time.time()
+            self._entries.move_to_end(self._key(entry))
+            return copy.deepcopy(entry)
+
+    def store(
+        self,
+        task: str,
+        step: int,
+        app: str,
+        screen_hash: int,
+        action: dict[str, Any],
+        answer: str,
+    ) -> None:
+        """
+        Record the action the model chose for an observation.
+
+        A matching entry with the same action gains an observation; a
+        different action replaces it.
+
+        Args:
+            task: Task text.
+            step: 1-based step index.
+            app: Current app name.
+            screen_hash: dhash() of the screenshot, as passed to lookup().
+            action: Parsed action.
+            answer: Raw action text from the model.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._find(task, step, app, screen_hash)
+            if entry is not None and entry.action == action:
+                entry.observations += 1
+                entry.last_used = now
+                self._entries.move_to_end(self._key(entry))
+            else:
+                if entry is not None:
+                    del self._entries[self._key(entry)]
+                entry = CacheEntry(
+                    task=task,
+                    step=step,
+                    app=app,
+                    screen_hash=screen_hash,
+                    action=copy.deepcopy(action),
+                    answer=answer,
+                    created_at=now,
+                    last_used=now,
+                )
+                self._entries[self._key(entry)] = entry
+
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+                self._save()
+
+    def flush(self) -> None:
+        """Write pending stores to disk."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.stores = 0
+            self._save()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dict with entries, hits, misses, stores and hit_rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _key(entry: CacheEntry) -> tuple:
+        return (entry.task, entry.step, entry.app, entry.screen_hash)
+
+    def _find(
+        self, task: str, step: int, app: str, screen_hash: int
+    ) -> CacheEntry | None:
+        """Closest live entry within max_distance, dropping expired ones."""
+        now = time.time()
+        best, best_distance = None, self.max_distance + 1
+        for key, entry in list(self._entries.items()):
+            if self.ttl is not None and now - entry.created_at > self.ttl:
+                del self._entries[key]
+                continue
+            if key[:3] != (task, step, app):
+                continue
+            distance = hamming_distance(entry.screen_hash, screen_hash)
+            if distance < best_distance:
+                best, best_distance = entry, distance
+        return best
+
+    def _load(self) -> None:
+        """Load persisted entries, starting empty if missing or unreadable."""
+        if self.path is None:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for data in json.load(f):
+                    entry = CacheEntry(**data)
+                    self._entries[self._key(entry)] = entry
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Ignoring unreadable action cache {self.path}: {e}")
+            self._entries.clear()
+
+    def _save(self) -> None:
+        """Write entries atomically, in recency order."""
+        self._dirty = False
+        self._last_save = time.monotonic()
+        if self.path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    [asdict(entry) for entry in self._entries.values()],
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save action cache: {e}")
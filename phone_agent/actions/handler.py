@@ -1,14 +1,22 @@
 """Action handler for processing AI model outputs."""
 
-import ast
-import re
 import subprocess
 import time
 from dataclasses import dataclass
 from typing import Any, Callable
 
+from phone_agent.actions.parser import parse_call
+from phone_agent.adb.input import ADB_KEYBOARD_IME
 from phone_agent.config.timing import TIMING_CONFIG
-from phone_agent.device_factory import get_device_factory
+from phone_agent.device_factory import DeviceFactory, get_device_factory
+from phone_agent.settle import wait_for_settle, wait_for_stream_settle
+from phone_agent.timing_profiles import get_timing_profiles
+
+# Actions that can bring another app to the foreground, the cached current
+# app is dropped after them
+_FOREGROUND_ACTIONS = frozenset(
+    {"Launch", "Tap", "Back", "Home", "Swipe", "Long Press", "Double Tap"}
+)
 
 
 @dataclass
@@ -30,6 +38,10 @@ class ActionHandler:
         confirmation_callback: Optional callback for sensitive action confirmation.
             Should return True to proceed, False to cancel.
         takeover_callback: Optional callback for takeover requests (login, captcha).
+        device_factory: Optional device factory bound to this handler. If None,
+            the global factory from get_device_factory() is used.
+        settle_mode: Optional post-action wait mode ("fixed" or "adaptive")
+            overriding TIMING_CONFIG.device.settle_mode.
     """
 
     def __init__(
@@ -37,13 +49,29 @@ class ActionHandler:
         device_id: str | None = None,
         confirmation_callback: Callable[[str], bool] | None = None,
         takeover_callback: Callable[[str], None] | None = None,
+        device_factory: DeviceFactory | None = None,
+        settle_mode: str | None = None,
     ):
         self.device_id = device_id
+        self._device_factory = device_factory
+        self.settle_mode = settle_mode
         self.confirmation_callback = confirmation_callback or self._default_confirmation
         self.takeover_callback = takeover_callback or self._default_takeover
+        self._current_app: str | None = None
+        self._original_ime: str | None = None  # IME before the task's first Type
+        self._action_time = 0.0  # time.time() when the last action started
+
+    @property
+    def device_factory(self) -> DeviceFactory:
+        """The device factory used for actions."""
+        return self._device_factory or get_device_factory()
 
     def execute(
-        self, action: dict[str, Any], screen_width: int, screen_height: int
+        self,
+        action: dict[str, Any],
+        screen_width: int,
+        screen_height: int,
+        current_app: str | None = None,
     ) -> ActionResult:
         """
         Execute an action from the AI model.
@@ -52,10 +80,13 @@ class ActionHandler:
             action: The action dictionary from the model.
             screen_width: Current screen width in pixels.
             screen_height: Current screen height in pixels.
+            current_app: Foreground app the action runs in, used to look up
+                and learn per-app timing profiles.
 
         Returns:
             ActionResult indicating success and whether to finish.
         """
+        self._current_app = current_app
         action_type = action.get("_metadata")
 
         if action_type == "finish":
@@ -80,12 +111,16 @@ class ActionHandler:
                 message=f"Unknown action: {action_name}",
             )
 
+        self._action_time = time.time()
         try:
             return handler_method(action, screen_width, screen_height)
         except Exception as e:
             return ActionResult(
                 success=False, should_finish=False, message=f"Action failed: {e}"
             )
+        finally:
+            if action_name in _FOREGROUND_ACTIONS:
+                self.device_factory.invalidate_current_app(self.device_id)
 
     def _get_handler(self, action_name: str) -> Callable | None:
         """Get the handler method for an action."""
@@ -121,9 +156,13 @@ class ActionHandler:
         if not app_name:
             return ActionResult(False, False, "No app name specified")
 
-        device_factory = get_device_factory()
-        success = device_factory.launch_app(app_name, self.device_id)
+        device_factory = self.device_factory
+        success = device_factory.launch_app(app_name, self.device_id, delay=0)
         if success:
+            # Launch time depends on the app being opened, not the current one
+            self._settle(
+                TIMING_CONFIG.device.default_launch_delay, "Launch", app=app_name
+            )
             return ActionResult(True, False)
         return ActionResult(False, False, f"App not found: {app_name}")
 
@@ -144,34 +183,63 @@ class ActionHandler:
                     message="User cancelled sensitive operation",
                 )
 
-        device_factory = get_device_factory()
-        device_factory.tap(x, y, self.device_id)
+        device_factory = self.device_factory
+        device_factory.tap(x, y, self.device_id, delay=0)
+        self._settle(TIMING_CONFIG.device.default_tap_delay, "Tap")
         return ActionResult(True, False)
 
     def _handle_type(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle text input action."""
         text = action.get("text", "")
 
-        device_factory = get_device_factory()
+        device_factory = self.device_factory
 
-        # Switch to ADB keyboard
-        original_ime = device_factory.detect_and_set_adb_keyboard(self.device_id)
-        time.sleep(TIMING_CONFIG.action.keyboard_switch_delay)
+        # Switched once per task, the original keyboard is restored at task end
+        self._ensure_adb_keyboard()
 
         # Clear existing text and type new text
         device_factory.clear_text(self.device_id)
-        time.sleep(TIMING_CONFIG.action.text_clear_delay)
+        self._settle(TIMING_CONFIG.action.text_clear_delay)
 
         # Handle multiline text by splitting on newlines
         device_factory.type_text(text, self.device_id)
-        time.sleep(TIMING_CONFIG.action.text_input_delay)
-
-        # Restore original keyboard
-        device_factory.restore_keyboard(original_ime, self.device_id)
-        time.sleep(TIMING_CONFIG.action.keyboard_restore_delay)
+        self._settle(TIMING_CONFIG.action.text_input_delay)
 
         return ActionResult(True, False)
 
+    def restore_keyboard(self) -> None:
+        """
+        Restore the keyboard that was active before the task's first Type.
+
+        Call at task end. Does nothing if no Type switched the keyboard.
+        """
+        original_ime, self._original_ime = self._original_ime, None
+        if not original_ime or ADB_KEYBOARD_IME in original_ime:
+            return
+
+        device_factory = self.device_factory
+        device_factory.restore_keyboard(original_ime, self.device_id)
+        device_factory.wait_for_ime(
+            original_ime,
+            self.device_id,
+            timeout=TIMING_CONFIG.action.keyboard_restore_delay,
+        )
+
+    def _ensure_adb_keyboard(self) -> None:
+        """Switch to ADB Keyboard unless this task already did."""
+        if self._original_ime is not None:
+            return
+
+        device_factory = self.device_factory
+        self._original_ime = device_factory.detect_and_set_adb_keyboard(self.device_id)
+        if ADB_KEYBOARD_IME not in self._original_ime:
+            # Returns as soon as the IME is bound, the delay is only an upper bound
+            device_factory.wait_for_ime(
+                ADB_KEYBOARD_IME,
+                self.device_id,
+                timeout=TIMING_CONFIG.action.keyboard_switch_delay,
+            )
+
     def _handle_swipe(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle swipe action."""
         start = action.get("start")
@@ -183,20 +251,25 @@ class ActionHandler:
         start_x, start_y = self._convert_relative_to_absolute(start, width, height)
         end_x, end_y = self._convert_relative_to_absolute(end, width, height)
 
-        device_factory = get_device_factory()
-        device_factory.swipe(start_x, start_y, end_x, end_y, device_id=self.device_id)
+        device_factory = self.device_factory
+        device_factory.swipe(
+            start_x, start_y, end_x, end_y, device_id=self.device_id, delay=0
+        )
+        self._settle(TIMING_CONFIG.device.default_swipe_delay, "Swipe")
         return ActionResult(True, False)
 
     def _handle_back(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle back button action."""
-        device_factory = get_device_factory()
-        device_factory.back(self.device_id)
+        device_factory = self.device_factory
+        device_factory.back(self.device_id, delay=0)
+        self._settle(TIMING_CONFIG.device.default_back_delay, "Back")
         return ActionResult(True, False)
 
     def _handle_home(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle home button action."""
-        device_factory = get_device_factory()
-        device_factory.home(self.device_id)
+        device_factory = self.device_factory
+        device_factory.home(self.device_id, delay=0)
+        self._settle(TIMING_CONFIG.device.default_home_delay, "Home")
         return ActionResult(True, False)
 
     def _handle_double_tap(self, action: dict, width: int, height: int) -> ActionResult:
@@ -206,8 +279,9 @@ class ActionHandler:
             return ActionResult(False, False, "No element coordinates")
 
         x, y = self._convert_relative_to_absolute(element, width, height)
-        device_factory = get_device_factory()
-        device_factory.double_tap(x, y, self.device_id)
+        device_factory = self.device_factory
+        device_factory.double_tap(x, y, self.device_id, delay=0)
+        self._settle(TIMING_CONFIG.device.default_double_tap_delay, "Double Tap")
         return ActionResult(True, False)
 
     def _handle_long_press(self, action: dict, width: int, height: int) -> ActionResult:
@@ -217,8 +291,9 @@ class ActionHandler:
             return ActionResult(False, False, "No element coordinates")
 
         x, y = self._convert_relative_to_absolute(element, width, height)
-        device_factory = get_device_factory()
-        device_factory.long_press(x, y, device_id=self.device_id)
+        device_factory = self.device_factory
+        device_factory.long_press(x, y, device_id=self.device_id, delay=0)
+        self._settle(TIMING_CONFIG.device.default_long_press_delay, "Long Press")
         return ActionResult(True, False)
 
     def _handle_wait(self, action: dict, width: int, height: int) -> ActionResult:
@@ -255,12 +330,75 @@ class ActionHandler:
         # This action signals that user input is needed
         return ActionResult(True, False, message="User interaction required")
 
+    def _settle(
+        self, fixed_delay: float, action: str | None = None, app: str | None = None
+    ) -> None:
+        """
+        Wait for the screen to settle after an action.
+
+        In adaptive settle mode, returns once consecutive frames stop
+        changing. Each frame is a full screen capture, only the comparison
+        runs on a thumbnail. With a running frame stream (ADB "stream"
+        capture mode), returns once no changed frame has been decoded for a
+        while since the action started. Otherwise, or if a frame cannot be
+        captured (e.g. on a secure screen), sleeps for the fixed delay.
+
+        When an action name is given and timing profiles are enabled, the
+        learned delay for (app, action) replaces the fixed delay, and settle
+        times observed in adaptive mode are recorded.
+
+        Args:
+            fixed_delay: Global default delay in seconds.
+            action: Action name for timing profiles.
+            app: App name for timing profiles. If None, uses the current app.
+        """
+        timing = TIMING_CONFIG.device
+        app = app or self._current_app
+        profiles = None
+        if action and app and timing.use_timing_profiles:
+            profiles = get_timing_profiles()
+            fixed_delay = profiles.get_delay(app, action, fixed_delay)
+
+        if (self.settle_mode or timing.settle_mode) != "adaptive":
+            time.sleep(fixed_delay)
+            return
+
+        device_factory = self.device_factory
+        source = device_factory.get_frame_source(self.device_id)
+        try:
+            if source is not None:
+                settled, elapsed = wait_for_stream_settle(
+                    source.wait_for_frame,
+                    since=self._action_time,
+                    timeout=timing.settle_timeout,
+                    min_wait=timing.settle_min_wait,
+                    quiet=timing.settle_stream_quiet,
+                    threshold=timing.settle_threshold,
+                )
+            else:
+                settled, elapsed = wait_for_settle(
+                    lambda: device_factory.get_frame(self.device_id),
+                    timeout=timing.settle_timeout,
+                    min_wait=timing.settle_min_wait,
+                    poll_interval=timing.settle_poll_interval,
+                    stable_frames=timing.settle_stable_frames,
+                    threshold=timing.settle_threshold,
+                )
+        except Exception as e:
+            print(f"Settle detection failed, using fixed delay: {e}")
+            time.sleep(fixed_delay)
+            return
+
+        # Timeouts say little about the app (animations, video), skip them
+        if settled and profiles is not None:
+            profiles.record(app, action, elapsed)
+
     def _send_keyevent(self, keycode: str) -> None:
         """Send a keyevent to the device."""
-        from phone_agent.device_factory import DeviceType, get_device_factory
+        from phone_agent.device_factory import DeviceType
         from phone_agent.hdc.connection import _run_hdc_command
 
-        device_factory = get_device_factory()
+        device_factory = self.device_factory
 
         # Handle HDC devices with HarmonyOS-specific keyEvent command
         if device_factory.device_type == DeviceType.HDC:
@@ -310,12 +448,9 @@ class ActionHandler:
                     )
         else:
             # ADB devices use standard input keyevent command
-            cmd_prefix = ["adb", "-s", self.device_id] if self.device_id else ["adb"]
-            subprocess.run(
-                cmd_prefix + ["shell", "input", "keyevent", keycode],
-                capture_output=True,
-                text=True,
-            )
+            from phone_agent.adb.transport import run_shell_command
+
+            run_shell_command(["input", "keyevent", keycode], self.device_id)
 
     @staticmethod
     def _default_confirmation(message: str) -> bool:
@@ -344,47 +479,18 @@ def parse_action(response: str) -> dict[str, Any]:
     """
     print(f"Parsing action: {response}")
     try:
-        response = response.strip()
-        if response.startswith('do(action="Type"') or response.startswith(
-            'do(action="Type_Name"'
-        ):
-            text = response.split("text=", 1)[1][1:-2]
-            action = {"_metadata": "do", "action": "Type", "text": text}
-            return action
-        elif response.startswith("do"):
-            # Use AST parsing instead of eval for safety
-            try:
-                # Escape special characters (newlines, tabs, etc.) for valid Python syntax
-                response = response.replace('\n', '\\n')
-                response = response.replace('\r', '\\r')
-                response = response.replace('\t', '\\t')
-
-                tree = ast.parse(response, mode="eval")
-                if not isinstance(tree.body, ast.Call):
-                    raise ValueError("Expected a function call")
-
-                call = tree.body
-                # Extract keyword arguments safely
-                action = {"_metadata": "do"}
-                for keyword in call.keywords:
-                    key = keyword.arg
-                    value = ast.literal_eval(keyword.value)
-                    action[key] = value
-
-                return action
-            except (SyntaxError, ValueError) as e:
-                raise ValueError(f"Failed to parse do() action: {e}")
-
-        elif response.startswith("finish"):
-            action = {
-                "_metadata": "finish",
-                "message": response.replace("finish(message=", "")[1:-2],
-            }
-        else:
-            raise ValueError(f"Failed to parse action: {response}")
-        return action
-    except Exception as e:
-        raise ValueError(f"Failed to parse action: {e}")
+        name, kwargs = parse_call(response.strip())
+    except ValueError as e:
+        raise ValueError(f"Failed to parse action: {e}") from e
+
+    if name == "finish":
+        return {"_metadata": "finish", "message": kwargs.get("message", "")}
+    if name != "do":
+        raise ValueError(f"Failed to parse action: unknown call {name}()")
+
+    if kwargs.get("action") in ("Type", "Type_Name"):
+        return {"_metadata": "do", "action": "Type", "text": kwargs.get("text", "")}
+    return {"_metadata": "do", **kwargs}
 
 
 def do(**kwargs) -> dict[str, Any]:
@@ -14,6 +14,7 @@ from phone_agent.xctest import (
     tap,
 )
 from phone_agent.xctest.input import clear_text, hide_keyboard, type_text
+from phone_agent.xctest.session import ActionBatch, get_wda_session
 
 
 @dataclass
@@ -166,8 +167,11 @@ class IOSActionHandler:
         clear_text(wda_url=self.wda_url, session_id=self.session_id)
         time.sleep(0.5)
 
-        type_text(text, wda_url=self.wda_url, session_id=self.session_id)
-        time.sleep(0.5)
+        # The /actions request returns once every key is typed, so there is no
+        # wait after it. WDA builds that reject key actions get /wda/keys.
+        if not self._type_with_actions(text):
+            type_text(text, wda_url=self.wda_url, session_id=self.session_id)
+            time.sleep(0.5)
 
         # Hide keyboard after typing
         hide_keyboard(wda_url=self.wda_url, session_id=self.session_id)
@@ -175,6 +179,17 @@ class IOSActionHandler:
 
         return ActionResult(True, False)
 
+    def _type_with_actions(self, text: str) -> bool:
+        """Type text as one batch of W3C key actions, returning success."""
+        try:
+            response = get_wda_session(self.wda_url, self.session_id).perform(
+                ActionBatch().type(text), timeout=30
+            )
+        except Exception as e:
+            print(f"Error typing with key actions: {e}")
+            return False
+        return response.status_code in (200, 201)
+
     def _handle_swipe(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle swipe action."""
         start = action.get("start")
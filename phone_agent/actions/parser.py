@@ -0,0 +1,253 @@
+"""Parsing of `do(...)` and `finish(...)` action calls from model output."""
+
+import re
+from typing import Any
+
+_QUOTES = "\"'"
+
+# Characters that may follow a closing quote inside an action call
+_AFTER_STRING = ",)]}:"
+
+_IDENTIFIER = re.compile(r"\s*([A-Za-z_]\w*)")
+_NUMBER = re.compile(r"-?\d+(\.\d*)?([eE][-+]?\d+)?")
+_STRING_STOPS = {quote: re.compile(rf"[\\{quote}]") for quote in _QUOTES}
+_QUOTE_STOPS = {quote: re.compile(quote) for quote in _QUOTES}
+# What may follow a top-level string argument: the next keyword or the end
+_NEXT_KEYWORD = re.compile(r"\s*,\s*[A-Za-z_]\w*\s*=")
+_CALL_END = re.compile(r"\s*\)\s*$")
+
+_CONSTANTS = {"True": True, "False": False, "None": None}
+_ESCAPES = {
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "0": "\0",
+    "\\": "\\",
+    "'": "'",
+    '"': '"',
+    "\n": "",
+}
+
+
+def complete_call(text: str, final: bool = False) -> str | None:
+    """
+    Get the streamed `do(...)` or `finish(...)` call if it is complete.
+
+    The call counts as complete when the whole text streamed so far (apart
+    from a closing </answer> tag and whitespace) parses as one call, so a
+    `")` inside free text is not taken for the end of the call once more
+    text follows it. Free text may still continue after a quote and `)`,
+    so calls with free text are only complete once the answer ends there:
+    at a closing </answer> tag, a newline, or the end of the message.
+
+    Args:
+        text: Action text streamed so far, starting at the call name.
+        final: Whether the message ends here.
+
+    Returns:
+        The call without trailing text, or None if it is not complete yet.
+    """
+    body = text.replace("</answer>", "")
+    call = body.strip()
+    if not call.endswith(")"):
+        return None
+    try:
+        name, kwargs = parse_call(call)
+    except ValueError:
+        return None
+
+    answer_ended = final or "</answer>" in text or body.rstrip(" \t").endswith("\n")
+    if not answer_ended and any(_is_free_text(name, key, kwargs) for key in kwargs):
+        return None
+    return call
+
+
+def parse_call(text: str) -> tuple[str, dict[str, Any]]:
+    """
+    Parse an action call such as `do(action="Tap", element=[500, 300])`.
+
+    Values may be strings, numbers, True/False/None and nested lists, tuples
+    and dicts of those. The text is read in a single pass.
+
+    Top-level string arguments only close at a quote followed by the next
+    `key=` or by the final parenthesis, so unescaped quotes and `")` inside
+    free text are kept. Free text (Type text, finish message) is returned
+    verbatim, backslashes included; other strings have their escapes
+    decoded.
+
+    Args:
+        text: The call, without surrounding whitespace.
+
+    Returns:
+        Tuple of (call name, keyword arguments).
+
+    Raises:
+        ValueError: If the text is not a call with keyword arguments.
+    """
+    return _CallParser(text).parse()
+
+
+def _is_free_text(name: str, key: str, kwargs: dict[str, Any]) -> bool:
+    """Whether an argument is model-written free text, kept verbatim."""
+    if name == "finish":
+        return key == "message"
+    return key == "text" and kwargs.get("action") in ("Type", "Type_Name")
+
+
+class _CallParser:
+    """Recursive descent parser over one action call."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def parse(self) -> tuple[str, dict[str, Any]]:
+        name = self._identifier()
+        self._expect("(")
+        kwargs: dict[str, Any] = {}
+        while not self._next_is(")"):
+            key = self._identifier()
+            self._expect("=")
+            kwargs[key] = self._value(
+                top_level=True, raw=_is_free_text(name, key, kwargs)
+            )
+            if not self._next_is(","):
+                break
+            self.pos += 1
+        self._expect(")")
+
+        if self.text[self.pos :].strip():
+            raise ValueError(f"Unexpected text after call at position {self.pos}")
+        return name, kwargs
+
+    def _skip_space(self) -> None:
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def _next_is(self, char: str) -> bool:
+        self._skip_space()
+        return self.text.startswith(char, self.pos)
+
+    def _expect(self, char: str) -> None:
+        if not self._next_is(char):
+            raise ValueError(f"Expected {char!r} at position {self.pos}")
+        self.pos += 1
+
+    def _identifier(self) -> str:
+        match = _IDENTIFIER.match(self.text, self.pos)
+        if match is None:
+            raise ValueError(f"Expected a name at position {self.pos}")
+        self.pos = match.end()
+        return match.group(1)
+
+    def _value(self, top_level: bool = False, raw: bool = False) -> Any:
+        self._skip_space()
+        char = self.text[self.pos : self.pos + 1]
+
+        if char in _QUOTES and char:
+            return self._string(top_level, raw)
+        if char == "[":
+            return self._sequence("]")
+        if char == "(":
+            return self._sequence(")")
+        if char == "{":
+            return self._dict()
+
+        match = _NUMBER.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            if match.group(1) or match.group(2):
+                return float(match.group())
+            return int(match.group())
+
+        match = _IDENTIFIER.match(self.text, self.pos)
+        if match and match.group(1) in _CONSTANTS:
+            self.pos = match.end()
+            return _CONSTANTS[match.group(1)]
+
+        raise ValueError(f"Unexpected value at position {self.pos}")
+
+    def _string(self, top_level: bool, raw: bool) -> str:
+        text = self.text
+        quote = text[self.pos]
+        # Backslashes in free text are plain characters, even before a quote
+        stops = _QUOTE_STOPS[quote] if raw else _STRING_STOPS[quote]
+        chunks = []
+        i = self.pos + 1
+
+        while True:
+            match = stops.search(text, i)
+            if match is None:
+                raise ValueError(f"Unterminated string at position {self.pos}")
+            j = match.start()
+            chunks.append(text[i:j])
+
+            if text[j] == "\\":
+                decoded, i = self._escape(j)
+                chunks.append(decoded)
+                continue
+
+            if self._closes(j + 1, top_level):
+                self.pos = j + 1
+                return "".join(chunks)
+            chunks.append(quote)
+            i = j + 1
+
+    def _escape(self, i: int) -> tuple[str, int]:
+        """Decode the escape sequence at i, returning it and the index after it."""
+        text = self.text
+        char = text[i + 1 : i + 2]
+        if char in _ESCAPES and char:
+            return _ESCAPES[char], i + 2
+
+        digits = {"x": 2, "u": 4, "U": 8}.get(char)
+        if digits:
+            code = text[i + 2 : i + 2 + digits]
+            try:
+                return chr(int(code, 16)), i + 2 + digits
+            except ValueError:
+                raise ValueError(f"Invalid escape at position {i}") from None
+
+        # Unknown escapes keep their backslash, as in Python
+        return text[i : i + 2], i + 2
+
+    def _closes(self, i: int, top_level: bool) -> bool:
+        """Whether a quote ending just before i closes the string."""
+        if top_level:
+            return bool(
+                _CALL_END.match(self.text, i) or _NEXT_KEYWORD.match(self.text, i)
+            )
+        while i < len(self.text) and self.text[i].isspace():
+            i += 1
+        return i < len(self.text) and self.text[i] in _AFTER_STRING
+
+    def _sequence(self, closing: str) -> list | tuple:
+        self.pos += 1
+        items = []
+        trailing_comma = False
+        while not self._next_is(closing):
+            items.append(self._value())
+            trailing_comma = self._next_is(",")
+            if not trailing_comma:
+                break
+            self.pos += 1
+        self._expect(closing)
+
+        if closing == "]":
+            return items
+        if len(items) == 1 and not trailing_comma:
+            return items[0]
+        return tuple(items)
+
+    def _dict(self) -> dict:
+        self.pos += 1
+        result = {}
+        while not self._next_is("}"):
+            key = self._value()
+            self._expect(":")
+            result[key] = self._value()
+            if not self._next_is(","):
+                break
+            self.pos += 1
+        self._expect("}")
+        return result
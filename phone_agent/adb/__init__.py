@@ -12,29 +12,62 @@ from phone_agent.adb.device import (
     double_tap,
     get_current_app,
     home,
+    invalidate_current_app,
     launch_app,
     long_press,
     swipe,
     tap,
 )
+from phone_agent.adb.frame_source import (
+    Frame,
+    ScreenrecordFrameSource,
+    close_frame_sources,
+    get_frame_source,
+)
 from phone_agent.adb.input import (
+    ADB_KEYBOARD_IME,
     clear_text,
     detect_and_set_adb_keyboard,
+    get_current_ime,
     restore_keyboard,
     type_text,
+    wait_for_ime,
+)
+from phone_agent.adb.protocol import ADBProtocolError, ADBServerClient
+from phone_agent.adb.screenshot import (
+    get_active_frame_source,
+    get_frame,
+    get_screenshot,
+)
+from phone_agent.adb.shell import ADBShell, close_shells
+from phone_agent.adb.transport import (
+    ADBTransport,
+    get_adb_transport,
+    run_exec_out,
+    run_shell_command,
+    set_adb_transport,
 )
-from phone_agent.adb.screenshot import get_screenshot
 
 __all__ = [
     # Screenshot
     "get_screenshot",
+    "get_frame",
+    "ScreenrecordFrameSource",
+    "Frame",
+    "get_frame_source",
+    "get_active_frame_source",
+    "close_frame_sources",
     # Input
     "type_text",
     "clear_text",
     "detect_and_set_adb_keyboard",
     "restore_keyboard",
+    "get_current_ime",
+    "wait_for_ime",
+    "ADB_KEYBOARD_IME",
     # Device control
     "get_current_app",
+    "invalidate_current_app",
     "tap",
     "swipe",
     "back",
@@ -48,4 +81,14 @@ __all__ = [
     "ConnectionType",
     "quick_connect",
     "list_devices",
+    # Command transport
+    "ADBTransport",
+    "ADBShell",
+    "set_adb_transport",
+    "get_adb_transport",
+    "run_shell_command",
+    "run_exec_out",
+    "close_shells",
+    "ADBServerClient",
+    "ADBProtocolError",
 ]
@@ -1,41 +1,113 @@
 """Device control utilities for Android automation."""
 
 import os
-import subprocess
+import re
 import time
 from typing import List, Optional, Tuple
 
-from phone_agent.config.apps import APP_PACKAGES
+from phone_agent.adb.transport import run_shell_command
+from phone_agent.config.apps import APP_PACKAGES, get_app_name
 from phone_agent.config.timing import TIMING_CONFIG
 
+_FOCUS_FILTER = "mCurrentFocus|mFocusedApp"
+# Package of the focused window or activity, e.g.
+# mCurrentFocus=Window{1a2b u0 com.tencent.mm/com.tencent.mm.ui.LauncherUI}
+_FOCUS_PATTERN = re.compile(
+    rf"(?:{_FOCUS_FILTER})=[^\n]*?([A-Za-z]\w*(?:\.\w+)+)/", re.MULTILINE
+)
+# Package of the resumed activity, e.g.
+# topResumedActivity=ActivityRecord{3c4d u0 com.tencent.mm/.ui.LauncherUI t12}
+_RESUMED_PATTERN = re.compile(
+    r"ResumedActivity[:=]\s*ActivityRecord\{[^\n]*?([A-Za-z]\w*(?:\.\w+)+)/"
+)
+
+# Foreground probes, cheapest first: shell command and the package pattern.
+# Output is filtered on the device, the full window dump is the last resort.
+_FOREGROUND_PROBES: list[tuple[list[str], re.Pattern]] = [
+    (
+        ["dumpsys", "activity", "activities", "|", "grep", "ResumedActivity"],
+        _RESUMED_PATTERN,
+    ),
+    (
+        ["dumpsys", "window", "displays", "|", "grep", "-E", f"'{_FOCUS_FILTER}'"],
+        _FOCUS_PATTERN,
+    ),
+    (
+        ["dumpsys", "window", "windows", "|", "grep", "-E", f"'{_FOCUS_FILTER}'"],
+        _FOCUS_PATTERN,
+    ),
+    (["dumpsys", "window"], _FOCUS_PATTERN),
+]
+
+# Probes that gave no output are skipped for this long, then tried again
+PROBE_RETRY_INTERVAL = 300.0
+
+# Per device: cached foreground app, and the first probe that gave output
+# with the time.monotonic() until which the probes before it are skipped
+_current_apps: dict[str | None, str] = {}
+_first_probe: dict[str | None, tuple[int, float]] = {}
+
 
 def get_current_app(device_id: str | None = None) -> str:
     """
     Get the currently focused app name.
 
+    Probes run cheapest first until one finds the foreground package; probes
+    that give no output on a device (unsupported ROM, no grep) are skipped
+    for PROBE_RETRY_INTERVAL seconds. The first package of the probe output
+    that maps to a known app wins. The result is cached until an action that
+    can change the foreground runs through this module or
+    invalidate_current_app() is called.
+
     Args:
         device_id: Optional ADB device ID for multi-device setups.
 
     Returns:
         The app name if recognized, otherwise "System Home".
     """
-    adb_prefix = _get_adb_prefix(device_id)
-
-    result = subprocess.run(
-        adb_prefix + ["shell", "dumpsys", "window"], capture_output=True, text=True, encoding="utf-8"
-    )
-    output = result.stdout
-    if not output:
+    app_name = _current_apps.get(device_id)
+    if app_name is not None:
+        return app_name
+
+    app_name = None
+    any_output = False
+    first, skip_until = _first_probe.get(device_id, (0, 0.0))
+    if time.monotonic() >= skip_until:
+        first = 0
+    for index in range(first, len(_FOREGROUND_PROBES)):
+        command, pattern = _FOREGROUND_PROBES[index]
+        output = run_shell_command(command, device_id).stdout
+        if not output:
+            if not any_output:
+                _first_probe[device_id] = (
+                    index + 1,
+                    time.monotonic() + PROBE_RETRY_INTERVAL,
+                )
+            continue
+        any_output = True
+        packages = pattern.findall(output)
+        if packages:
+            # The focused window can be a system dialog over the focused app
+            app_name = next(filter(None, map(get_app_name, packages)), None)
+            break
+
+    if not any_output:
+        _first_probe.pop(device_id, None)
         raise ValueError("No output from dumpsys window")
 
-    # Parse window focus info
-    for line in output.split("\n"):
-        if "mCurrentFocus" in line or "mFocusedApp" in line:
-            for app_name, package in APP_PACKAGES.items():
-                if package in line:
-                    return app_name
+    app_name = app_name or "System Home"
+    _current_apps[device_id] = app_name
+    return app_name
 
-    return "System Home"
+
+def invalidate_current_app(device_id: str | None = None) -> None:
+    """
+    Drop the cached foreground app, e.g. after input from outside this module.
+
+    Args:
+        device_id: Optional ADB device ID.
+    """
+    _current_apps.pop(device_id, None)
 
 
 def tap(
@@ -53,11 +125,8 @@ def tap(
     if delay is None:
         delay = TIMING_CONFIG.device.default_tap_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True
-    )
+    run_shell_command(["input", "tap", str(x), str(y)], device_id)
+    invalidate_current_app(device_id)
     time.sleep(delay)
 
 
@@ -76,15 +145,10 @@ def double_tap(
     if delay is None:
         delay = TIMING_CONFIG.device.default_double_tap_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True
-    )
+    run_shell_command(["input", "tap", str(x), str(y)], device_id)
     time.sleep(TIMING_CONFIG.device.double_tap_interval)
-    subprocess.run(
-        adb_prefix + ["shell", "input", "tap", str(x), str(y)], capture_output=True
-    )
+    run_shell_command(["input", "tap", str(x), str(y)], device_id)
+    invalidate_current_app(device_id)
     time.sleep(delay)
 
 
@@ -108,13 +172,11 @@ def long_press(
     if delay is None:
         delay = TIMING_CONFIG.device.default_long_press_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix
-        + ["shell", "input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
-        capture_output=True,
+    run_shell_command(
+        ["input", "swipe", str(x), str(y), str(x), str(y), str(duration_ms)],
+        device_id,
     )
+    invalidate_current_app(device_id)
     time.sleep(delay)
 
 
@@ -142,18 +204,14 @@ def swipe(
     if delay is None:
         delay = TIMING_CONFIG.device.default_swipe_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
     if duration_ms is None:
         # Calculate duration based on distance
         dist_sq = (start_x - end_x) ** 2 + (start_y - end_y) ** 2
         duration_ms = int(dist_sq / 1000)
         duration_ms = max(1000, min(duration_ms, 2000))  # Clamp between 1000-2000ms
 
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
+    run_shell_command(
+        [
             "input",
             "swipe",
             str(start_x),
@@ -162,8 +220,9 @@ def swipe(
             str(end_y),
             str(duration_ms),
         ],
-        capture_output=True,
+        device_id,
     )
+    invalidate_current_app(device_id)
     time.sleep(delay)
 
 
@@ -178,11 +237,8 @@ def back(device_id: str | None = None, delay: float | None = None) -> None:
     if delay is None:
         delay = TIMING_CONFIG.device.default_back_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "keyevent", "4"], capture_output=True
-    )
+    run_shell_command(["input", "keyevent", "4"], device_id)
+    invalidate_current_app(device_id)
     time.sleep(delay)
 
 
@@ -197,11 +253,8 @@ def home(device_id: str | None = None, delay: float | None = None) -> None:
     if delay is None:
         delay = TIMING_CONFIG.device.default_home_delay
 
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "input", "keyevent", "KEYCODE_HOME"], capture_output=True
-    )
+    run_shell_command(["input", "keyevent", "KEYCODE_HOME"], device_id)
+    invalidate_current_app(device_id)
     time.sleep(delay)
 
 
@@ -225,13 +278,10 @@ def launch_app(
     if app_name not in APP_PACKAGES:
         return False
 
-    adb_prefix = _get_adb_prefix(device_id)
     package = APP_PACKAGES[app_name]
 
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
+    run_shell_command(
+        [
             "monkey",
             "-p",
             package,
@@ -239,14 +289,9 @@ def launch_app(
             "android.intent.category.LAUNCHER",
             "1",
         ],
-        capture_output=True,
+        device_id,
     )
+    invalidate_current_app(device_id)
     time.sleep(delay)
     return True
 
-
-def _get_adb_prefix(device_id: str | None) -> list:
-    """Get ADB command prefix with optional device specifier."""
-    if device_id:
-        return ["adb", "-s", device_id]
-    return ["adb"]
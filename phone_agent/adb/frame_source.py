@@ -0,0 +1,321 @@
+"""Continuous screen frames for Android from a screenrecord H.264 stream."""
+
+import atexit
+import multiprocessing
+import re
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+from phone_agent.adb.transport import _get_adb_prefix, run_shell_command
+
+# Encoder bit rate for the stream. Higher keeps text sharper in frames.
+DEFAULT_BIT_RATE = 8_000_000
+
+# screenrecord stops after its time limit (180 s), the worker then restarts
+# it. Give up after this many restarts in a row without a decoded frame.
+_MAX_EMPTY_RESTARTS = 3
+
+_SIZE_PATTERN = re.compile(r"(\d+)x(\d+)")
+
+_sources: dict[str | None, "ScreenrecordFrameSource"] = {}
+_sources_lock = threading.Lock()
+
+
+@dataclass
+class Frame:
+    """One decoded frame from the stream."""
+
+    image: Image.Image  # RGB
+    timestamp: float  # time.time() when the frame was decoded
+
+
+class ScreenrecordFrameSource:
+    """
+    Latest-frame access to the device screen via `screenrecord`.
+
+    Runs `adb exec-out screenrecord --output-format=h264 -` in a worker
+    process that decodes the stream with PyAV and writes each frame into
+    shared memory. Reading the latest frame is then a memory copy instead of
+    a 300-1000 ms `screencap`. screenrecord only emits frames when the screen
+    changes, so the latest frame stays current on a static screen.
+
+    Frames are lossy H.264. Use get_screenshot(mode="exec-out") or
+    snapshot() where a pixel-exact capture is needed. Secure windows show up
+    black in the stream instead of failing the capture.
+
+    Args:
+        device_id: Optional ADB device ID.
+        bit_rate: Encoder bit rate in bits per second.
+
+    Raises:
+        ImportError: On start(), if PyAV is not installed.
+
+    Example:
+        >>> source = ScreenrecordFrameSource(device_id).start()
+        >>> frame = source.wait_for_frame(after=time.time(), timeout=2.0)
+    """
+
+    def __init__(self, device_id: str | None = None, bit_rate: int = DEFAULT_BIT_RATE):
+        self.device_id = device_id
+        self.bit_rate = bit_rate
+        self.started = False
+        self._process = None
+        self._shm: shared_memory.SharedMemory | None = None
+        self._meta = None
+        self._condition = None
+        self._stop = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker process is alive."""
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> "ScreenrecordFrameSource":
+        """
+        Start the screenrecord and decoder worker if not running.
+
+        Returns:
+            This frame source.
+
+        Raises:
+            ImportError: If PyAV is not installed.
+            ValueError: If the screen size cannot be read.
+        """
+        with self._start_lock:
+            if self.running:
+                return self
+            self._release()
+            self.started = True
+
+            try:
+                import av  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    "PyAV is required for the screenrecord frame source. "
+                    "Install: pip install av"
+                )
+
+            width, height = _get_display_size(self.device_id)
+            # Rotated frames have the same byte count
+            self._shm = shared_memory.SharedMemory(create=True, size=width * height * 3)
+
+            context = multiprocessing.get_context("spawn")
+            # sequence, timestamp, width, height of the frame in shared memory
+            self._meta = context.Array("d", 4, lock=False)
+            self._condition = context.Condition()
+            self._stop = context.Event()
+            command = _get_adb_prefix(self.device_id) + [
+                "exec-out",
+                "screenrecord",
+                "--output-format=h264",
+                f"--bit-rate={self.bit_rate}",
+                "-",
+            ]
+            self._process = context.Process(
+                target=_decode_worker,
+                args=(command, self._shm.name, self._meta, self._condition, self._stop),
+                name="screenrecord-decoder",
+                daemon=True,
+            )
+            self._process.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the worker process and release the shared frame buffer."""
+        with self._start_lock:
+            self._release()
+
+    def latest(self) -> Frame | None:
+        """
+        Get the latest decoded frame.
+
+        Returns:
+            The newest frame, or None if the worker is not running or has not
+            decoded a frame yet.
+        """
+        if not self.running:
+            return None
+        with self._condition:
+            return self._read_frame()
+
+    def wait_for_frame(
+        self, after: float | None = None, timeout: float = 1.0
+    ) -> Frame | None:
+        """
+        Wait for a frame decoded after a point in time.
+
+        Args:
+            after: time.time() value the frame must be newer than. Defaults
+                to now, i.e. the next frame.
+            timeout: Maximum time to wait in seconds.
+
+        Returns:
+            The frame, or None if the screen did not change in time.
+        """
+        if after is None:
+            after = time.time()
+        if not self.running:
+            return None
+        with self._condition:
+            if self._condition.wait_for(
+                lambda: self._meta[0] > 0 and self._meta[1] > after, timeout
+            ):
+                return self._read_frame()
+        return None
+
+    def snapshot(self, timeout: int = 10):
+        """
+        Take a pixel-exact PNG screenshot with `screencap`, bypassing the stream.
+
+        Args:
+            timeout: Timeout in seconds.
+
+        Returns:
+            Screenshot object.
+        """
+        from phone_agent.adb.screenshot import get_screenshot
+
+        return get_screenshot(self.device_id, timeout, mode="exec-out")
+
+    def _read_frame(self) -> Frame | None:
+        sequence, timestamp, width, height = self._meta
+        if sequence == 0:
+            return None
+        size = (int(width), int(height))
+        data = bytes(self._shm.buf[: size[0] * size[1] * 3])
+        return Frame(Image.frombytes("RGB", size, data), timestamp)
+
+    def _release(self) -> None:
+        if self._process is not None:
+            self._stop.set()
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                # SIGTERM lets the worker kill screenrecord, SIGKILL would not
+                self._process.terminate()
+                self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+            self._process = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def _get_display_size(device_id: str | None) -> tuple[int, int]:
+    """Read the display size from `wm size`, the override size if set."""
+    output = run_shell_command(["wm", "size"], device_id).stdout
+    sizes = _SIZE_PATTERN.findall(output)
+    if not sizes:
+        raise ValueError(f"Cannot read display size: {output.strip()}")
+    width, height = sizes[-1]
+    return int(width), int(height)
+
+
+def _decode_worker(command, shm_name, meta, condition, stop) -> None:
+    """Worker process: run screenrecord and publish decoded frames."""
+    import av
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    processes: list[subprocess.Popen] = []
+
+    def kill_on_stop() -> None:
+        # Reads block while the screen is static, closing the pipe ends them
+        stop.wait()
+        for process in processes:
+            process.kill()
+
+    def terminate(signum, frame) -> None:
+        # Process.terminate(), also sent to daemon workers at interpreter exit
+        stop.set()
+        for process in processes:
+            process.kill()
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, terminate)
+    threading.Thread(target=kill_on_stop, daemon=True).start()
+
+    empty_restarts = 0
+    try:
+        while not stop.is_set() and empty_restarts < _MAX_EMPTY_RESTARTS:
+            process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            processes[:] = [process]
+            if stop.is_set():
+                break
+
+            codec = av.CodecContext.create("h264", "r")
+            codec.options = {"flags": "low_delay"}
+            decoded = False
+
+            while not stop.is_set():
+                chunk = process.stdout.read1(65536)
+                if not chunk:
+                    break
+                for packet in codec.parse(chunk):
+                    for frame in codec.decode(packet):
+                        data = frame.to_image().tobytes()
+                        if len(data) > shm.size:
+                            continue
+                        with condition:
+                            shm.buf[: len(data)] = data
+                            meta[0] += 1
+                            meta[1] = time.time()
+                            meta[2] = frame.width
+                            meta[3] = frame.height
+                            condition.notify_all()
+                        decoded = True
+
+            process.kill()
+            process.wait()
+            empty_restarts = 0 if decoded else empty_restarts + 1
+    finally:
+        for process in processes:
+            process.kill()
+        shm.close()
+
+
+def get_frame_source(device_id: str | None = None) -> ScreenrecordFrameSource:
+    """
+    Get the shared frame source for a device, starting it on first use.
+
+    A source whose worker stopped (e.g. screenrecord is unsupported) is not
+    restarted, its latest() stays None so callers use their fallback.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        The ScreenrecordFrameSource for that device.
+
+    Raises:
+        ImportError: On first use, if PyAV is not installed.
+    """
+    with _sources_lock:
+        source = _sources.get(device_id)
+        if source is None:
+            source = _sources[device_id] = ScreenrecordFrameSource(device_id)
+    if not source.started:
+        source.start()
+    return source
+
+
+def close_frame_sources() -> None:
+    """Stop all shared frame sources."""
+    with _sources_lock:
+        for source in _sources.values():
+            source.stop()
+        _sources.clear()
+
+
+# Workers are daemons, stop them first so screenrecord does not outlive us
+atexit.register(close_frame_sources)
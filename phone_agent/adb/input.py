@@ -1,9 +1,17 @@
 """Input utilities for Android device text input."""
 
 import base64
-import subprocess
+import re
+import time
 from typing import Optional
 
+from phone_agent.adb.transport import run_shell_command
+
+ADB_KEYBOARD_IME = "com.android.adbkeyboard/.AdbIME"
+
+# IME bound by the input method service, e.g. mCurMethodId=com.foo/.FooIME
+_IME_PATTERN = re.compile(r"mCur(?:Method)?Id=(\S+)")
+
 
 def type_text(text: str, device_id: str | None = None) -> None:
     """
@@ -17,13 +25,10 @@ def type_text(text: str, device_id: str | None = None) -> None:
         Requires ADB Keyboard to be installed on the device.
         See: https://github.com/nicnocquee/AdbKeyboard
     """
-    adb_prefix = _get_adb_prefix(device_id)
     encoded_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
 
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
+    run_shell_command(
+        [
             "am",
             "broadcast",
             "-a",
@@ -32,8 +37,7 @@ def type_text(text: str, device_id: str | None = None) -> None:
             "msg",
             encoded_text,
         ],
-        capture_output=True,
-        text=True,
+        device_id,
     )
 
 
@@ -44,13 +48,7 @@ def clear_text(device_id: str | None = None) -> None:
     Args:
         device_id: Optional ADB device ID for multi-device setups.
     """
-    adb_prefix = _get_adb_prefix(device_id)
-
-    subprocess.run(
-        adb_prefix + ["shell", "am", "broadcast", "-a", "ADB_CLEAR_TEXT"],
-        capture_output=True,
-        text=True,
-    )
+    run_shell_command(["am", "broadcast", "-a", "ADB_CLEAR_TEXT"], device_id)
 
 
 def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
@@ -63,23 +61,15 @@ def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
     Returns:
         The original keyboard IME identifier for later restoration.
     """
-    adb_prefix = _get_adb_prefix(device_id)
-
     # Get current IME
-    result = subprocess.run(
-        adb_prefix + ["shell", "settings", "get", "secure", "default_input_method"],
-        capture_output=True,
-        text=True,
+    result = run_shell_command(
+        ["settings", "get", "secure", "default_input_method"], device_id
     )
     current_ime = (result.stdout + result.stderr).strip()
 
     # Switch to ADB Keyboard if not already set
-    if "com.android.adbkeyboard/.AdbIME" not in current_ime:
-        subprocess.run(
-            adb_prefix + ["shell", "ime", "set", "com.android.adbkeyboard/.AdbIME"],
-            capture_output=True,
-            text=True,
-        )
+    if ADB_KEYBOARD_IME not in current_ime:
+        run_shell_command(["ime", "set", ADB_KEYBOARD_IME], device_id)
 
     # Warm up the keyboard
     type_text("", device_id)
@@ -95,15 +85,56 @@ def restore_keyboard(ime: str, device_id: str | None = None) -> None:
         ime: The IME identifier to restore.
         device_id: Optional ADB device ID for multi-device setups.
     """
-    adb_prefix = _get_adb_prefix(device_id)
+    run_shell_command(["ime", "set", ime], device_id)
+
+
+def get_current_ime(device_id: str | None = None) -> str:
+    """
+    Get the IME currently bound to input fields.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
 
-    subprocess.run(
-        adb_prefix + ["shell", "ime", "set", ime], capture_output=True, text=True
+    Returns:
+        The IME identifier, falling back to the default IME setting if the
+        input method service does not report one.
+    """
+    result = run_shell_command(
+        ["dumpsys", "input_method", "|", "grep", "-E", "'mCurMethodId|mCurId'"],
+        device_id,
+    )
+    match = _IME_PATTERN.search(result.stdout)
+    if match:
+        return match.group(1)
+
+    result = run_shell_command(
+        ["settings", "get", "secure", "default_input_method"], device_id
     )
+    return result.stdout.strip()
+
 
+def wait_for_ime(
+    ime: str,
+    device_id: str | None = None,
+    timeout: float = 1.0,
+    poll_interval: float = 0.1,
+) -> bool:
+    """
+    Wait until an IME is active.
 
-def _get_adb_prefix(device_id: str | None) -> list:
-    """Get ADB command prefix with optional device specifier."""
-    if device_id:
-        return ["adb", "-s", device_id]
-    return ["adb"]
+    Args:
+        ime: The IME identifier to wait for.
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Maximum time to wait in seconds.
+        poll_interval: Time between probes in seconds.
+
+    Returns:
+        True if the IME became active, False on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if get_current_ime(device_id) == ime:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_interval)
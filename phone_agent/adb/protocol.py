@@ -0,0 +1,358 @@
+"""Native client for the ADB server wire protocol.
+
+Talks to the ADB server (normally localhost:5037) over a socket instead of
+forking the `adb` executable for every command. See the protocol description
+in AOSP: packages/modules/adb/OVERVIEW.TXT, SERVICES.TXT and SYNC.TXT.
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+
+DEFAULT_HOST = os.getenv("ANDROID_ADB_SERVER_ADDRESS", "127.0.0.1")
+DEFAULT_PORT = int(os.getenv("ANDROID_ADB_SERVER_PORT", "5037"))
+
+# Shell protocol v2 packet ids
+_SHELL_STDOUT = 1
+_SHELL_STDERR = 2
+_SHELL_EXIT = 3
+
+# Maximum payload of a single sync DATA packet
+_SYNC_DATA_MAX = 64 * 1024
+
+
+class ADBProtocolError(Exception):
+    """Raised when the ADB server rejects a request or replies unexpectedly."""
+
+
+class ADBServerClient:
+    """
+    Client for the ADB server's host, shell, exec and sync services.
+
+    Each shell or exec command uses its own short-lived localhost socket (the
+    server dedicates a socket to one service). Per-serial device features and
+    the sync connection are kept and reused across calls.
+
+    Args:
+        host: ADB server host.
+        port: ADB server port.
+
+    Example:
+        >>> client = ADBServerClient()
+        >>> client.shell("emulator-5554", "getprop ro.product.model")
+        (0, 'sdk_gphone64_arm64\\n', '')
+        >>> png = client.exec_out("emulator-5554", "screencap -p")
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._features: dict[str | None, set[str]] = {}
+        self._sync_sockets: dict[str | None, socket.socket] = {}
+        self._sync_locks: dict[str | None, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    # Host services
+
+    def version(self) -> int:
+        """Get the ADB server's internal protocol version."""
+        return int(self._host_query("host:version"), 16)
+
+    def devices(self) -> list[tuple[str, str]]:
+        """
+        List devices known to the server.
+
+        Returns:
+            List of (serial, state) tuples.
+        """
+        devices = []
+        for line in self._host_query("host:devices").splitlines():
+            parts = line.split("\t")
+            if len(parts) >= 2:
+                devices.append((parts[0], parts[1]))
+        return devices
+
+    def features(self, serial: str | None = None) -> set[str]:
+        """
+        Get the feature set shared by the server and a device (cached).
+
+        Args:
+            serial: Device serial. If None, uses the only connected device.
+
+        Returns:
+            Set of feature names such as "shell_v2".
+        """
+        with self._lock:
+            cached = self._features.get(serial)
+        if cached is not None:
+            return cached
+
+        if serial:
+            reply = self._host_query(f"host-serial:{serial}:features")
+        else:
+            reply = self._host_query("host:features")
+        features = set(filter(None, reply.strip().split(",")))
+
+        with self._lock:
+            self._features[serial] = features
+        return features
+
+    # Device services
+
+    def shell(
+        self, serial: str | None, command: str, timeout: float | None = None
+    ) -> tuple[int, str, str]:
+        """
+        Run a shell command on the device.
+
+        Uses the v2 shell protocol when available, which separates stdout
+        from stderr and reports the exit code. Older devices fall back to the
+        legacy shell service, where the exit code is always reported as 0.
+
+        Args:
+            serial: Device serial. If None, uses the only connected device.
+            command: Shell command line.
+            timeout: Socket timeout in seconds.
+
+        Returns:
+            Tuple of (exit code, stdout, stderr).
+        """
+        if "shell_v2" not in self.features(serial):
+            output = self._device_service(serial, f"shell:{command}", timeout)
+            return 0, output.decode("utf-8", errors="replace"), ""
+
+        with self._open_service(serial, f"shell,v2,raw:{command}", timeout) as sock:
+            stdout, stderr = bytearray(), bytearray()
+            returncode = -1
+            while True:
+                header = _recv_exact(sock, 5, allow_eof=True)
+                if not header:
+                    break
+                packet_id, length = struct.unpack("<BI", header)
+                payload = _recv_exact(sock, length)
+                if packet_id == _SHELL_STDOUT:
+                    stdout += payload
+                elif packet_id == _SHELL_STDERR:
+                    stderr += payload
+                elif packet_id == _SHELL_EXIT:
+                    returncode = payload[0] if payload else 0
+                    break
+
+        return (
+            returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+
+    def exec_out(
+        self, serial: str | None, command: str, timeout: float | None = None
+    ) -> bytes:
+        """
+        Run a command and return its raw binary stdout (like `adb exec-out`).
+
+        Args:
+            serial: Device serial. If None, uses the only connected device.
+            command: Command line.
+            timeout: Socket timeout in seconds.
+
+        Returns:
+            Raw output bytes.
+        """
+        return self._device_service(serial, f"exec:{command}", timeout)
+
+    def pull(self, serial: str | None, remote_path: str) -> bytes:
+        """
+        Read a file from the device through the sync service.
+
+        Args:
+            serial: Device serial. If None, uses the only connected device.
+            remote_path: Path on the device.
+
+        Returns:
+            File content.
+        """
+
+        def receive(sock: socket.socket) -> bytes:
+            _send_sync_request(sock, b"RECV", remote_path.encode("utf-8"))
+            data = bytearray()
+            while True:
+                packet_id, length = struct.unpack("<4sI", _recv_exact(sock, 8))
+                if packet_id == b"DATA":
+                    data += _recv_exact(sock, length)
+                elif packet_id == b"DONE":
+                    return bytes(data)
+                elif packet_id == b"FAIL":
+                    message = _recv_exact(sock, length).decode("utf-8", "replace")
+                    raise ADBProtocolError(f"pull {remote_path} failed: {message}")
+                else:
+                    raise ADBProtocolError(f"Unexpected sync reply: {packet_id!r}")
+
+        return self._with_sync(serial, receive)
+
+    def push(
+        self, serial: str | None, data: bytes, remote_path: str, mode: int = 0o644
+    ) -> None:
+        """
+        Write a file to the device through the sync service.
+
+        Args:
+            serial: Device serial. If None, uses the only connected device.
+            data: File content.
+            remote_path: Path on the device.
+            mode: File permission bits.
+        """
+
+        def send(sock: socket.socket) -> None:
+            _send_sync_request(
+                sock, b"SEND", f"{remote_path},{0o100000 | mode}".encode("utf-8")
+            )
+            for offset in range(0, len(data), _SYNC_DATA_MAX):
+                chunk = data[offset : offset + _SYNC_DATA_MAX]
+                _send_sync_request(sock, b"DATA", chunk)
+            sock.sendall(struct.pack("<4sI", b"DONE", int(time.time())))
+
+            packet_id, length = struct.unpack("<4sI", _recv_exact(sock, 8))
+            if packet_id == b"FAIL":
+                message = _recv_exact(sock, length).decode("utf-8", "replace")
+                raise ADBProtocolError(f"push {remote_path} failed: {message}")
+            if packet_id != b"OKAY":
+                raise ADBProtocolError(f"Unexpected sync reply: {packet_id!r}")
+
+        self._with_sync(serial, send)
+
+    def close(self) -> None:
+        """Close the cached sync connections."""
+        with self._lock:
+            sockets = list(self._sync_sockets.values())
+            self._sync_sockets.clear()
+        for sock in sockets:
+            try:
+                _send_sync_request(sock, b"QUIT", b"")
+            except OSError:
+                pass
+            sock.close()
+
+    # Internals
+
+    def _connect(self, timeout: float | None = None) -> socket.socket:
+        """Open a socket to the ADB server."""
+        sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        sock.settimeout(timeout)
+        return sock
+
+    def _host_query(self, request: str) -> str:
+        """Send a host request and read its length-prefixed reply."""
+        with self._connect(timeout=10) as sock:
+            _send_request(sock, request)
+            _read_status(sock)
+            length = int(_recv_exact(sock, 4), 16)
+            return _recv_exact(sock, length).decode("utf-8", errors="replace")
+
+    def _open_service(
+        self, serial: str | None, service: str, timeout: float | None
+    ) -> socket.socket:
+        """Open a socket bound to a device service."""
+        sock = self._connect(timeout)
+        try:
+            _send_request(
+                sock, f"host:transport:{serial}" if serial else "host:transport-any"
+            )
+            _read_status(sock)
+            _send_request(sock, service)
+            _read_status(sock)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def _device_service(
+        self, serial: str | None, service: str, timeout: float | None
+    ) -> bytes:
+        """Run a device service and read its output until the socket closes."""
+        with self._open_service(serial, service, timeout) as sock:
+            chunks = []
+            while True:
+                chunk = sock.recv(256 * 1024)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks)
+
+    def _with_sync(self, serial: str | None, operation):
+        """Run an operation on the serial's cached sync connection."""
+        with self._lock:
+            lock = self._sync_locks.setdefault(serial, threading.Lock())
+
+        with lock:
+            with self._lock:
+                sock = self._sync_sockets.get(serial)
+            if sock is None:
+                sock = self._open_service(serial, "sync:", timeout=30)
+                with self._lock:
+                    self._sync_sockets[serial] = sock
+            try:
+                return operation(sock)
+            except (OSError, ADBProtocolError):
+                # The sync stream may be out of step now, reconnect next time
+                with self._lock:
+                    if self._sync_sockets.get(serial) is sock:
+                        del self._sync_sockets[serial]
+                sock.close()
+                raise
+
+
+def _send_request(sock: socket.socket, request: str) -> None:
+    """Send a host/service request with its 4-digit hex length prefix."""
+    payload = request.encode("utf-8")
+    sock.sendall(f"{len(payload):04x}".encode("ascii") + payload)
+
+
+def _read_status(sock: socket.socket) -> None:
+    """Read an OKAY/FAIL status, raising ADBProtocolError on FAIL."""
+    status = _recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        length = int(_recv_exact(sock, 4), 16)
+        message = _recv_exact(sock, length).decode("utf-8", errors="replace")
+        raise ADBProtocolError(message)
+    raise ADBProtocolError(f"Unexpected status: {status!r}")
+
+
+def _send_sync_request(sock: socket.socket, packet_id: bytes, payload: bytes) -> None:
+    """Send a sync packet: 4-byte id, little-endian length, payload."""
+    sock.sendall(struct.pack("<4sI", packet_id, len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int, allow_eof: bool = False) -> bytes:
+    """Read exactly size bytes from the socket."""
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            if allow_eof and not data:
+                return b""
+            raise ADBProtocolError("Connection closed by ADB server")
+        data += chunk
+    return bytes(data)
+
+
+# One client per process, sockets are cached per serial inside it
+_client: ADBServerClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_server_client() -> ADBServerClient:
+    """
+    Get the shared ADB server client.
+
+    Returns:
+        The process-wide ADBServerClient.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ADBServerClient()
+        return _client
@@ -2,6 +2,7 @@
 
 import base64
 import os
+import struct
 import subprocess
 import tempfile
 import uuid
@@ -11,6 +12,48 @@ from typing import Tuple
 
 from PIL import Image
 
+from phone_agent.adb.frame_source import ScreenrecordFrameSource, get_frame_source
+from phone_agent.adb.protocol import get_server_client
+from phone_agent.adb.transport import (
+    ADBTransport,
+    get_adb_transport,
+    run_exec_out,
+    run_shell_command,
+)
+from phone_agent.imaging import PNG_SIGNATURE, get_black_png_base64, get_image_size
+
+# Capture modes:
+#   "exec-out": stream PNG bytes from `adb exec-out screencap -p` (no files written)
+#   "raw":      stream the raw framebuffer and encode it on the host
+#   "pull":     legacy `screencap` to a device file, then `adb pull` it
+#   "stream":   latest frame of a background `screenrecord` H.264 stream (needs
+#               PyAV), falls back to "exec-out" while no frame is available
+# All modes follow the ADB command transport, see phone_agent.adb.transport
+CAPTURE_MODE = os.getenv("PHONE_AGENT_SCREENSHOT_MODE", "exec-out")
+
+# Host-side encoding used by the "raw" and "stream" capture modes ("PNG", "JPEG"
+# or "WEBP")
+RAW_OUTPUT_FORMAT = os.getenv("PHONE_AGENT_RAW_SCREENSHOT_FORMAT", "PNG").upper()
+RAW_OUTPUT_QUALITY = int(os.getenv("PHONE_AGENT_RAW_SCREENSHOT_QUALITY", "90"))
+
+# android::PixelFormat values emitted in the raw screencap header, mapped to
+# bytes per pixel
+_RAW_PIXEL_FORMATS = {
+    1: 4,  # RGBA_8888
+    2: 4,  # RGBX_8888
+    3: 3,  # RGB_888
+    4: 2,  # RGB_565
+    5: 4,  # BGRA_8888
+}
+
+_MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+# Fallback image size until a capture on the device succeeded
+DEFAULT_SCREEN_SIZE = (1080, 2400)
+
+# Size of the last successful capture per device, used for fallback images
+_screen_sizes: dict[str | None, tuple[int, int]] = {}
+
 
 @dataclass
 class Screenshot:
@@ -20,15 +63,20 @@ class Screenshot:
     width: int
     height: int
     is_sensitive: bool = False
+    mime_type: str = "image/png"
 
 
-def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screenshot:
+def get_screenshot(
+    device_id: str | None = None, timeout: int = 10, mode: str | None = None
+) -> Screenshot:
     """
     Capture a screenshot from the connected Android device.
 
     Args:
         device_id: Optional ADB device ID for multi-device setups.
         timeout: Timeout in seconds for screenshot operations.
+        mode: Capture mode ("exec-out", "raw", "pull" or "stream"). If None,
+            uses CAPTURE_MODE. "exec-out" gives a pixel-exact PNG.
 
     Returns:
         Screenshot object containing base64 data and dimensions.
@@ -37,52 +85,279 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
         If the screenshot fails (e.g., on sensitive screens like payment pages),
         a black fallback image is returned with is_sensitive=True.
     """
-    temp_path = os.path.join(tempfile.gettempdir(), f"screenshot_{uuid.uuid4()}.png")
-    adb_prefix = _get_adb_prefix(device_id)
+    mode = mode or CAPTURE_MODE
 
     try:
-        # Execute screenshot command
-        result = subprocess.run(
-            adb_prefix + ["shell", "screencap", "-p", "/sdcard/tmp.png"],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
+        if mode == "stream":
+            screenshot = _get_screenshot_stream(device_id)
+            if screenshot:
+                return screenshot
+        if mode == "pull":
+            return _get_screenshot_pull(device_id, timeout)
+        if mode == "raw":
+            return get_screenshot_raw(device_id, timeout)
+        return _get_screenshot_exec_out(device_id, timeout)
+
+    except Exception as e:
+        print(f"Screenshot error: {e}")
+        return _create_fallback_screenshot(is_sensitive=False, device_id=device_id)
+
+
+def _get_screenshot_exec_out(device_id: str | None, timeout: int) -> Screenshot:
+    """Capture a screenshot by streaming PNG bytes through `adb exec-out`."""
+    data = run_exec_out(["screencap", "-p"], device_id, timeout)
+
+    if not data.startswith(PNG_SIGNATURE):
+        # exec-out has no separate stderr channel, so errors arrive on stdout
+        output = data[:256].decode("utf-8", errors="replace")
+        if "Status: -1" in output or "Failed" in output:
+            return _create_fallback_screenshot(is_sensitive=True, device_id=device_id)
+        return _create_fallback_screenshot(is_sensitive=False, device_id=device_id)
+
+    return _screenshot_from_png_bytes(data, device_id)
+
+
+def get_screenshot_raw(
+    device_id: str | None = None,
+    timeout: int = 10,
+    output_format: str | None = None,
+    quality: int | None = None,
+) -> Screenshot:
+    """
+    Capture the raw framebuffer and encode it on the host.
+
+    Skips the on-device PNG compression, which dominates capture time on
+    low-end phones.
+
+    Args:
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds.
+        output_format: "PNG", "JPEG" or "WEBP". If None, uses RAW_OUTPUT_FORMAT.
+        quality: JPEG/WEBP quality. If None, uses RAW_OUTPUT_QUALITY.
+
+    Returns:
+        Screenshot object.
+    """
+    output_format = (output_format or RAW_OUTPUT_FORMAT).upper()
+    quality = quality if quality is not None else RAW_OUTPUT_QUALITY
+    data = run_exec_out(["screencap"], device_id, timeout)
+
+    try:
+        img = decode_raw_framebuffer(data)
+    except ValueError:
+        output = data[:256].decode("utf-8", errors="replace")
+        if "Status: -1" in output or "Failed" in output:
+            return _create_fallback_screenshot(is_sensitive=True, device_id=device_id)
+        raise
+
+    return _screenshot_from_image(img, output_format, quality, device_id)
+
+
+def _get_screenshot_stream(device_id: str | None) -> Screenshot | None:
+    """Encode the latest screenrecord frame, or None if there is none yet."""
+    try:
+        frame = get_frame_source(device_id).latest()
+    except Exception as e:
+        print(f"Screenrecord frame source unavailable: {e}")
+        return None
+
+    if frame is None:
+        return None
+    return _screenshot_from_image(
+        frame.image, RAW_OUTPUT_FORMAT, RAW_OUTPUT_QUALITY, device_id
+    )
+
+
+def _screenshot_from_image(
+    img: Image.Image, output_format: str, quality: int, device_id: str | None
+) -> Screenshot:
+    """Encode a decoded image into a Screenshot."""
+    _screen_sizes[device_id] = img.size
+    buffered = BytesIO()
+    if output_format == "PNG":
+        # Favour speed over size, the payload stays local or goes to the model
+        img.save(buffered, format="PNG", compress_level=1)
+    else:
+        img.save(buffered, format=output_format, quality=quality)
+    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+    return Screenshot(
+        base64_data=base64_data,
+        width=img.width,
+        height=img.height,
+        is_sensitive=False,
+        mime_type=_MIME_TYPES.get(output_format, "image/png"),
+    )
+
+
+def get_frame(device_id: str | None = None, timeout: int = 10) -> Image.Image:
+    """
+    Capture the current screen as a decoded image, without any encoding.
+
+    Used for change detection, where only the pixels matter. Always a fresh
+    capture: the latest screenrecord frame does not change on a static
+    screen, see get_active_frame_source() for settling on the stream.
+
+    Args:
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds.
+
+    Returns:
+        RGB PIL image.
+
+    Raises:
+        ValueError: If the capture failed, e.g. on a secure screen.
+    """
+    return decode_raw_framebuffer(run_exec_out(["screencap"], device_id, timeout))
+
+
+def get_active_frame_source(
+    device_id: str | None = None,
+) -> ScreenrecordFrameSource | None:
+    """
+    Get the running screenrecord frame source in "stream" capture mode.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        The frame source, or None if not in stream mode or it is not running.
+    """
+    if CAPTURE_MODE != "stream":
+        return None
+    try:
+        source = get_frame_source(device_id)
+    except Exception:
+        return None
+    return source if source.running else None
+
+
+def decode_raw_framebuffer(data: bytes) -> Image.Image:
+    """
+    Convert raw `screencap` output into an RGB image.
+
+    The stream starts with a little-endian header of width, height and pixel
+    format (plus a dataspace word on Android 9+), followed by the pixels.
+
+    Args:
+        data: Raw bytes from `screencap` without `-p`.
+
+    Returns:
+        RGB PIL image.
+
+    Raises:
+        ValueError: If the header or payload is malformed.
+    """
+    if len(data) < 12:
+        raise ValueError("Raw framebuffer too short")
+
+    width, height, pixel_format = struct.unpack_from("<III", data, 0)
+    bytes_per_pixel = _RAW_PIXEL_FORMATS.get(pixel_format)
+    if bytes_per_pixel is None or width == 0 or height == 0:
+        raise ValueError(f"Unsupported raw framebuffer header: {pixel_format}")
+
+    pixel_bytes = width * height * bytes_per_pixel
+    header_size = len(data) - pixel_bytes
+    if header_size not in (12, 16):
+        raise ValueError(
+            f"Raw framebuffer size mismatch: {len(data)} bytes for {width}x{height}"
+        )
+
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is None:
+        # Image mode and PIL raw mode of each format, BGRA unpacks to RGBA
+        raw_modes = {
+            1: ("RGBA", "RGBA"),
+            2: ("RGBX", "RGBX"),
+            3: ("RGB", "RGB"),
+            5: ("RGBA", "BGRA"),
+        }
+        if pixel_format not in raw_modes:
+            raise ValueError("RGB_565 framebuffers require numpy")
+        mode, raw_mode = raw_modes[pixel_format]
+        img = Image.frombytes(
+            mode, (width, height), data[header_size:], "raw", raw_mode
+        )
+        return img.convert("RGB")
+
+    pixels = np.frombuffer(data, dtype=np.uint8, count=pixel_bytes, offset=header_size)
+
+    if pixel_format == 4:
+        # RGB_565: expand 5/6/5-bit channels to 8 bits
+        packed = pixels.view("<u2").reshape(height, width)
+        rgb = np.empty((height, width, 3), dtype=np.uint8)
+        rgb[..., 0] = ((packed >> 11) & 0x1F) * 255 // 31
+        rgb[..., 1] = ((packed >> 5) & 0x3F) * 255 // 63
+        rgb[..., 2] = (packed & 0x1F) * 255 // 31
+        return Image.fromarray(rgb, "RGB")
+
+    frame = pixels.reshape(height, width, bytes_per_pixel)
+    if pixel_format == 5:
+        rgb = frame[..., 2::-1]
+    else:
+        rgb = frame[..., :3]
+    return Image.fromarray(np.ascontiguousarray(rgb), "RGB")
+
+
+def _get_screenshot_pull(device_id: str | None, timeout: int) -> Screenshot:
+    """Capture a screenshot via a device-side file and `adb pull`."""
+    # Unique paths so that agents sharing a device don't clobber each other
+    name = f"screenshot_{uuid.uuid4().hex}.png"
+    remote_path = f"/data/local/tmp/{name}"
+    temp_path = os.path.join(tempfile.gettempdir(), name)
+
+    try:
+        result = run_shell_command(
+            ["screencap", "-p", remote_path], device_id, timeout=timeout
         )
 
         # Check for screenshot failure (sensitive screen)
         output = result.stdout + result.stderr
         if "Status: -1" in output or "Failed" in output:
-            return _create_fallback_screenshot(is_sensitive=True)
+            return _create_fallback_screenshot(is_sensitive=True, device_id=device_id)
+
+        if get_adb_transport() == ADBTransport.SOCKET:
+            # Sync service on a reused connection, nothing touches the disk
+            return _screenshot_from_png_bytes(
+                get_server_client().pull(device_id, remote_path), device_id
+            )
 
         # Pull screenshot to local temp path
         subprocess.run(
-            adb_prefix + ["pull", "/sdcard/tmp.png", temp_path],
+            _get_adb_prefix(device_id) + ["pull", remote_path, temp_path],
             capture_output=True,
             text=True,
             timeout=5,
         )
 
         if not os.path.exists(temp_path):
-            return _create_fallback_screenshot(is_sensitive=False)
+            return _create_fallback_screenshot(is_sensitive=False, device_id=device_id)
 
-        # Read and encode image
-        img = Image.open(temp_path)
-        width, height = img.size
+        with open(temp_path, "rb") as f:
+            data = f.read()
 
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+        return _screenshot_from_png_bytes(data, device_id)
 
+    finally:
         # Cleanup
-        os.remove(temp_path)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        run_shell_command(["rm", "-f", remote_path], device_id, timeout=5)
 
-        return Screenshot(
-            base64_data=base64_data, width=width, height=height, is_sensitive=False
-        )
 
-    except Exception as e:
-        print(f"Screenshot error: {e}")
-        return _create_fallback_screenshot(is_sensitive=False)
+def _screenshot_from_png_bytes(data: bytes, device_id: str | None) -> Screenshot:
+    """Build a Screenshot from in-memory PNG bytes without re-encoding."""
+    width, height = get_image_size(data)
+    _screen_sizes[device_id] = (width, height)
+    base64_data = base64.b64encode(data).decode("utf-8")
+
+    return Screenshot(
+        base64_data=base64_data, width=width, height=height, is_sensitive=False
+    )
 
 
 def _get_adb_prefix(device_id: str | None) -> list:
@@ -92,18 +367,20 @@ def _get_adb_prefix(device_id: str | None) -> list:
     return ["adb"]
 
 
-def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
-    """Create a black fallback image when screenshot fails."""
-    default_width, default_height = 1080, 2400
+def _create_fallback_screenshot(
+    is_sensitive: bool, device_id: str | None = None
+) -> Screenshot:
+    """
+    Create a black fallback image when screenshot fails.
 
-    black_img = Image.new("RGB", (default_width, default_height), color="black")
-    buffered = BytesIO()
-    black_img.save(buffered, format="PNG")
-    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    The image has the size of the device's last successful capture, so
+    coordinates the model derives from it still map onto the screen.
+    """
+    width, height = _screen_sizes.get(device_id, DEFAULT_SCREEN_SIZE)
 
     return Screenshot(
-        base64_data=base64_data,
-        width=default_width,
-        height=default_height,
+        base64_data=get_black_png_base64(width, height),
+        width=width,
+        height=height,
         is_sensitive=is_sensitive,
     )
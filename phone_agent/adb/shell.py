@@ -0,0 +1,175 @@
+"""Persistent interactive ADB shell sessions."""
+
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+
+class ADBShell:
+    """
+    A long-lived interactive `adb shell` for one device.
+
+    Commands are written to the shell's stdin and their output is read back
+    until a per-command sentinel line, so every command after the first reuses
+    the same adb client process and shell transport.
+
+    Args:
+        device_id: Optional ADB device ID.
+        adb_path: Path to ADB executable.
+
+    Example:
+        >>> shell = ADBShell("emulator-5554")
+        >>> shell.run("input tap 500 1000")
+        (0, '')
+        >>> shell.close()
+    """
+
+    def __init__(self, device_id: str | None = None, adb_path: str = "adb"):
+        self.device_id = device_id
+        self.adb_path = adb_path
+        self._process: subprocess.Popen | None = None
+        self._lines: queue.Queue[str | None] = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the underlying shell process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """Start the shell process if it is not already running."""
+        if self.alive:
+            return
+
+        cmd = [self.adb_path]
+        if self.device_id:
+            cmd.extend(["-s", self.device_id])
+        # -T: no pty, so input is not echoed and output keeps plain newlines
+        cmd.extend(["shell", "-T"])
+
+        self._lines = queue.Queue()
+        self._process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        threading.Thread(
+            target=self._read_output,
+            args=(self._process, self._lines),
+            name=f"adb-shell-{self.device_id or 'default'}",
+            daemon=True,
+        ).start()
+
+    def run(self, command: str, timeout: float = 30) -> tuple[int, str]:
+        """
+        Run a command in the shell and wait for it to finish.
+
+        Args:
+            command: Shell command line, as it would be passed to `adb shell`.
+            timeout: Timeout in seconds for this command.
+
+        Returns:
+            Tuple of (exit code, combined stdout/stderr output).
+
+        Raises:
+            subprocess.TimeoutExpired: If the command does not finish in time.
+                The session is closed and restarted on the next call.
+            RuntimeError: If the shell exits while the command is running.
+        """
+        with self._lock:
+            self.start()
+            sentinel = f"__PHONE_AGENT_{uuid.uuid4().hex}__"
+
+            # stdin is detached so commands cannot consume the session input
+            self._process.stdin.write(
+                f"{{ {command}; }} </dev/null 2>&1; echo {sentinel} $?\n"
+            )
+            self._process.stdin.flush()
+
+            output = []
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    line = self._lines.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    # The shell is stuck in the command, don't wait for it
+                    self._process.kill()
+                    self.close()
+                    raise subprocess.TimeoutExpired(command, timeout)
+
+                if line is None:
+                    self.close()
+                    raise RuntimeError("ADB shell exited unexpectedly")
+
+                # Output without a trailing newline shares the sentinel's line
+                if sentinel in line:
+                    head, _, tail = line.partition(sentinel)
+                    if head:
+                        output.append(head)
+                    try:
+                        returncode = int(tail.strip())
+                    except ValueError:
+                        returncode = -1
+                    return returncode, "".join(output)
+
+                output.append(line)
+
+    def close(self) -> None:
+        """Terminate the shell process."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    @staticmethod
+    def _read_output(process: subprocess.Popen, lines: queue.Queue) -> None:
+        """Forward shell output lines to the queue, None marks end of stream."""
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+
+# One shell per device, shared by all callers in the process
+_shells: dict[str | None, ADBShell] = {}
+_shells_lock = threading.Lock()
+
+
+def get_shell(device_id: str | None = None) -> ADBShell:
+    """
+    Get the shared persistent shell for a device, creating it on first use.
+
+    Args:
+        device_id: Optional ADB device ID.
+
+    Returns:
+        The device's ADBShell.
+    """
+    with _shells_lock:
+        shell = _shells.get(device_id)
+        if shell is None:
+            shell = _shells[device_id] = ADBShell(device_id)
+        return shell
+
+
+def close_shells() -> None:
+    """Close all shared persistent shells."""
+    with _shells_lock:
+        shells = list(_shells.values())
+        _shells.clear()
+    for shell in shells:
+        shell.close()
@@ -0,0 +1,120 @@
+"""Command transports for running ADB shell commands."""
+
+import os
+import subprocess
+from enum import Enum
+
+from phone_agent.adb.protocol import get_server_client
+from phone_agent.adb.shell import get_shell
+
+
+class ADBTransport(Enum):
+    """How shell commands reach the device."""
+
+    SUBPROCESS = "subprocess"  # Fork one `adb shell <cmd>` per command
+    SHELL = "shell"  # Reuse one persistent `adb shell` per device
+    SOCKET = "socket"  # Speak the ADB server protocol directly, no adb binary
+
+
+# Default timeout for persistent shell commands, subprocess calls keep no limit
+SHELL_COMMAND_TIMEOUT = 30.0
+
+_transport = ADBTransport(os.getenv("PHONE_AGENT_ADB_TRANSPORT", "subprocess"))
+
+
+def set_adb_transport(transport: ADBTransport) -> None:
+    """
+    Set the transport used for ADB shell commands.
+
+    Args:
+        transport: The transport to use.
+    """
+    global _transport
+    _transport = transport
+
+
+def get_adb_transport() -> ADBTransport:
+    """
+    Get the transport used for ADB shell commands.
+
+    Returns:
+        The current transport.
+    """
+    return _transport
+
+
+def run_shell_command(
+    args: list[str],
+    device_id: str | None = None,
+    timeout: float | None = None,
+) -> subprocess.CompletedProcess:
+    """
+    Run a command in the device shell through the configured transport.
+
+    Args:
+        args: Command and arguments, joined with spaces like `adb shell` does.
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds.
+
+    Returns:
+        CompletedProcess with text stdout and stderr. With the persistent
+        shell, stderr is merged into stdout.
+    """
+    if _transport == ADBTransport.SHELL:
+        returncode, output = get_shell(device_id).run(
+            " ".join(args), timeout=timeout or SHELL_COMMAND_TIMEOUT
+        )
+        return subprocess.CompletedProcess(args, returncode, output, "")
+
+    if _transport == ADBTransport.SOCKET:
+        returncode, stdout, stderr = get_server_client().shell(
+            device_id, " ".join(args), timeout=timeout or SHELL_COMMAND_TIMEOUT
+        )
+        return subprocess.CompletedProcess(args, returncode, stdout, stderr)
+
+    return subprocess.run(
+        _get_adb_prefix(device_id) + ["shell"] + args,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        timeout=timeout,
+    )
+
+
+def run_exec_out(
+    args: list[str],
+    device_id: str | None = None,
+    timeout: float | None = None,
+) -> bytes:
+    """
+    Run a command on the device and return its raw binary output.
+
+    Equivalent to `adb exec-out`; only the socket transport avoids forking adb,
+    the persistent shell is text-only and falls back to a subprocess.
+
+    Args:
+        args: Command and arguments.
+        device_id: Optional ADB device ID.
+        timeout: Timeout in seconds.
+
+    Returns:
+        Raw stdout bytes. exec-out has no separate stderr channel, so device
+        side errors arrive here too.
+    """
+    if _transport == ADBTransport.SOCKET:
+        return get_server_client().exec_out(device_id, " ".join(args), timeout)
+
+    result = subprocess.run(
+        _get_adb_prefix(device_id) + ["exec-out"] + args,
+        capture_output=True,
+        timeout=timeout,
+    )
+    return result.stdout
+
+
+def _get_adb_prefix(device_id: str | None) -> list:
+    """Get ADB command prefix with optional device specifier."""
+    if device_id:
+        return ["adb", "-s", device_id]
+    return ["adb"]
@@ -1,15 +1,21 @@
 """iOS PhoneAgent class for orchestrating iOS phone automation."""
 
 import json
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any, Callable
 
+from phone_agent.action_cache import ActionCache, dhash
 from phone_agent.actions.handler import do, finish, parse_action
 from phone_agent.actions.handler_ios import IOSActionHandler
 from phone_agent.config import get_messages, get_system_prompt
-from phone_agent.model import ModelClient, ModelConfig
+from phone_agent.history import HistoryPolicy, estimate_tokens
+from phone_agent.imaging import ImageConfig, prepare_image
+from phone_agent.model import ModelClient, ModelConfig, ModelResponse
 from phone_agent.model.client import MessageBuilder
+from phone_agent.trace import TraceWriter
 from phone_agent.xctest import XCTestConnection, get_current_app, get_screenshot
 
 
@@ -19,11 +25,21 @@ class IOSAgentConfig:
 
     max_steps: int = 100
     wda_url: str = "http://localhost:8100"
+    mjpeg_url: str | None = None  # WDA MJPEG stream, screenshots without polling
     session_id: str | None = None
     device_id: str | None = None  # iOS device UDID
     lang: str = "cn"
     system_prompt: str | None = None
     verbose: bool = True
+    image_config: ImageConfig | None = None
+    early_dispatch: bool = False  # Act as soon as the streamed action is complete
+    history_policy: HistoryPolicy | None = None  # Compaction of resent history
+    # Text before image in user messages, so everything but the newest image
+    # is a byte-identical prefix across steps (server-side prefix caching)
+    stable_prefix: bool = False
+    # Replays actions for observations seen in earlier runs of the same task
+    action_cache: ActionCache | None = None
+    trace_dir: str | None = None  # Record every step for later replay
 
     def __post_init__(self):
         if self.system_prompt is None:
@@ -39,6 +55,7 @@ class StepResult:
     action: dict[str, Any] | None
     thinking: str
     message: str | None = None
+    tokens_saved: int = 0  # Estimated prompt tokens saved by history compaction
 
 
 class IOSPhoneAgent:
@@ -98,6 +115,17 @@ class IOSPhoneAgent:
 
         self._context: list[dict[str, Any]] = []
         self._step_count = 0
+        self._task: str | None = None
+        self._early_action: dict[str, Any] | None = None
+        self._trace = (
+            TraceWriter(self.agent_config.trace_dir)
+            if self.agent_config.trace_dir
+            else None
+        )
+
+        # Runs the per-step WDA probes (screenshot, current app) in parallel,
+        # created on first use and shut down by reset()
+        self._executor: ThreadPoolExecutor | None = None
 
     def run(self, task: str) -> str:
         """
@@ -111,6 +139,7 @@ class IOSPhoneAgent:
         """
         self._context = []
         self._step_count = 0
+        self._task = None
 
         # First step with user prompt
         result = self._execute_step(task, is_first=True)
@@ -150,6 +179,25 @@ class IOSPhoneAgent:
         """Reset the agent state for a new task."""
         self._context = []
         self._step_count = 0
+        self._task = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def close(self) -> None:
+        """Reset the agent and close the trace, if one is recorded."""
+        self.reset()
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the probe executor, creating it if needed."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="ios-phone-agent"
+            )
+        return self._executor
 
     def _execute_step(
         self, user_prompt: str | None = None, is_first: bool = False
@@ -157,18 +205,37 @@ class IOSPhoneAgent:
         """Execute a single step of the agent loop."""
         self._step_count += 1
 
-        # Capture current screen state
-        screenshot = get_screenshot(
+        # Capture current screen state, both probes run concurrently
+        started = time.perf_counter()
+        screenshot_future = self._get_executor().submit(
+            get_screenshot,
             wda_url=self.agent_config.wda_url,
             session_id=self.agent_config.session_id,
             device_id=self.agent_config.device_id,
+            mjpeg_url=self.agent_config.mjpeg_url,
         )
-        current_app = get_current_app(
-            wda_url=self.agent_config.wda_url, session_id=self.agent_config.session_id
+        current_app_future = self._get_executor().submit(
+            get_current_app,
+            wda_url=self.agent_config.wda_url,
+            session_id=self.agent_config.session_id,
+        )
+        screenshot = screenshot_future.result()
+        current_app = current_app_future.result()
+
+        # Prepare the image for the model (resize / re-encode if configured)
+        image_base64, image_mime_type = prepare_image(
+            screenshot.base64_data,
+            screenshot.width,
+            screenshot.height,
+            screenshot.mime_type,
+            self.agent_config.image_config,
         )
 
         # Build messages
         if is_first:
+            self._task = user_prompt
+            if self._trace is not None:
+                self._trace.start_task(user_prompt, self.agent_config.device_id)
             self._context.append(
                 MessageBuilder.create_system_message(self.agent_config.system_prompt)
             )
@@ -178,7 +245,10 @@ class IOSPhoneAgent:
 
             self._context.append(
                 MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
+                    text=text_content,
+                    image_base64=image_base64,
+                    mime_type=image_mime_type,
+                    text_first=self.agent_config.stable_prefix,
                 )
             )
         else:
@@ -187,31 +257,93 @@ class IOSPhoneAgent:
 
             self._context.append(
                 MessageBuilder.create_user_message(
-                    text=text_content, image_base64=screenshot.base64_data
+                    text=text_content,
+                    image_base64=image_base64,
+                    mime_type=image_mime_type,
+                    text_first=self.agent_config.stable_prefix,
                 )
             )
 
-        # Get model response
-        try:
-            response = self.model_client.request(self._context)
-        except Exception as e:
-            if self.agent_config.verbose:
-                traceback.print_exc()
-            return StepResult(
-                success=False,
-                finished=True,
-                action=None,
-                thinking="",
-                message=f"Model error: {e}",
+        # Compact older turns before sending them again
+        messages, tokens_saved = self._context, 0
+        if self.agent_config.history_policy is not None:
+            messages = self.agent_config.history_policy.apply(self._context)
+            tokens_saved = estimate_tokens(self._context) - estimate_tokens(messages)
+            if self.agent_config.verbose and tokens_saved:
+                print(f"📉 History compaction saved ~{tokens_saved} tokens")
+
+        captured = time.perf_counter()
+        action_cache = self.agent_config.action_cache
+        cached = screen_hash = None
+        if action_cache is not None:
+            screen_hash = dhash(screenshot.base64_data)
+            cached = action_cache.lookup(
+                self._task, self._step_count, current_app, screen_hash
             )
 
-        # Parse action from response
-        try:
-            action = parse_action(response.action)
-        except ValueError:
+        if cached is not None:
+            # Known observation, replay the action without asking the model
+            response = ModelResponse(
+                thinking="", action=cached.answer, raw_content=cached.answer
+            )
+            action = cached.action
             if self.agent_config.verbose:
-                traceback.print_exc()
-            action = finish(message=response.action)
+                print(f"♻️  Replaying cached action (step {self._step_count})")
+        else:
+            # Get model response
+            try:
+                self._early_action = None
+                response = self.model_client.request(
+                    messages,
+                    on_action=(
+                        self._dispatch_early
+                        if self.agent_config.early_dispatch
+                        else None
+                    ),
+                )
+            except Exception as e:
+                if self.agent_config.verbose:
+                    traceback.print_exc()
+                if self._trace is not None:
+                    self._trace.write_error(
+                        self._step_count,
+                        screenshot_base64=screenshot.base64_data,
+                        mime_type=screenshot.mime_type,
+                        width=screenshot.width,
+                        height=screenshot.height,
+                        current_app=current_app,
+                        error=f"Model error: {e}",
+                        timings={
+                            "capture": captured - started,
+                            "model": time.perf_counter() - captured,
+                        },
+                        device_id=self.agent_config.device_id,
+                    )
+                return StepResult(
+                    success=False,
+                    finished=True,
+                    action=None,
+                    thinking="",
+                    message=f"Model error: {e}",
+                )
+
+            # Parse action from response (already done if dispatched early)
+            try:
+                action = self._early_action or parse_action(response.action)
+            except ValueError:
+                if self.agent_config.verbose:
+                    traceback.print_exc()
+                action = finish(message=response.action)
+            else:
+                if action_cache is not None:
+                    action_cache.store(
+                        self._task,
+                        self._step_count,
+                        current_app,
+                        screen_hash,
+                        action,
+                        response.action,
+                    )
 
         if self.agent_config.verbose:
             # Print thinking process
@@ -225,6 +357,8 @@ class IOSPhoneAgent:
             print(json.dumps(action, ensure_ascii=False, indent=2))
             print("=" * 50 + "\n")
 
+        decided = time.perf_counter()
+
         # Remove image from context to save space
         self._context[-1] = MessageBuilder.remove_images_from_message(self._context[-1])
 
@@ -240,6 +374,26 @@ class IOSPhoneAgent:
                 finish(message=str(e)), screenshot.width, screenshot.height
             )
 
+        if self._trace is not None:
+            self._trace.write_step(
+                self._step_count,
+                screenshot_base64=screenshot.base64_data,
+                mime_type=screenshot.mime_type,
+                width=screenshot.width,
+                height=screenshot.height,
+                current_app=current_app,
+                raw_output=response.raw_content,
+                action=action,
+                result=result,
+                timings={
+                    "capture": captured - started,
+                    "model": decided - captured,
+                    "execute": time.perf_counter() - decided,
+                },
+                device_id=self.agent_config.device_id,
+                cached=cached is not None,
+            )
+
         # Add assistant response to context
         self._context.append(
             MessageBuilder.create_assistant_message(
@@ -264,8 +418,17 @@ class IOSPhoneAgent:
             action=action,
             thinking=response.thinking,
             message=result.message or action.get("message"),
+            tokens_saved=tokens_saved,
         )
 
+    def _dispatch_early(self, action_text: str) -> bool:
+        """Parse the streamed action once complete, stopping the stream if valid."""
+        try:
+            self._early_action = parse_action(action_text)
+        except ValueError:
+            return False
+        return True
+
     @property
     def context(self) -> list[dict[str, Any]]:
         """Get the current conversation context."""
@@ -187,6 +187,11 @@ APP_PACKAGES: dict[str, str] = {
     "WhatsApp": "com.whatsapp",
 }
 
+# Reverse index for get_app_name, the first name listed for a package wins
+_APP_NAMES: dict[str, str] = {
+    package: name for name, package in reversed(APP_PACKAGES.items())
+}
+
 
 def get_package_name(app_name: str) -> str | None:
     """
@@ -211,10 +216,7 @@ def get_app_name(package_name: str) -> str | None:
     Returns:
         The display name of the app, or None if not found.
     """
-    for name, package in APP_PACKAGES.items():
-        if package == package_name:
-            return name
-    return None
+    return _APP_NAMES.get(package_name)
 
 
 def list_supported_apps() -> list[str]:
@@ -200,6 +200,11 @@ APP_PACKAGES_IOS: dict[str, str] = {
     "Keynote 讲演": "com.apple.Keynote",
 }
 
+# Reverse index for get_app_name, the first name listed for a package wins
+_APP_NAMES: dict[str, str] = {
+    bundle_id: name for name, bundle_id in reversed(APP_PACKAGES_IOS.items())
+}
+
 
 def get_bundle_id(app_name: str) -> str | None:
     """
@@ -224,10 +229,7 @@ def get_app_name(bundle_id: str) -> str | None:
     Returns:
         The display name of the app, or None if not found.
     """
-    for name, bid in APP_PACKAGES_IOS.items():
-        if bid == bundle_id:
-            return name
-    return None
+    return _APP_NAMES.get(bundle_id)
 
 
 def list_supported_apps() -> list[str]:
@@ -23,6 +23,7 @@ MESSAGES_ZH = {
     "time_to_first_token": "首 Token 延迟 (TTFT)",
     "time_to_thinking_end": "思考完成延迟",
     "total_inference_time": "总推理时间",
+    "prefix_cache_hit": "前缀缓存命中",
 }
 
 # English messages
@@ -48,6 +49,7 @@ MESSAGES_EN = {
     "time_to_first_token": "Time to First Token (TTFT)",
     "time_to_thinking_end": "Time to Thinking End",
     "total_inference_time": "Total Inference Time",
+    "prefix_cache_hit": "Prefix Cache Hit",
 }
 
 
@@ -13,10 +13,10 @@ class ActionTimingConfig:
     """Configuration for action handler timing delays."""
 
     # Text input related delays (in seconds)
-    keyboard_switch_delay: float = 1.0  # Delay after switching to ADB keyboard
+    keyboard_switch_delay: float = 1.0  # Max wait for ADB keyboard to become active
     text_clear_delay: float = 1.0  # Delay after clearing text
     text_input_delay: float = 1.0  # Delay after typing text
-    keyboard_restore_delay: float = 1.0  # Delay after restoring original keyboard
+    keyboard_restore_delay: float = 1.0  # Max wait for the original keyboard
 
     def __post_init__(self):
         """Load values from environment variables if present."""
@@ -48,6 +48,21 @@ class DeviceTimingConfig:
     default_home_delay: float = 1.0  # Default delay after home button
     default_launch_delay: float = 1.0  # Default delay after launching app
 
+    # Post-action settle detection: "fixed" sleeps the delays above, "adaptive"
+    # captures frames until the screen stops changing and falls back to the
+    # fixed delays if a frame cannot be captured
+    settle_mode: str = "fixed"
+    settle_min_wait: float = 0.2  # Wait before the first frame is captured
+    settle_timeout: float = 3.0  # Maximum time to wait for the screen to settle
+    settle_poll_interval: float = 0.05  # Pause between frame captures
+    settle_stable_frames: int = 2  # Consecutive unchanged frames required
+    settle_threshold: float = 0.01  # Mean pixel difference (0-1) counted as change
+    # With the screenrecord stream, time without a changed frame counted as settled
+    settle_stream_quiet: float = 0.3
+    # Learn settle times per (app, action) and use them instead of the
+    # delays above, see phone_agent.timing_profiles
+    use_timing_profiles: bool = False
+
     def __post_init__(self):
         """Load values from environment variables if present."""
         self.default_tap_delay = float(
@@ -74,6 +89,32 @@ class DeviceTimingConfig:
         self.default_launch_delay = float(
             os.getenv("PHONE_AGENT_LAUNCH_DELAY", self.default_launch_delay)
         )
+        self.settle_mode = os.getenv("PHONE_AGENT_SETTLE_MODE", self.settle_mode)
+        self.settle_min_wait = float(
+            os.getenv("PHONE_AGENT_SETTLE_MIN_WAIT", self.settle_min_wait)
+        )
+        self.settle_timeout = float(
+            os.getenv("PHONE_AGENT_SETTLE_TIMEOUT", self.settle_timeout)
+        )
+        self.settle_poll_interval = float(
+            os.getenv("PHONE_AGENT_SETTLE_POLL_INTERVAL", self.settle_poll_interval)
+        )
+        self.settle_stable_frames = int(
+            os.getenv("PHONE_AGENT_SETTLE_STABLE_FRAMES", self.settle_stable_frames)
+        )
+        self.settle_threshold = float(
+            os.getenv("PHONE_AGENT_SETTLE_THRESHOLD", self.settle_threshold)
+        )
+        self.settle_stream_quiet = float(
+            os.getenv("PHONE_AGENT_SETTLE_STREAM_QUIET", self.settle_stream_quiet)
+        )
+        use_timing_profiles = os.getenv("PHONE_AGENT_TIMING_PROFILES")
+        if use_timing_profiles is not None:
+            self.use_timing_profiles = use_timing_profiles.lower() not in (
+                "0",
+                "false",
+                "no",
+            )
 
 
 @dataclass
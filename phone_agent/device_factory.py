@@ -1,5 +1,6 @@
 """Device factory for selecting ADB or HDC based on device type."""
 
+import time
 from enum import Enum
 from typing import Any
 
@@ -49,10 +50,25 @@ class DeviceFactory:
         """Get screenshot from device."""
         return self.module.get_screenshot(device_id, timeout)
 
+    def get_frame(self, device_id: str | None = None, timeout: int = 10):
+        """Get the current screen as a PIL image, raising if capture fails."""
+        return self.module.get_frame(device_id, timeout)
+
+    def get_frame_source(self, device_id: str | None = None):
+        """Get the running frame stream, for backends that have one, else None."""
+        if hasattr(self.module, "get_active_frame_source"):
+            return self.module.get_active_frame_source(device_id)
+        return None
+
     def get_current_app(self, device_id: str | None = None) -> str:
         """Get current app name."""
         return self.module.get_current_app(device_id)
 
+    def invalidate_current_app(self, device_id: str | None = None) -> None:
+        """Drop the cached current app, for backends that cache it."""
+        if hasattr(self.module, "invalidate_current_app"):
+            self.module.invalidate_current_app(device_id)
+
     def tap(
         self, x: int, y: int, device_id: str | None = None, delay: float | None = None
     ):
@@ -121,6 +137,16 @@ class DeviceFactory:
         """Restore keyboard."""
         return self.module.restore_keyboard(ime, device_id)
 
+    def wait_for_ime(
+        self, ime: str, device_id: str | None = None, timeout: float = 1.0
+    ) -> bool:
+        """Wait until an IME is active, or sleep the timeout if it can't be probed."""
+        if hasattr(self.module, "wait_for_ime"):
+            return self.module.wait_for_ime(ime, device_id, timeout)
+
+        time.sleep(timeout)
+        return True
+
     def list_devices(self):
         """List connected devices."""
         return self.module.list_devices()
@@ -0,0 +1,313 @@
+"""Run PhoneAgent tasks concurrently across a pool of devices."""
+
+import os
+import queue
+import re
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable, Iterable
+
+from phone_agent.agent import AgentConfig, PhoneAgent
+from phone_agent.device_factory import DeviceFactory, DeviceType
+from phone_agent.model import ModelClient, ModelConfig
+
+
+@dataclass
+class FleetDevice:
+    """A device in the fleet pool."""
+
+    device_id: str
+    device_type: DeviceType = DeviceType.ADB
+
+
+@dataclass
+class FleetTask:
+    """
+    A task waiting to be scheduled.
+
+    Attributes:
+        task: Natural language task description.
+        device_type: Restrict the task to devices of this type. If None, any
+            free device may run it.
+        task_id: Identifier used in the result record.
+    """
+
+    task: str
+    device_type: DeviceType | None = None
+    task_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+
+@dataclass
+class TaskRecord:
+    """Structured result of one fleet task."""
+
+    task_id: str
+    task: str
+    device_id: str | None
+    device_type: str | None
+    success: bool
+    message: str | None
+    steps: int = 0
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+
+    @property
+    def duration(self) -> float | None:
+        """Wall-clock time of the task in seconds."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the record to a JSON-serializable dict."""
+        return {**asdict(self), "duration": self.duration}
+
+
+class BoundedModelClient(ModelClient):
+    """
+    ModelClient that caps how many requests are in flight at once.
+
+    A single instance is shared by all agents of a fleet, so the cap applies
+    across devices, and so does the underlying HTTP connection pool.
+
+    Args:
+        config: Model configuration.
+        max_concurrent_requests: Maximum number of simultaneous requests.
+        echo: Whether to print the streamed thinking and timing metrics.
+    """
+
+    def __init__(
+        self,
+        config: ModelConfig | None = None,
+        max_concurrent_requests: int = 4,
+        echo: bool = False,
+    ):
+        super().__init__(config, echo=echo)
+        self._semaphore = threading.BoundedSemaphore(max_concurrent_requests)
+
+    def request(
+        self,
+        messages: list[dict[str, Any]],
+        on_action: Callable[[str], bool] | None = None,
+    ):
+        with self._semaphore:
+            return super().request(messages, on_action=on_action)
+
+
+class FleetRunner:
+    """
+    Schedules tasks onto free devices, one worker thread per device.
+
+    Each worker owns a PhoneAgent with its own DeviceFactory, so ADB and HDC
+    devices can be mixed in one process. Sensitive-operation confirmations
+    are refused and takeover requests are skipped unless callbacks are
+    given, since a fleet runs unattended.
+
+    Args:
+        devices: Device pool.
+        model_config: Model configuration shared by all agents.
+        agent_config: Template agent configuration; device_id is filled in
+            per device, and traces go to one subdirectory of trace_dir per
+            device.
+        max_concurrent_requests: Cap on simultaneous model requests.
+        confirmation_callback: Optional callback for sensitive actions,
+            called with (device_id, message).
+        takeover_callback: Optional callback for takeover requests, called
+            with (device_id, message).
+        on_result: Optional callback invoked with each TaskRecord as soon as
+            its task finishes.
+
+    Example:
+        >>> runner = FleetRunner(
+        ...     [FleetDevice("emulator-5554"), FleetDevice("FMR0223", DeviceType.HDC)],
+        ...     ModelConfig(base_url="http://localhost:8000/v1"),
+        ...     max_concurrent_requests=2,
+        ... )
+        >>> records = runner.run(["打开微信", "打开淘宝搜索耳机", "打开设置"])
+    """
+
+    def __init__(
+        self,
+        devices: list[FleetDevice],
+        model_config: ModelConfig | None = None,
+        agent_config: AgentConfig | None = None,
+        max_concurrent_requests: int = 4,
+        confirmation_callback: Callable[[str, str], bool] | None = None,
+        takeover_callback: Callable[[str, str], None] | None = None,
+        on_result: Callable[[TaskRecord], None] | None = None,
+    ):
+        for device in devices:
+            if device.device_type == DeviceType.IOS:
+                raise ValueError("iOS devices are not supported by FleetRunner")
+
+        self.devices = devices
+        self.model_config = model_config or ModelConfig()
+        self.agent_config = agent_config or AgentConfig(verbose=False)
+        self.confirmation_callback = confirmation_callback
+        self.takeover_callback = takeover_callback
+        self.on_result = on_result
+        self.model_client = BoundedModelClient(
+            self.model_config, max_concurrent_requests
+        )
+
+        # Untyped tasks go to the shared queue, typed ones to their type's queue
+        self._queues: dict[DeviceType | None, queue.Queue[FleetTask]] = {
+            None: queue.Queue()
+        }
+        for device in devices:
+            self._queues.setdefault(device.device_type, queue.Queue())
+
+        self._records: list[TaskRecord] = []
+        self._records_lock = threading.Lock()
+
+    def submit(self, task: str | FleetTask) -> FleetTask:
+        """
+        Add a task to the queue.
+
+        Args:
+            task: Task description or FleetTask.
+
+        Returns:
+            The queued FleetTask.
+
+        Raises:
+            ValueError: If no device in the pool can run the task.
+        """
+        if isinstance(task, str):
+            task = FleetTask(task)
+        if task.device_type not in self._queues:
+            raise ValueError(f"No {task.device_type.value} device for task: {task}")
+        self._queues[task.device_type].put(task)
+        return task
+
+    def run(self, tasks: Iterable[str | FleetTask] = ()) -> list[TaskRecord]:
+        """
+        Run all queued tasks and wait for them to finish.
+
+        Args:
+            tasks: Additional tasks to queue before starting.
+
+        Returns:
+            One TaskRecord per task, in completion order.
+        """
+        for task in tasks:
+            self.submit(task)
+
+        with self._records_lock:
+            self._records = []
+
+        workers = [
+            threading.Thread(
+                target=self._worker,
+                args=(device,),
+                name=f"fleet-{device.device_id}",
+                daemon=True,
+            )
+            for device in self.devices
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        with self._records_lock:
+            return list(self._records)
+
+    def _worker(self, device: FleetDevice) -> None:
+        """Run tasks on one device until no eligible task is left."""
+        agent = self._create_agent(device)
+        try:
+            while True:
+                task = self._next_task(device.device_type)
+                if task is None:
+                    return
+                self._record(self._run_task(agent, device, task))
+        finally:
+            agent.close()
+
+    def _next_task(self, device_type: DeviceType) -> FleetTask | None:
+        """Take the next task for a device type, typed tasks first."""
+        for key in (device_type, None):
+            try:
+                return self._queues[key].get_nowait()
+            except queue.Empty:
+                continue
+        return None
+
+    def _create_agent(self, device: FleetDevice) -> PhoneAgent:
+        """Create an agent bound to one device."""
+        device_id = device.device_id
+
+        def confirm(message: str) -> bool:
+            if self.confirmation_callback is None:
+                print(f"[{device_id}] Refusing sensitive operation: {message}")
+                return False
+            return self.confirmation_callback(device_id, message)
+
+        def takeover(message: str) -> None:
+            if self.takeover_callback is None:
+                print(f"[{device_id}] Takeover requested, continuing: {message}")
+                return
+            self.takeover_callback(device_id, message)
+
+        trace_dir = self.agent_config.trace_dir
+        if trace_dir:
+            # One trace per device, concurrent runs would interleave in one
+            trace_dir = os.path.join(trace_dir, re.sub(r"[^\w.-]", "_", device_id))
+
+        return PhoneAgent(
+            model_config=self.model_config,
+            agent_config=replace(
+                self.agent_config, device_id=device_id, trace_dir=trace_dir
+            ),
+            confirmation_callback=confirm,
+            takeover_callback=takeover,
+            device_factory=DeviceFactory(device.device_type),
+            model_client=self.model_client,
+        )
+
+    @staticmethod
+    def _run_task(
+        agent: PhoneAgent, device: FleetDevice, task: FleetTask
+    ) -> TaskRecord:
+        """Run one task step by step and describe the outcome."""
+        record = TaskRecord(
+            task_id=task.task_id,
+            task=task.task,
+            device_id=device.device_id,
+            device_type=device.device_type.value,
+            success=False,
+            message=None,
+            started_at=time.time(),
+        )
+        try:
+            agent.reset()
+            result = agent.step(task.task)
+            max_steps = agent.agent_config.max_steps
+            while not result.finished and agent.step_count < max_steps:
+                result = agent.step()
+
+            if result.finished:
+                record.success = result.success
+                record.message = result.message or "Task completed"
+            else:
+                record.message = "Max steps reached"
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            if agent.agent_config.verbose:
+                traceback.print_exc()
+        finally:
+            record.steps = agent.step_count
+            record.finished_at = time.time()
+        return record
+
+    def _record(self, record: TaskRecord) -> None:
+        """Store a finished record and notify the callback."""
+        with self._records_lock:
+            self._records.append(record)
+        if self.on_result is not None:
+            self.on_result(record)
@@ -1,9 +1,9 @@
 """HDC utilities for HarmonyOS device interaction."""
 
 from phone_agent.hdc.connection import (
-    HDCConnection,
     ConnectionType,
     DeviceInfo,
+    HDCConnection,
     list_devices,
     quick_connect,
     set_hdc_verbose,
@@ -24,11 +24,12 @@ from phone_agent.hdc.input import (
     restore_keyboard,
     type_text,
 )
-from phone_agent.hdc.screenshot import get_screenshot
+from phone_agent.hdc.screenshot import get_frame, get_screenshot
 
 __all__ = [
     # Screenshot
     "get_screenshot",
+    "get_frame",
     # Input
     "type_text",
     "clear_text",
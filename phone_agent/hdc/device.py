@@ -1,19 +1,30 @@
 """Device control utilities for HarmonyOS automation."""
 
 import os
+import re
 import subprocess
 import time
 from typing import List, Optional, Tuple
 
-from phone_agent.config.apps_harmonyos import APP_ABILITIES, APP_PACKAGES
+from phone_agent.config.apps_harmonyos import (
+    APP_ABILITIES,
+    APP_PACKAGES,
+    get_app_name,
+)
 from phone_agent.config.timing import TIMING_CONFIG
 from phone_agent.hdc.connection import _run_hdc_command
 
+# Bundle names on the focus lines of the window manager dump
+_BUNDLE_PATTERN = re.compile(r"\b[A-Za-z]\w*(?:\.\w+)+")
+
 
 def get_current_app(device_id: str | None = None) -> str:
     """
     Get the currently focused app name.
 
+    Only the focus lines of the window manager dump are read; they are
+    filtered with grep on the device so the full dump is not transferred.
+
     Args:
         device_id: Optional HDC device ID for multi-device setups.
 
@@ -21,23 +32,39 @@ def get_current_app(device_id: str | None = None) -> str:
         The app name if recognized, otherwise "System Home".
     """
     hdc_prefix = _get_hdc_prefix(device_id)
+    dump_command = hdc_prefix + [
+        "shell",
+        "hidumper",
+        "-s",
+        "WindowManagerService",
+        "-a",
+        "-a",
+    ]
 
     result = _run_hdc_command(
-        hdc_prefix + ["shell", "hidumper", "-s", "WindowManagerService", "-a", "-a"],
+        dump_command + ["|", "grep", "-iE", "'focused|current'"],
         capture_output=True,
         text=True,
         encoding="utf-8"
     )
     output = result.stdout
     if not output:
-        raise ValueError("No output from hidumper")
-
-    # Parse window focus info
-    for line in output.split("\n"):
-        if "focused" in line.lower() or "current" in line.lower():
-            for app_name, package in APP_PACKAGES.items():
-                if package in line:
-                    return app_name
+        # Devices without grep, filter the full dump here
+        result = _run_hdc_command(
+            dump_command, capture_output=True, text=True, encoding="utf-8"
+        )
+        if not result.stdout:
+            raise ValueError("No output from hidumper")
+        output = "\n".join(
+            line
+            for line in result.stdout.split("\n")
+            if "focused" in line.lower() or "current" in line.lower()
+        )
+
+    for package in _BUNDLE_PATTERN.findall(output):
+        app_name = get_app_name(package)
+        if app_name:
+            return app_name
 
     return "System Home"
 
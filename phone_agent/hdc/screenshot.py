@@ -10,7 +10,19 @@ from io import BytesIO
 from typing import Tuple
 
 from PIL import Image
+
 from phone_agent.hdc.connection import _run_hdc_command
+from phone_agent.imaging import (
+    get_black_png_base64,
+    get_image_mime_type,
+    get_image_size,
+)
+
+# Fallback image size until a capture on the device succeeded
+DEFAULT_SCREEN_SIZE = (1080, 2400)
+
+# Size of the last successful capture per device, used for fallback images
+_screen_sizes: dict[str | None, tuple[int, int]] = {}
 
 
 @dataclass
@@ -21,6 +33,11 @@ class Screenshot:
     width: int
     height: int
     is_sensitive: bool = False
+    mime_type: str = "image/png"
+
+
+class _SensitiveScreenError(ValueError):
+    """Raised when the device refuses a screenshot (e.g. payment pages)."""
 
 
 def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screenshot:
@@ -38,67 +55,112 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
         If the screenshot fails (e.g., on sensitive screens like payment pages),
         a black fallback image is returned with is_sensitive=True.
     """
+    try:
+        data = _capture_jpeg(device_id, timeout)
+    except _SensitiveScreenError:
+        return _create_fallback_screenshot(True, device_id)
+    except Exception as e:
+        print(f"Screenshot error: {e}")
+        return _create_fallback_screenshot(False, device_id)
+
+    # Pass the JPEG through untouched, only the header is parsed for size
+    width, height = get_image_size(data)
+    _screen_sizes[device_id] = (width, height)
+    base64_data = base64.b64encode(data).decode("utf-8")
+
+    return Screenshot(
+        base64_data=base64_data,
+        width=width,
+        height=height,
+        is_sensitive=False,
+        mime_type=get_image_mime_type(data) or "image/jpeg",
+    )
+
+
+def get_frame(device_id: str | None = None, timeout: int = 10) -> Image.Image:
+    """
+    Capture the current screen as an image for change detection.
+
+    This is a full screenshot capture. The JPEG is returned undecoded, so a
+    reduced-size decode (Image.draft) is possible when it is thumbnailed.
+
+    Args:
+        device_id: Optional HDC device ID.
+        timeout: Timeout in seconds.
+
+    Returns:
+        PIL image.
+
+    Raises:
+        ValueError: If the capture failed, e.g. on a secure screen. Unlike
+            get_screenshot() no black fallback image is returned.
+    """
+    try:
+        data = _capture_jpeg(device_id, timeout)
+    except _SensitiveScreenError as e:
+        raise ValueError(str(e)) from e
+    return Image.open(BytesIO(data))
+
+
+def _capture_jpeg(device_id: str | None, timeout: int) -> bytes:
+    """
+    Take a screenshot on the device and pull the JPEG.
+
+    Raises:
+        _SensitiveScreenError: If the device refused the screenshot.
+        ValueError: If the file could not be pulled.
+    """
     temp_path = os.path.join(tempfile.gettempdir(), f"screenshot_{uuid.uuid4()}.png")
     hdc_prefix = _get_hdc_prefix(device_id)
 
-    try:
-        # Execute screenshot command
-        # HarmonyOS HDC only supports JPEG format
-        remote_path = "/data/local/tmp/tmp_screenshot.jpeg"
+    # Execute screenshot command
+    # HarmonyOS HDC only supports JPEG format
+    remote_path = "/data/local/tmp/tmp_screenshot.jpeg"
+
+    # Try method 1: hdc shell screenshot (newer HarmonyOS versions)
+    result = _run_hdc_command(
+        hdc_prefix + ["shell", "screenshot", remote_path],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
 
-        # Try method 1: hdc shell screenshot (newer HarmonyOS versions)
+    # Check for screenshot failure (sensitive screen)
+    output = result.stdout + result.stderr
+    if (
+        "fail" in output.lower()
+        or "error" in output.lower()
+        or "not found" in output.lower()
+    ):
+        # Try method 2: snapshot_display (older versions or different devices)
         result = _run_hdc_command(
-            hdc_prefix + ["shell", "screenshot", remote_path],
+            hdc_prefix + ["shell", "snapshot_display", "-f", remote_path],
             capture_output=True,
             text=True,
             timeout=timeout,
         )
-
-        # Check for screenshot failure (sensitive screen)
         output = result.stdout + result.stderr
-        if "fail" in output.lower() or "error" in output.lower() or "not found" in output.lower():
-            # Try method 2: snapshot_display (older versions or different devices)
-            result = _run_hdc_command(
-                hdc_prefix + ["shell", "snapshot_display", "-f", remote_path],
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-            )
-            output = result.stdout + result.stderr
-            if "fail" in output.lower() or "error" in output.lower():
-                return _create_fallback_screenshot(is_sensitive=True)
-
-        # Pull screenshot to local temp path
-        # Note: remote file is JPEG, but PIL can open it regardless of local extension
-        _run_hdc_command(
-            hdc_prefix + ["file", "recv", remote_path, temp_path],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-
-        if not os.path.exists(temp_path):
-            return _create_fallback_screenshot(is_sensitive=False)
+        if "fail" in output.lower() or "error" in output.lower():
+            raise _SensitiveScreenError(f"Screenshot refused: {output.strip()}")
+
+    # Pull screenshot to local temp path
+    # Note: remote file is JPEG, but PIL can open it regardless of local extension
+    _run_hdc_command(
+        hdc_prefix + ["file", "recv", remote_path, temp_path],
+        capture_output=True,
+        text=True,
+        timeout=5,
+    )
 
-        # Read JPEG image and convert to PNG for model inference
-        # PIL automatically detects the image format from file content
-        img = Image.open(temp_path)
-        width, height = img.size
+    if not os.path.exists(temp_path):
+        raise ValueError("Screenshot file was not received")
 
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    with open(temp_path, "rb") as f:
+        data = f.read()
 
-        # Cleanup
-        os.remove(temp_path)
-
-        return Screenshot(
-            base64_data=base64_data, width=width, height=height, is_sensitive=False
-        )
-
-    except Exception as e:
-        print(f"Screenshot error: {e}")
-        return _create_fallback_screenshot(is_sensitive=False)
+    # Cleanup
+    os.remove(temp_path)
+    return data
 
 
 def _get_hdc_prefix(device_id: str | None) -> list:
@@ -108,18 +170,15 @@ def _get_hdc_prefix(device_id: str | None) -> list:
     return ["hdc"]
 
 
-def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
-    """Create a black fallback image when screenshot fails."""
-    default_width, default_height = 1080, 2400
-
-    black_img = Image.new("RGB", (default_width, default_height), color="black")
-    buffered = BytesIO()
-    black_img.save(buffered, format="PNG")
-    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+def _create_fallback_screenshot(
+    is_sensitive: bool, device_id: str | None = None
+) -> Screenshot:
+    """Create a black fallback image, sized like the last capture, on failure."""
+    width, height = _screen_sizes.get(device_id, DEFAULT_SCREEN_SIZE)
 
     return Screenshot(
-        base64_data=base64_data,
-        width=default_width,
-        height=default_height,
+        base64_data=get_black_png_base64(width, height),
+        width=width,
+        height=height,
         is_sensitive=is_sensitive,
     )
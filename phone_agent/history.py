@@ -0,0 +1,149 @@
+"""Conversation history compaction for long-running tasks."""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+_THINK_PATTERN = re.compile(r"<think>.*?</think>", re.DOTALL)
+_ANSWER_PATTERN = re.compile(r"<answer>(.*?)</answer>", re.DOTALL)
+_CJK_PATTERN = re.compile(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+@dataclass
+class HistoryPolicy:
+    """
+    Controls which past turns are resent to the model.
+
+    A turn is one user message (screen info) and the assistant reply to it.
+    The first turn carries the task and is always kept, as is the current
+    user message. Compaction only changes what is sent; the agent keeps the
+    full history.
+
+    Attributes:
+        keep_last_turns: Number of most recent turns sent verbatim. None
+            sends every turn verbatim. Older turns are summarized, stripped of
+            their thinking, or dropped, depending on the options below.
+        drop_old_thinking: Keep older turns, but strip the <think> blocks from
+            their assistant replies so only the answers remain.
+        summarize_old_turns: Replace older turns with a single compact message
+            listing each step's app and action. Takes precedence over
+            drop_old_thinking.
+    """
+
+    keep_last_turns: int | None = None
+    drop_old_thinking: bool = False
+    summarize_old_turns: bool = False
+
+    def apply(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Build the compacted message list for a request.
+
+        Args:
+            messages: Full context: system message, then alternating user and
+                assistant messages, ending with the current user message.
+
+        Returns:
+            A new message list; the input is not modified.
+        """
+        if len(messages) < 4:
+            return list(messages)
+
+        system, first_user = messages[0], messages[1]
+        turns = [(messages[i], messages[i + 1]) for i in range(1, len(messages) - 1, 2)]
+        current = messages[-1] if len(messages) % 2 == 0 else None
+
+        keep = len(turns) if self.keep_last_turns is None else self.keep_last_turns
+        split = max(len(turns) - keep, 0)
+        old_turns, recent_turns = turns[:split], turns[split:]
+
+        compacted = [system]
+        if self.summarize_old_turns and old_turns:
+            # The summary replaces the first reply, so roles still alternate
+            # and the task message stays first
+            compacted.append(first_user)
+            compacted.append(
+                {"role": "assistant", "content": _summarize_turns(old_turns)}
+            )
+        elif self.drop_old_thinking and old_turns:
+            for user, assistant in old_turns:
+                compacted.append(user)
+                compacted.append(
+                    {**assistant, "content": _strip_thinking(assistant["content"])}
+                )
+        elif old_turns:
+            # Turns are dropped as whole pairs, the task turn is always kept
+            compacted.extend(old_turns[0])
+
+        for user, assistant in recent_turns:
+            compacted.extend((user, assistant))
+
+        if current is not None:
+            compacted.append(current)
+        return compacted
+
+
+def estimate_tokens(messages: list[dict[str, Any]]) -> int:
+    """
+    Roughly estimate the text tokens in a message list.
+
+    CJK characters count as one token each and other text as one token per
+    four characters. Images are not counted.
+
+    Args:
+        messages: Messages in OpenAI format.
+
+    Returns:
+        Estimated token count.
+    """
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = "".join(
+                item.get("text", "") for item in content if item.get("type") == "text"
+            )
+        if not content:
+            continue
+        cjk = len(_CJK_PATTERN.findall(content))
+        total += cjk + (len(content) - cjk + 3) // 4
+    return total
+
+
+def _strip_thinking(content: Any) -> Any:
+    """Remove <think> blocks from an assistant reply, keeping the answer."""
+    if not isinstance(content, str):
+        return content
+    return _THINK_PATTERN.sub("", content)
+
+
+def _summarize_turns(turns: list[tuple[dict[str, Any], dict[str, Any]]]) -> str:
+    """Describe each turn as one line with its app and action."""
+    lines = [f"Summary of steps 1-{len(turns)} (reasoning omitted):"]
+    for step, (user, assistant) in enumerate(turns, start=1):
+        app = _get_current_app(user)
+        answer = _get_answer(assistant)
+        lines.append(f"{step}. [{app}] {answer}" if app else f"{step}. {answer}")
+    return "\n".join(lines)
+
+
+def _get_current_app(message: dict[str, Any]) -> str | None:
+    """Read current_app from the screen info JSON at the end of a user message."""
+    content = message.get("content")
+    if isinstance(content, list):
+        content = "".join(
+            item.get("text", "") for item in content if item.get("type") == "text"
+        )
+    try:
+        return json.loads(content.rsplit("\n\n", 1)[-1]).get("current_app")
+    except (AttributeError, ValueError):
+        return None
+
+
+def _get_answer(message: dict[str, Any]) -> str:
+    """Extract the action from an assistant reply."""
+    content = message.get("content") or ""
+    match = _ANSWER_PATTERN.search(content)
+    if match:
+        return match.group(1).strip()
+    return _THINK_PATTERN.sub("", content).strip()
@@ -0,0 +1,253 @@
+"""Image helpers shared by the screenshot backends and the agents."""
+
+import base64
+import math
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8"
+
+_FORMAT_MIME_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+# JPEG start-of-frame markers carry the image dimensions; C4, C8 and CC share
+# the range but are DHT, JPG and DAC segments
+_JPEG_SOF_MARKERS = {0xC0 + i for i in range(16)} - {0xC4, 0xC8, 0xCC}
+
+
+def get_image_mime_type(data: bytes) -> str | None:
+    """
+    Detect the MIME type of encoded image bytes from their signature.
+
+    Args:
+        data: Encoded image bytes (only the first few bytes are inspected).
+
+    Returns:
+        "image/png", "image/jpeg", "image/webp", or None if unknown.
+    """
+    if data.startswith(PNG_SIGNATURE):
+        return "image/png"
+    if data.startswith(JPEG_SIGNATURE):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def get_image_size(data: bytes) -> tuple[int, int]:
+    """
+    Read image dimensions from the PNG IHDR or JPEG SOF header.
+
+    No pixel data is decoded, so this is cheap even for full-resolution
+    screenshots.
+
+    Args:
+        data: Encoded PNG or JPEG bytes.
+
+    Returns:
+        Tuple of (width, height).
+
+    Raises:
+        ValueError: If the format is unsupported or the header is malformed.
+    """
+    if data.startswith(PNG_SIGNATURE):
+        # Signature (8) + chunk length (4) + "IHDR" (4), then width and height
+        if len(data) < 24 or data[12:16] != b"IHDR":
+            raise ValueError("Malformed PNG header")
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+
+    if data.startswith(JPEG_SIGNATURE):
+        return _get_jpeg_size(data)
+
+    raise ValueError("Unsupported image format")
+
+
+def get_base64_image_size(base64_data: str) -> tuple[int, int]:
+    """
+    Read image dimensions from base64-encoded PNG or JPEG data.
+
+    For PNG only the first few bytes are decoded.
+
+    Args:
+        base64_data: Base64-encoded image.
+
+    Returns:
+        Tuple of (width, height).
+
+    Raises:
+        ValueError: If the format is unsupported or the header is malformed.
+    """
+    # 32 base64 characters decode to the 24 bytes that hold the PNG IHDR
+    head = base64.b64decode(base64_data[:32])
+    if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+        return get_image_size(head)
+    return get_image_size(base64.b64decode(base64_data))
+
+
+@lru_cache(maxsize=8)
+def get_black_png_base64(width: int, height: int) -> str:
+    """
+    Get a black PNG of the given size, base64-encoded.
+
+    Used for fallback screenshots when a capture fails. The result is
+    memoized, since failures on secure screens repeat step after step.
+
+    Args:
+        width: Image width in pixels.
+        height: Image height in pixels.
+
+    Returns:
+        Base64-encoded PNG.
+    """
+    black_img = Image.new("RGB", (width, height), color="black")
+    buffered = BytesIO()
+    black_img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+@dataclass
+class ImageConfig:
+    """
+    Configuration for preparing screenshots before they are sent to the model.
+
+    With the defaults the screenshot is sent unchanged.
+
+    Attributes:
+        format: Output format ("PNG", "JPEG" or "WEBP"). None keeps the
+            original encoding unless a resize forces a re-encode, in which
+            case the original format is reused.
+        quality: JPEG/WEBP quality (1-100).
+        max_long_edge: Maximum length of the longer side in pixels.
+        max_pixels: Maximum total pixel count (width * height).
+    """
+
+    format: str | None = None
+    quality: int = 85
+    max_long_edge: int | None = None
+    max_pixels: int | None = None
+
+    def __post_init__(self):
+        if self.format is not None:
+            self.format = self.format.upper()
+            if self.format not in _FORMAT_MIME_TYPES:
+                raise ValueError(f"Unsupported image format: {self.format}")
+
+
+def prepare_image(
+    base64_data: str,
+    width: int,
+    height: int,
+    mime_type: str = "image/png",
+    config: ImageConfig | None = None,
+) -> tuple[str, str]:
+    """
+    Resize and re-encode a screenshot for model input.
+
+    The model works in relative 0-1000 coordinates, so downscaling does not
+    affect how actions map back to device pixels.
+
+    Args:
+        base64_data: Base64-encoded screenshot.
+        width: Screenshot width in pixels.
+        height: Screenshot height in pixels.
+        mime_type: MIME type of the screenshot.
+        config: Preparation settings. If None, the image is returned as-is.
+
+    Returns:
+        Tuple of (base64_data, mime_type) for the prepared image.
+    """
+    if config is None:
+        return base64_data, mime_type
+
+    target_width, target_height = get_target_size(width, height, config)
+    target_format = config.format
+    resize = (target_width, target_height) != (width, height)
+
+    if not resize and (
+        target_format is None or _FORMAT_MIME_TYPES[target_format] == mime_type
+    ):
+        return base64_data, mime_type
+
+    img = Image.open(BytesIO(base64.b64decode(base64_data)))
+    if target_format is None:
+        target_format = img.format if img.format in _FORMAT_MIME_TYPES else "PNG"
+
+    if resize:
+        img = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+    buffered = BytesIO()
+    if target_format == "PNG":
+        img.save(buffered, format="PNG")
+    else:
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.save(buffered, format=target_format, quality=config.quality)
+
+    return (
+        base64.b64encode(buffered.getvalue()).decode("utf-8"),
+        _FORMAT_MIME_TYPES[target_format],
+    )
+
+
+def get_target_size(width: int, height: int, config: ImageConfig) -> tuple[int, int]:
+    """
+    Compute the output size that satisfies the long-edge and pixel budgets.
+
+    The aspect ratio is preserved and images are never upscaled.
+
+    Args:
+        width: Source width in pixels.
+        height: Source height in pixels.
+        config: Preparation settings.
+
+    Returns:
+        Tuple of (width, height).
+    """
+    scale = 1.0
+    if config.max_long_edge:
+        scale = min(scale, config.max_long_edge / max(width, height))
+    if config.max_pixels:
+        scale = min(scale, math.sqrt(config.max_pixels / (width * height)))
+
+    if scale >= 1.0:
+        return width, height
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _get_jpeg_size(data: bytes) -> tuple[int, int]:
+    """Scan JPEG segments until the first start-of-frame marker."""
+    offset = 2
+    length = len(data)
+
+    while offset + 4 <= length:
+        if data[offset] != 0xFF:
+            raise ValueError("Malformed JPEG segment")
+
+        marker = data[offset + 1]
+        # Fill bytes and standalone markers have no length field
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            offset += 2
+            continue
+
+        (segment_length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+        if marker in _JPEG_SOF_MARKERS:
+            if offset + 9 > length:
+                break
+            height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+            return width, height
+
+        offset += 2 + segment_length
+
+    raise ValueError("JPEG start-of-frame marker not found")
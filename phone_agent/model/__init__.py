@@ -1,5 +1,10 @@
 """Model client module for AI inference."""
 
-from phone_agent.model.client import ModelClient, ModelConfig
+from phone_agent.model.client import (
+    AsyncModelClient,
+    ModelClient,
+    ModelConfig,
+    ModelResponse,
+)
 
-__all__ = ["ModelClient", "ModelConfig"]
+__all__ = ["ModelClient", "AsyncModelClient", "ModelConfig", "ModelResponse"]
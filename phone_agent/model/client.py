@@ -3,10 +3,16 @@
 import json
 import time
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Callable
 
-from openai import OpenAI
+from openai import (
+    DEFAULT_CONNECTION_LIMITS,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    OpenAI,
+)
 
+from phone_agent.actions.parser import complete_call
 from phone_agent.config.i18n import get_message
 
 
@@ -23,6 +29,9 @@ class ModelConfig:
     frequency_penalty: float = 0.2
     extra_body: dict[str, Any] = field(default_factory=dict)
     lang: str = "cn"  # Language for UI messages: 'cn' or 'en'
+    # Ask for token usage (incl. cached prefix tokens) with stream_options. Off
+    # by default, servers without stream_options support reject the request
+    include_usage: bool = False
 
 
 @dataclass
@@ -36,6 +45,17 @@ class ModelResponse:
     time_to_first_token: float | None = None  # Time to first token (seconds)
     time_to_thinking_end: float | None = None  # Time to thinking end (seconds)
     total_time: float | None = None  # Total inference time (seconds)
+    # Token usage, when the server reports it (not after early dispatch)
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    cached_tokens: int | None = None  # Prompt tokens served from the prefix cache
+
+    @property
+    def prefix_hit_rate(self) -> float | None:
+        """Fraction of prompt tokens served from the server's prefix cache."""
+        if self.cached_tokens is None or not self.prompt_tokens:
+            return None
+        return self.cached_tokens / self.prompt_tokens
 
 
 class ModelClient:
@@ -44,18 +64,27 @@ class ModelClient:
 
     Args:
         config: Model configuration.
+        echo: Whether to print the streamed thinking and timing metrics.
     """
 
-    def __init__(self, config: ModelConfig | None = None):
+    def __init__(self, config: ModelConfig | None = None, echo: bool = True):
         self.config = config or ModelConfig()
+        self.echo = echo
         self.client = OpenAI(base_url=self.config.base_url, api_key=self.config.api_key)
 
-    def request(self, messages: list[dict[str, Any]]) -> ModelResponse:
+    def request(
+        self,
+        messages: list[dict[str, Any]],
+        on_action: Callable[[str], bool] | None = None,
+    ) -> ModelResponse:
         """
         Send a request to the model.
 
         Args:
             messages: List of message dictionaries in OpenAI format.
+            on_action: Optional callback for early dispatch. It is called once
+                with the action call as soon as it is syntactically complete;
+                if it returns True, the rest of the generation is cancelled.
 
         Returns:
             ModelResponse containing thinking and action.
@@ -63,157 +92,363 @@ class ModelClient:
         Raises:
             ValueError: If the response cannot be parsed.
         """
-        # Start timing
-        start_time = time.time()
-        time_to_first_token = None
-        time_to_thinking_end = None
+        parser = StreamParser(lang=self.config.lang, echo=self.echo)
 
         stream = self.client.chat.completions.create(
-            messages=messages,
-            model=self.config.model_name,
-            max_tokens=self.config.max_tokens,
-            temperature=self.config.temperature,
-            top_p=self.config.top_p,
-            frequency_penalty=self.config.frequency_penalty,
-            extra_body=self.config.extra_body,
-            stream=True,
+            messages=messages, stream=True, **_completion_kwargs(self.config)
         )
 
-        raw_content = ""
-        buffer = ""  # Buffer to hold content that might be part of a marker
-        action_markers = ["finish(message=", "do(action="]
-        in_action_phase = False  # Track if we've entered the action phase
-        first_token_received = False
-
         for chunk in stream:
+            if chunk.usage is not None:
+                parser.set_usage(chunk.usage)
             if len(chunk.choices) == 0:
                 continue
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                raw_content += content
-
-                # Record time to first token
-                if not first_token_received:
-                    time_to_first_token = time.time() - start_time
-                    first_token_received = True
-
-                if in_action_phase:
-                    # Already in action phase, just accumulate content without printing
-                    continue
-
-                buffer += content
-
-                # Check if any marker is fully present in buffer
-                marker_found = False
-                for marker in action_markers:
-                    if marker in buffer:
-                        # Marker found, print everything before it
-                        thinking_part = buffer.split(marker, 1)[0]
-                        print(thinking_part, end="", flush=True)
-                        print()  # Print newline after thinking is complete
-                        in_action_phase = True
-                        marker_found = True
-
-                        # Record time to thinking end
-                        if time_to_thinking_end is None:
-                            time_to_thinking_end = time.time() - start_time
-
-                        break
-
-                if marker_found:
-                    continue  # Continue to collect remaining content
-
-                # Check if buffer ends with a prefix of any marker
-                # If so, don't print yet (wait for more content)
-                is_potential_marker = False
-                for marker in action_markers:
-                    for i in range(1, len(marker)):
-                        if buffer.endswith(marker[:i]):
-                            is_potential_marker = True
-                            break
-                    if is_potential_marker:
-                        break
-
-                if not is_potential_marker:
-                    # Safe to print the buffer
-                    print(buffer, end="", flush=True)
-                    buffer = ""
+            choice = chunk.choices[0]
+            if choice.delta.content is not None:
+                parser.feed(choice.delta.content)
+
+                final = choice.finish_reason is not None
+                if on_action is not None and parser.dispatch(on_action, final):
+                    # Closing the connection makes the server abort generation
+                    stream.close()
+                    break
+
+        return parser.finish()
+
+    def _parse_response(self, content: str) -> tuple[str, str]:
+        """Parse the model response into thinking and action parts."""
+        return parse_response(content)
+
+
+class AsyncModelClient:
+    """
+    Asynchronous client for OpenAI-compatible vision-language models.
+
+    One instance can serve many concurrent requests (e.g. one per phone)
+    from a single event loop; they share one HTTP connection pool.
+
+    Args:
+        config: Model configuration.
+        max_connections: Size of the shared HTTP connection pool.
+        echo: Whether to print the streamed thinking and timing metrics.
+            Output from concurrent requests would interleave, so this is off
+            by default.
+
+    Example:
+        >>> client = AsyncModelClient(ModelConfig(base_url="http://localhost:8000/v1"))
+        >>> responses = await asyncio.gather(
+        ...     *(client.request(messages) for messages in per_device_messages)
+        ... )
+        >>> await client.close()
+    """
+
+    def __init__(
+        self,
+        config: ModelConfig | None = None,
+        max_connections: int = 64,
+        echo: bool = False,
+    ):
+        self.config = config or ModelConfig()
+        self.echo = echo
+        self.client = AsyncOpenAI(
+            base_url=self.config.base_url,
+            api_key=self.config.api_key,
+            http_client=DefaultAsyncHttpxClient(limits=_pool_limits(max_connections)),
+        )
+
+    async def request(
+        self,
+        messages: list[dict[str, Any]],
+        on_action: Callable[[str], bool] | None = None,
+    ) -> ModelResponse:
+        """
+        Send a request to the model.
+
+        Args:
+            messages: List of message dictionaries in OpenAI format.
+            on_action: Optional early dispatch callback, see ModelClient.request.
+
+        Returns:
+            ModelResponse containing thinking and action.
+        """
+        parser = StreamParser(lang=self.config.lang, echo=self.echo)
+
+        stream = await self.client.chat.completions.create(
+            messages=messages, stream=True, **_completion_kwargs(self.config)
+        )
+
+        async for chunk in stream:
+            if chunk.usage is not None:
+                parser.set_usage(chunk.usage)
+            if len(chunk.choices) == 0:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta.content is not None:
+                parser.feed(choice.delta.content)
+
+                final = choice.finish_reason is not None
+                if on_action is not None and parser.dispatch(on_action, final):
+                    await stream.close()
+                    break
+
+        return parser.finish()
+
+    async def close(self) -> None:
+        """Close the shared HTTP connection pool."""
+        await self.client.close()
+
+    async def __aenter__(self) -> "AsyncModelClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class StreamParser:
+    """
+    Incremental parser for streamed model output.
+
+    Shared by ModelClient and AsyncModelClient. Prints the thinking part as
+    it streams, stops printing at the first action marker, and records the
+    timing metrics reported in ModelResponse.
 
+    Args:
+        lang: Language for the printed metrics.
+        echo: Whether to print thinking and metrics.
+    """
+
+    ACTION_MARKERS = ["finish(message=", "do(action="]
+
+    def __init__(self, lang: str = "cn", echo: bool = True):
+        self.lang = lang
+        self.echo = echo
+        self.start_time = time.time()
+        self.time_to_first_token: float | None = None
+        self.time_to_thinking_end: float | None = None
+        self.raw_content = ""
+        self._buffer = ""  # Buffer to hold content that might be part of a marker
+        self._in_action_phase = False  # Track if we've entered the action phase
+        self._action_start: int | None = None  # Offset of the action in raw_content
+        self._dispatched = False  # Whether the action was offered for dispatch
+        self._early_action: str | None = None  # Action accepted for early dispatch
+        self.prompt_tokens: int | None = None
+        self.completion_tokens: int | None = None
+        self.cached_tokens: int | None = None
+
+    def feed(self, content: str) -> None:
+        """
+        Consume the next piece of streamed content.
+
+        Args:
+            content: Delta content from a stream chunk.
+        """
+        self.raw_content += content
+
+        # Record time to first token
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.time() - self.start_time
+
+        if self._in_action_phase:
+            # Already in action phase, just accumulate content without printing
+            return
+
+        self._buffer += content
+
+        # Check if any marker is fully present in buffer
+        for marker in self.ACTION_MARKERS:
+            if marker in self._buffer:
+                # Marker found, print everything before it
+                thinking_part = self._buffer.split(marker, 1)[0]
+                self._print(thinking_part, end="", flush=True)
+                self._print()  # Print newline after thinking is complete
+                self._in_action_phase = True
+                self._action_start = self.raw_content.find(marker)
+
+                # Record time to thinking end
+                self.time_to_thinking_end = time.time() - self.start_time
+                return
+
+        # Check if buffer ends with a prefix of any marker
+        # If so, don't print yet (wait for more content)
+        for marker in self.ACTION_MARKERS:
+            for i in range(1, len(marker)):
+                if self._buffer.endswith(marker[:i]):
+                    return
+
+        # Safe to print the buffer
+        self._print(self._buffer, end="", flush=True)
+        self._buffer = ""
+
+    def dispatch(self, on_action: Callable[[str], bool], final: bool = False) -> bool:
+        """
+        Offer the streamed action to a callback once it is complete.
+
+        Args:
+            on_action: Callback receiving the complete action call.
+            final: Whether the stream has finished, which ends free text.
+
+        Returns:
+            True if the callback accepted the action and streaming can stop.
+        """
+        if self._dispatched or self._action_start is None:
+            return False
+
+        action = complete_call(self.raw_content[self._action_start :], final)
+        if action is None:
+            return False
+
+        self._dispatched = True
+        if on_action(action):
+            self._early_action = action
+            return True
+        return False
+
+    def set_usage(self, usage: Any) -> None:
+        """
+        Record token usage from the final stream chunk.
+
+        Args:
+            usage: The chunk's CompletionUsage. Cached prompt tokens are read
+                from prompt_tokens_details (vLLM with prompt token details
+                enabled, SGLang, OpenAI) when present.
+        """
+        self.prompt_tokens = usage.prompt_tokens
+        self.completion_tokens = usage.completion_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is not None and details.cached_tokens is not None:
+            self.cached_tokens = details.cached_tokens
+
+    def finish(self) -> ModelResponse:
+        """
+        Finish the stream and build the response.
+
+        Returns:
+            ModelResponse containing thinking, action and timing metrics.
+        """
         # Calculate total time
-        total_time = time.time() - start_time
+        total_time = time.time() - self.start_time
 
         # Parse thinking and action from response
-        thinking, action = self._parse_response(raw_content)
+        thinking, action = parse_response(self.raw_content)
+        if self._early_action is not None:
+            # Generation was cut short, drop the partial tokens after the call
+            action = self._early_action
 
         # Print performance metrics
-        lang = self.config.lang
-        print()
-        print("=" * 50)
-        print(f"⏱️  {get_message('performance_metrics', lang)}:")
-        print("-" * 50)
-        if time_to_first_token is not None:
-            print(
-                f"{get_message('time_to_first_token', lang)}: {time_to_first_token:.3f}s"
+        lang = self.lang
+        self._print()
+        self._print("=" * 50)
+        self._print(f"⏱️  {get_message('performance_metrics', lang)}:")
+        self._print("-" * 50)
+        if self.time_to_first_token is not None:
+            self._print(
+                f"{get_message('time_to_first_token', lang)}: "
+                f"{self.time_to_first_token:.3f}s"
             )
-        if time_to_thinking_end is not None:
-            print(
-                f"{get_message('time_to_thinking_end', lang)}:        {time_to_thinking_end:.3f}s"
+        if self.time_to_thinking_end is not None:
+            self._print(
+                f"{get_message('time_to_thinking_end', lang)}:        "
+                f"{self.time_to_thinking_end:.3f}s"
             )
-        print(
+        self._print(
             f"{get_message('total_inference_time', lang)}:          {total_time:.3f}s"
         )
-        print("=" * 50)
+        if self.cached_tokens is not None and self.prompt_tokens:
+            self._print(
+                f"{get_message('prefix_cache_hit', lang)}: "
+                f"{self.cached_tokens / self.prompt_tokens:.1%} "
+                f"({self.cached_tokens}/{self.prompt_tokens} tokens)"
+            )
+        self._print("=" * 50)
 
         return ModelResponse(
             thinking=thinking,
             action=action,
-            raw_content=raw_content,
-            time_to_first_token=time_to_first_token,
-            time_to_thinking_end=time_to_thinking_end,
+            raw_content=self.raw_content,
+            time_to_first_token=self.time_to_first_token,
+            time_to_thinking_end=self.time_to_thinking_end,
             total_time=total_time,
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            cached_tokens=self.cached_tokens,
         )
 
-    def _parse_response(self, content: str) -> tuple[str, str]:
-        """
-        Parse the model response into thinking and action parts.
+    def _print(self, *args, **kwargs) -> None:
+        if self.echo:
+            print(*args, **kwargs)
 
-        Parsing rules:
-        1. If content contains 'finish(message=', everything before is thinking,
-           everything from 'finish(message=' onwards is action.
-        2. If rule 1 doesn't apply but content contains 'do(action=',
-           everything before is thinking, everything from 'do(action=' onwards is action.
-        3. Fallback: If content contains '<answer>', use legacy parsing with XML tags.
-        4. Otherwise, return empty thinking and full content as action.
 
-        Args:
-            content: Raw response content.
+def parse_response(content: str) -> tuple[str, str]:
+    """
+    Parse the model response into thinking and action parts.
 
-        Returns:
-            Tuple of (thinking, action).
-        """
-        # Rule 1: Check for finish(message=
-        if "finish(message=" in content:
-            parts = content.split("finish(message=", 1)
-            thinking = parts[0].strip()
-            action = "finish(message=" + parts[1]
-            return thinking, action
-
-        # Rule 2: Check for do(action=
-        if "do(action=" in content:
-            parts = content.split("do(action=", 1)
-            thinking = parts[0].strip()
-            action = "do(action=" + parts[1]
-            return thinking, action
-
-        # Rule 3: Fallback to legacy XML tag parsing
-        if "<answer>" in content:
-            parts = content.split("<answer>", 1)
-            thinking = parts[0].replace("<think>", "").replace("</think>", "").strip()
-            action = parts[1].replace("</answer>", "").strip()
-            return thinking, action
-
-        # Rule 4: No markers found, return content as action
-        return "", content
+    Parsing rules:
+    1. If content contains 'finish(message=', everything before is thinking,
+       everything from 'finish(message=' onwards is action.
+    2. If rule 1 doesn't apply but content contains 'do(action=',
+       everything before is thinking, everything from 'do(action=' onwards is action.
+    3. Fallback: If content contains '<answer>', use legacy parsing with XML tags.
+    4. Otherwise, return empty thinking and full content as action.
+
+    Args:
+        content: Raw response content.
+
+    Returns:
+        Tuple of (thinking, action).
+    """
+    # Rule 1: Check for finish(message=
+    if "finish(message=" in content:
+        parts = content.split("finish(message=", 1)
+        thinking = parts[0].strip()
+        action = "finish(message=" + parts[1]
+        return thinking, action
+
+    # Rule 2: Check for do(action=
+    if "do(action=" in content:
+        parts = content.split("do(action=", 1)
+        thinking = parts[0].strip()
+        action = "do(action=" + parts[1]
+        return thinking, action
+
+    # Rule 3: Fallback to legacy XML tag parsing
+    if "<answer>" in content:
+        parts = content.split("<answer>", 1)
+        thinking = parts[0].replace("<think>", "").replace("</think>", "").strip()
+        action = parts[1].replace("</answer>", "").strip()
+        return thinking, action
+
+    # Rule 4: No markers found, return content as action
+    return "", content
+
+
+def _pool_limits(max_connections: int):
+    """
+    Build connection pool limits for openai's HTTP client.
+
+    The limits type is taken from openai's own defaults, so it matches the
+    httpx package the installed openai is built on.
+    """
+    return type(DEFAULT_CONNECTION_LIMITS)(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=DEFAULT_CONNECTION_LIMITS.keepalive_expiry,
+    )
+
+
+def _completion_kwargs(config: ModelConfig) -> dict[str, Any]:
+    """Sampling parameters shared by the sync and async clients."""
+    kwargs = {
+        "model": config.model_name,
+        "max_tokens": config.max_tokens,
+        "temperature": config.temperature,
+        "top_p": config.top_p,
+        "frequency_penalty": config.frequency_penalty,
+        "extra_body": config.extra_body,
+    }
+    if config.include_usage:
+        # Usage arrives in a final chunk with no choices
+        kwargs["stream_options"] = {"include_usage": True}
+    return kwargs
 
 
 class MessageBuilder:
@@ -226,7 +461,10 @@ class MessageBuilder:
 
     @staticmethod
     def create_user_message(
-        text: str, image_base64: str | None = None
+        text: str,
+        image_base64: str | None = None,
+        mime_type: str = "image/png",
+        text_first: bool = False,
     ) -> dict[str, Any]:
         """
         Create a user message with optional image.
@@ -234,21 +472,26 @@ class MessageBuilder:
         Args:
             text: Text content.
             image_base64: Optional base64-encoded image.
+            mime_type: MIME type of the encoded image.
+            text_first: Put the text before the image. Once the image is
+                removed from the message, the remaining text is then an exact
+                prefix of what was sent with the image, so the server can
+                reuse its cached KV for it on the next request.
 
         Returns:
             Message dictionary.
         """
-        content = []
+        content = [{"type": "text", "text": text}]
 
         if image_base64:
-            content.append(
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{image_base64}"},
-                }
-            )
-
-        content.append({"type": "text", "text": text})
+            image = {
+                "type": "image_url",
+                "image_url": {"url": f"data:{mime_type};base64,{image_base64}"},
+            }
+            if text_first:
+                content.append(image)
+            else:
+                content.insert(0, image)
 
         return {"role": "user", "content": content}
 
@@ -0,0 +1,169 @@
+"""Detect when the screen has settled after an action by diffing frames."""
+
+import time
+from typing import Any, Callable
+
+from PIL import Image, ImageChops, ImageStat
+
+# Frames are compared at this width; enough to see transitions, cheap to diff
+THUMBNAIL_WIDTH = 72
+
+
+def make_thumbnail(img: Image.Image, width: int = THUMBNAIL_WIDTH) -> Image.Image:
+    """
+    Reduce a frame to a small grayscale thumbnail for comparison.
+
+    JPEG frames are decoded directly at reduced scale.
+
+    Args:
+        img: Source frame.
+        width: Thumbnail width in pixels.
+
+    Returns:
+        Grayscale PIL image.
+    """
+    if img.width <= width:
+        return img.convert("L")
+
+    height = max(1, round(img.height * width / img.width))
+    if img.format == "JPEG":
+        img.draft("L", (width, height))
+
+    # reduce() box-averages by an integer factor, resize() finishes the rest
+    factor = img.width // width
+    if factor > 1:
+        img = img.reduce(factor)
+    return img.convert("L").resize((width, height), Image.Resampling.BILINEAR)
+
+
+def frame_difference(a: Image.Image, b: Image.Image) -> float:
+    """
+    Compute the mean absolute pixel difference between two thumbnails.
+
+    Args:
+        a: First grayscale thumbnail.
+        b: Second grayscale thumbnail.
+
+    Returns:
+        Difference between 0.0 (identical) and 1.0.
+    """
+    if a.size != b.size:
+        return 1.0
+    return ImageStat.Stat(ImageChops.difference(a, b)).mean[0] / 255
+
+
+def wait_for_settle(
+    grab_frame: Callable[[], Image.Image],
+    timeout: float = 3.0,
+    min_wait: float = 0.2,
+    poll_interval: float = 0.05,
+    stable_frames: int = 2,
+    threshold: float = 0.01,
+) -> tuple[bool, float]:
+    """
+    Poll frames until consecutive frames stop changing.
+
+    Every poll costs one grab_frame() call, usually a full screen capture, so
+    the poll rate is bounded by capture latency more than poll_interval.
+
+    Args:
+        grab_frame: Callable returning the current screen as a PIL image. It
+            must raise when the capture fails: a placeholder image (e.g. the
+            black fallback screenshot) never changes and reads as settled.
+        timeout: Maximum time to wait in seconds, including min_wait.
+        min_wait: Time to wait before the first frame, so that transitions
+            triggered by the action have started.
+        poll_interval: Pause between frame captures in seconds.
+        stable_frames: Number of consecutive unchanged frame pairs required.
+        threshold: Mean difference at or below which frames count as unchanged.
+
+    Returns:
+        Tuple of (settled, elapsed seconds). settled is False if the timeout
+        was reached while the screen was still changing.
+
+    Raises:
+        Exception: Whatever grab_frame raises, so callers can fall back to a
+            fixed delay.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    time.sleep(min_wait)
+
+    previous = make_thumbnail(grab_frame())
+    stable = 0
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        current = make_thumbnail(grab_frame())
+
+        if frame_difference(previous, current) <= threshold:
+            stable += 1
+            if stable >= stable_frames:
+                return True, time.monotonic() - start
+        else:
+            stable = 0
+        previous = current
+
+    return False, time.monotonic() - start
+
+
+def wait_for_stream_settle(
+    wait_for_frame: Callable[[float, float], Any],
+    since: float,
+    timeout: float = 3.0,
+    min_wait: float = 0.2,
+    quiet: float = 0.3,
+    threshold: float = 0.01,
+) -> tuple[bool, float]:
+    """
+    Wait until a frame stream stops delivering changed frames.
+
+    Stream sources such as screenrecord only emit a frame when the screen
+    changes, so polling their latest frame reads as settled before the
+    action's transition has even been decoded. Instead, the screen counts as
+    settled once no changed frame was decoded for `quiet` seconds.
+
+    Args:
+        wait_for_frame: Callable (after, timeout) returning the first frame
+            with a `timestamp` (time.time()) newer than after, or None if none
+            arrived in time. It must return None early only when the stream
+            has stopped.
+        since: time.time() when the action was sent; frames decoded before it
+            are ignored.
+        timeout: Maximum time to wait in seconds after since.
+        min_wait: Minimum time after since before the screen can count as
+            settled.
+        quiet: Time without a changed frame required to count as settled.
+        threshold: Mean difference at or below which frames count as unchanged.
+
+    Returns:
+        Tuple of (settled, elapsed seconds since the action).
+
+    Raises:
+        ValueError: If the stream stopped, so callers can fall back to a fixed
+            delay.
+    """
+    deadline = since + timeout
+    after = since
+    last_change = since
+    previous = None
+    while True:
+        now = time.time()
+        settled_at = max(since + min_wait, last_change + quiet)
+        if now >= settled_at:
+            return True, now - since
+        if now >= deadline:
+            return False, now - since
+
+        wait = min(settled_at, deadline) - now
+        frame = wait_for_frame(after, wait)
+        if frame is None:
+            # A quiet stream times out, a stopped one returns at once
+            if time.time() < now + wait / 2:
+                raise ValueError("Frame stream stopped")
+            continue
+
+        after = frame.timestamp
+        current = make_thumbnail(frame.image)
+        if previous is None or frame_difference(previous, current) > threshold:
+            last_change = frame.timestamp
+        previous = current
@@ -0,0 +1,176 @@
+"""Per-app timing profiles learned from observed settle times."""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PROFILE_PATH = os.getenv(
+    "PHONE_AGENT_TIMING_PROFILE_PATH",
+    os.path.join(Path.home(), ".phone_agent", "timing_profiles.json"),
+)
+
+# Samples kept per (app, action); older samples roll off
+MAX_SAMPLES = 20
+# Samples needed before a learned delay replaces the global default
+MIN_SAMPLES = 3
+# Percentile of recent settle times used as the learned delay
+PERCENTILE = 90
+# Minimum seconds between writes of recorded samples, the rest is written by
+# flush() (registered at exit for the shared store)
+SAVE_INTERVAL = 30.0
+
+
+class TimingProfileStore:
+    """
+    Rolling settle-time samples per (app, action), persisted as JSON.
+
+    Args:
+        path: Location of the JSON store.
+
+    Example:
+        >>> store = TimingProfileStore("/tmp/profiles.json")
+        >>> store.record("淘宝", "Launch", 2.4)
+        >>> store.get_delay("淘宝", "Launch", default=1.0)
+        1.0
+    """
+
+    def __init__(self, path: str = DEFAULT_PROFILE_PATH):
+        self.path = path
+        self._profiles: dict[str, dict[str, list[float]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load()
+
+    def record(self, app: str, action: str, seconds: float) -> None:
+        """
+        Record an observed settle time.
+
+        The store is written at most every SAVE_INTERVAL seconds; call
+        flush() to write pending samples.
+
+        Args:
+            app: App name the action ran in (or launched, for Launch).
+            action: Action name, e.g. "Tap" or "Launch".
+            seconds: Observed time until the screen settled.
+        """
+        with self._lock:
+            samples = self._profiles.setdefault(app, {}).setdefault(action, [])
+            samples.append(round(seconds, 3))
+            del samples[:-MAX_SAMPLES]
+            self._dirty = True
+            if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+                self._save()
+
+    def flush(self) -> None:
+        """Write pending samples to disk."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def get_delay(self, app: str | None, action: str, default: float) -> float:
+        """
+        Get the learned delay for an action in an app.
+
+        Args:
+            app: App name, or None if unknown.
+            action: Action name.
+            default: Delay to use when there are not enough samples.
+
+        Returns:
+            The rolling percentile of recent settle times, or the default.
+        """
+        with self._lock:
+            samples = self._profiles.get(app or "", {}).get(action, [])
+            if len(samples) < MIN_SAMPLES:
+                return default
+            return _percentile(samples, PERCENTILE)
+
+    def profiles(self) -> dict[str, dict[str, dict[str, float]]]:
+        """
+        Summarize the store for display.
+
+        Returns:
+            Mapping of app -> action -> {"samples", "delay", "median"}.
+        """
+        with self._lock:
+            return {
+                app: {
+                    action: {
+                        "samples": len(samples),
+                        "delay": _percentile(samples, PERCENTILE),
+                        "median": _percentile(samples, 50),
+                    }
+                    for action, samples in actions.items()
+                    if samples
+                }
+                for app, actions in sorted(self._profiles.items())
+            }
+
+    def reset(self, app: str | None = None) -> None:
+        """
+        Forget learned timings.
+
+        Args:
+            app: App to reset. If None, all profiles are removed.
+        """
+        with self._lock:
+            if app is None:
+                self._profiles.clear()
+            else:
+                self._profiles.pop(app, None)
+            self._save()
+
+    def _load(self) -> None:
+        """Load the store from disk, starting empty if it is missing or corrupt."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._profiles = json.load(f)
+        except FileNotFoundError:
+            self._profiles = {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable timing profiles {self.path}: {e}")
+            self._profiles = {}
+
+    def _save(self) -> None:
+        """Write the store atomically."""
+        self._dirty = False
+        self._last_save = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._profiles, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save timing profiles: {e}")
+
+
+def _percentile(samples: list[float], percentile: float) -> float:
+    """Nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+_store: TimingProfileStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_timing_profiles() -> TimingProfileStore:
+    """
+    Get the shared timing profile store.
+
+    Returns:
+        The process-wide TimingProfileStore.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TimingProfileStore()
+            atexit.register(_store.flush)
+        return _store
@@ -0,0 +1,275 @@
+"""Record and replay of agent runs."""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Callable
+
+TRACE_FILE = "trace.jsonl"
+BLOB_DIR = "blobs"
+
+_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp"}
+
+
+class TraceWriter:
+    """
+    Appends agent runs to a trace directory.
+
+    The directory holds trace.jsonl, one JSON record per line, and blobs/,
+    the screenshots named by the SHA-256 of their bytes so identical frames
+    are stored once. Every record is flushed as soon as it is written, so a
+    crash mid-run leaves a readable trace up to the last completed step.
+
+    Records have a "type" of "task" (start of a run), "step" or "error" (a
+    step that failed before an action was chosen, e.g. on a model error).
+
+    Args:
+        trace_dir: Directory to write to. Created if missing; existing traces
+            are appended to.
+
+    Example:
+        >>> trace = TraceWriter("traces/wechat")
+        >>> trace.start_task("打开微信", device_id="emulator-5554")
+        >>> trace.write_step(1, screenshot_base64=..., current_app="System Home", ...)
+    """
+
+    def __init__(self, trace_dir: str):
+        self.trace_dir = trace_dir
+        self._blob_dir = os.path.join(trace_dir, BLOB_DIR)
+        os.makedirs(self._blob_dir, exist_ok=True)
+        self._file = open(os.path.join(trace_dir, TRACE_FILE), "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def start_task(self, task: str, device_id: str | None = None) -> None:
+        """
+        Record the start of a run.
+
+        Args:
+            task: Task description.
+            device_id: Device the run executes on.
+        """
+        self._write(
+            {"type": "task", "time": time.time(), "task": task, "device_id": device_id}
+        )
+
+    def write_step(
+        self,
+        step: int,
+        screenshot_base64: str,
+        mime_type: str,
+        width: int,
+        height: int,
+        current_app: str | None,
+        raw_output: str,
+        action: dict[str, Any],
+        result: Any,
+        timings: dict[str, float],
+        device_id: str | None = None,
+        cached: bool = False,
+    ) -> None:
+        """
+        Record one agent step.
+
+        Args:
+            step: 1-based step index.
+            screenshot_base64: Base64-encoded screenshot the action was chosen on.
+            mime_type: MIME type of the screenshot.
+            width: Screen width in pixels.
+            height: Screen height in pixels.
+            current_app: Foreground app.
+            raw_output: Raw model output.
+            action: Parsed action.
+            result: ActionResult of executing the action.
+            timings: Seconds spent per stage (e.g. capture, model, execute).
+            device_id: Device the step ran on.
+            cached: Whether the action came from the action cache.
+        """
+        self._write(
+            {
+                "type": "step",
+                "time": time.time(),
+                "device_id": device_id,
+                "step": step,
+                "screenshot": self._write_blob(screenshot_base64, mime_type),
+                "width": width,
+                "height": height,
+                "current_app": current_app,
+                "raw_output": raw_output,
+                "action": action,
+                "result": asdict(result),
+                "timings": {name: round(value, 4) for name, value in timings.items()},
+                "cached": cached,
+            }
+        )
+
+    def write_error(
+        self,
+        step: int,
+        screenshot_base64: str,
+        mime_type: str,
+        width: int,
+        height: int,
+        current_app: str | None,
+        error: str,
+        timings: dict[str, float],
+        device_id: str | None = None,
+    ) -> None:
+        """
+        Record a step that failed before an action was chosen.
+
+        Args:
+            step: 1-based step index.
+            screenshot_base64: Base64-encoded screenshot of the step.
+            mime_type: MIME type of the screenshot.
+            width: Screen width in pixels.
+            height: Screen height in pixels.
+            current_app: Foreground app.
+            error: Error message, e.g. of the failed model request.
+            timings: Seconds spent per stage until the failure.
+            device_id: Device the step ran on.
+        """
+        self._write(
+            {
+                "type": "error",
+                "time": time.time(),
+                "device_id": device_id,
+                "step": step,
+                "screenshot": self._write_blob(screenshot_base64, mime_type),
+                "width": width,
+                "height": height,
+                "current_app": current_app,
+                "error": error,
+                "timings": {name: round(value, 4) for name, value in timings.items()},
+            }
+        )
+
+    def close(self) -> None:
+        """Close the trace file."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def _write_blob(self, data_base64: str, mime_type: str) -> str:
+        """Store screenshot bytes once and return their path relative to the trace."""
+        data = base64.b64decode(data_base64)
+        name = f"{hashlib.sha256(data).hexdigest()}.{_EXTENSIONS.get(mime_type, 'bin')}"
+        path = os.path.join(self._blob_dir, name)
+        if not os.path.exists(path):
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return f"{BLOB_DIR}/{name}"
+
+
+def read_trace(trace_dir: str) -> list[list[dict[str, Any]]]:
+    """
+    Read the runs recorded in a trace directory.
+
+    A truncated last line, as left by a crash, is ignored.
+
+    Args:
+        trace_dir: Trace directory.
+
+    Returns:
+        One list per run, each starting with its task record followed by its
+        step and error records.
+    """
+    runs: list[list[dict[str, Any]]] = []
+    with open(os.path.join(trace_dir, TRACE_FILE), encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if record.get("type") == "task" or not runs:
+                runs.append([])
+            runs[-1].append(record)
+    return runs
+
+
+def load_screenshot(trace_dir: str, record: dict[str, Any]) -> bytes:
+    """
+    Load the screenshot of a step record.
+
+    Args:
+        trace_dir: Trace directory.
+        record: Step record.
+
+    Returns:
+        Encoded image bytes.
+    """
+    with open(os.path.join(trace_dir, record["screenshot"]), "rb") as f:
+        return f.read()
+
+
+def replay_trace(
+    trace_dir: str,
+    action_handler: Any,
+    run: int = -1,
+    on_step: Callable[[dict[str, Any], Any], None] | None = None,
+    get_screen_size: Callable[[], tuple[int, int]] | None = None,
+) -> list[Any]:
+    """
+    Re-execute the actions of a recorded run, without the model.
+
+    Actions are executed back to back, so the pace is set by the handler's
+    post-action waits. Create an ActionHandler with settle_mode="adaptive" to
+    continue as soon as the screen settles. Error records are skipped.
+
+    Action coordinates are relative to the screen, so they are scaled with
+    the size of the target device's screen, which may differ from the
+    recorded one (another device, or a rotated screen).
+
+    Args:
+        trace_dir: Trace directory.
+        action_handler: ActionHandler or IOSActionHandler for the target device.
+        run: Index of the run to replay (default: the last one).
+        on_step: Optional callback invoked with (step record, ActionResult).
+        get_screen_size: Callable returning the target screen's (width,
+            height), called before every step. If None, the recorded size
+            is used.
+
+    Returns:
+        ActionResults of the replayed steps. Replay stops after a step that
+        finishes the task.
+
+    Raises:
+        ValueError: If the trace has no such run.
+    """
+    runs = read_trace(trace_dir)
+    try:
+        records = runs[run]
+    except IndexError:
+        raise ValueError(f"Trace has {len(runs)} runs, no run {run}") from None
+
+    results = []
+    for record in records:
+        if record.get("type") != "step":
+            continue
+        if get_screen_size is not None:
+            width, height = get_screen_size()
+        else:
+            width, height = record["width"], record["height"]
+        result = action_handler.execute(record["action"], width, height)
+        results.append(result)
+        if on_step is not None:
+            on_step(record, result)
+        if result.should_finish:
+            break
+    return results
@@ -1,5 +1,6 @@
 """XCTest utilities for iOS device interaction via WebDriverAgent/XCUITest."""
 
+from phone_agent.xctest.client import WDAClient, close_wda_clients, get_wda_client
 from phone_agent.xctest.connection import (
     ConnectionType,
     DeviceInfo,
@@ -21,11 +22,27 @@ from phone_agent.xctest.input import (
     clear_text,
     type_text,
 )
+from phone_agent.xctest.mjpeg import (
+    MJPEGFrame,
+    MJPEGStream,
+    close_mjpeg_streams,
+    get_mjpeg_stream,
+)
 from phone_agent.xctest.screenshot import get_screenshot
+from phone_agent.xctest.session import (
+    ENTER_KEY,
+    ActionBatch,
+    WDASession,
+    get_wda_session,
+)
 
 __all__ = [
     # Screenshot
     "get_screenshot",
+    "MJPEGStream",
+    "MJPEGFrame",
+    "get_mjpeg_stream",
+    "close_mjpeg_streams",
     # Input
     "type_text",
     "clear_text",
@@ -44,4 +61,13 @@ __all__ = [
     "ConnectionType",
     "quick_connect",
     "list_devices",
+    # HTTP client
+    "WDAClient",
+    "get_wda_client",
+    "close_wda_clients",
+    # Sessions and action batching
+    "WDASession",
+    "get_wda_session",
+    "ActionBatch",
+    "ENTER_KEY",
 ]
@@ -0,0 +1,90 @@
+"""Pooled HTTP client for WebDriverAgent."""
+
+import threading
+from typing import Any
+
+# Connections kept open per WDA server. The iOS agent probes the screenshot
+# and current app concurrently, so two are in use at a time.
+DEFAULT_POOL_SIZE = 4
+
+_clients: dict[str, "WDAClient"] = {}
+_clients_lock = threading.Lock()
+
+
+class WDAClient:
+    """
+    Keep-alive HTTP session to one WebDriverAgent server.
+
+    Requests reuse pooled connections instead of opening a new TCP
+    connection (through iproxy on USB devices) for every call. Use
+    get_wda_client() to share one client per WDA URL.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        pool_size: Maximum number of connections kept open.
+
+    Raises:
+        ImportError: If the requests library is not installed.
+    """
+
+    def __init__(self, wda_url: str, pool_size: int = DEFAULT_POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.wda_url = wda_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.verify = False
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs: Any):
+        """Send a GET request to a full URL or a path on the WDA server."""
+        return self.session.get(self._resolve(url), **kwargs)
+
+    def post(self, url: str, **kwargs: Any):
+        """Send a POST request to a full URL or a path on the WDA server."""
+        return self.session.post(self._resolve(url), **kwargs)
+
+    def delete(self, url: str, **kwargs: Any):
+        """Send a DELETE request to a full URL or a path on the WDA server."""
+        return self.session.delete(self._resolve(url), **kwargs)
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+    def _resolve(self, url: str) -> str:
+        if url.startswith(("http://", "https://")):
+            return url
+        return f"{self.wda_url}/{url.lstrip('/')}"
+
+
+def get_wda_client(wda_url: str = "http://localhost:8100") -> WDAClient:
+    """
+    Get the shared client for a WDA URL, creating it on first use.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+
+    Returns:
+        The WDAClient for that URL.
+
+    Raises:
+        ImportError: If the requests library is not installed.
+    """
+    key = wda_url.rstrip("/")
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = WDAClient(key)
+        return client
+
+
+def close_wda_clients() -> None:
+    """Close all shared WDA clients."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
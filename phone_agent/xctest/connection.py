@@ -5,6 +5,8 @@ import time
 from dataclasses import dataclass
 from enum import Enum
 
+from phone_agent.xctest.client import get_wda_client
+
 
 class ConnectionType(Enum):
     """Type of iOS connection."""
@@ -204,9 +206,7 @@ class XCTestConnection:
             True if WDA is ready, False otherwise.
         """
         try:
-            import requests
-
-            response = requests.get(
+            response = get_wda_client(self.wda_url).get(
                 f"{self.wda_url}/status", timeout=timeout, verify=False
             )
             return response.status_code == 200
@@ -226,9 +226,7 @@ class XCTestConnection:
             Tuple of (success, session_id or error_message).
         """
         try:
-            import requests
-
-            response = requests.post(
+            response = get_wda_client(self.wda_url).post(
                 f"{self.wda_url}/session",
                 json={"capabilities": {}},
                 timeout=30,
@@ -260,9 +258,9 @@ class XCTestConnection:
             Status dictionary or None if not available.
         """
         try:
-            import requests
-
-            response = requests.get(f"{self.wda_url}/status", timeout=5, verify=False)
+            response = get_wda_client(self.wda_url).get(
+                f"{self.wda_url}/status", timeout=5, verify=False
+            )
 
             if response.status_code == 200:
                 return response.json()
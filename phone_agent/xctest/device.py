@@ -5,29 +5,12 @@ import time
 from typing import Optional
 
 from phone_agent.config.apps_ios import APP_PACKAGES_IOS as APP_PACKAGES
+from phone_agent.config.apps_ios import get_app_name
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.session import ActionBatch, get_wda_session
 
 SCALE_FACTOR = 3 # 3 for most modern iPhone 
 
-def _get_wda_session_url(wda_url: str, session_id: str | None, endpoint: str) -> str:
-    """
-    Get the correct WDA URL for a session endpoint.
-
-    Args:
-        wda_url: Base WDA URL.
-        session_id: Optional session ID.
-        endpoint: The endpoint path.
-
-    Returns:
-        Full URL for the endpoint.
-    """
-    base = wda_url.rstrip("/")
-    if session_id:
-        return f"{base}/session/{session_id}/{endpoint}"
-    else:
-        # Try to use WDA endpoints without session when possible
-        return f"{base}/{endpoint}"
-
-
 def get_current_app(
     wda_url: str = "http://localhost:8100", session_id: str | None = None
 ) -> str:
@@ -42,10 +25,8 @@ def get_current_app(
         The app name if recognized, otherwise "System Home".
     """
     try:
-        import requests
-
         # Get active app info from WDA using activeAppInfo endpoint
-        response = requests.get(
+        response = get_wda_client(wda_url).get(
             f"{wda_url.rstrip('/')}/wda/activeAppInfo", timeout=5, verify=False
         )
 
@@ -58,9 +39,9 @@ def get_current_app(
 
             if bundle_id:
                 # Try to find app name from bundle ID
-                for app_name, package in APP_PACKAGES.items():
-                    if package == bundle_id:
-                        return app_name
+                app_name = get_app_name(bundle_id)
+                if app_name:
+                    return app_name
 
             return "System Home"
 
@@ -90,28 +71,9 @@ def tap(
         delay: Delay in seconds after tap.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "actions")
-
         # W3C WebDriver Actions API for tap/click
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x / SCALE_FACTOR, "y": y / SCALE_FACTOR},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 0.1},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        requests.post(url, json=actions, timeout=15, verify=False)
+        batch = ActionBatch(SCALE_FACTOR).tap(x, y)
+        get_wda_session(wda_url, session_id).perform(batch, timeout=15)
 
         time.sleep(delay)
 
@@ -139,32 +101,9 @@ def double_tap(
         delay: Delay in seconds after double tap.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "actions")
-
         # W3C WebDriver Actions API for double tap
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x / SCALE_FACTOR, "y": y / SCALE_FACTOR},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 100},
-                        {"type": "pointerUp", "button": 0},
-                        {"type": "pause", "duration": 100},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": 100},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        requests.post(url, json=actions, timeout=10, verify=False)
+        batch = ActionBatch(SCALE_FACTOR).double_tap(x, y)
+        get_wda_session(wda_url, session_id).perform(batch)
 
         time.sleep(delay)
 
@@ -194,31 +133,10 @@ def long_press(
         delay: Delay in seconds after long press.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "actions")
-
         # W3C WebDriver Actions API for long press
         # Convert duration to milliseconds
-        duration_ms = int(duration * 1000)
-
-        actions = {
-            "actions": [
-                {
-                    "type": "pointer",
-                    "id": "finger1",
-                    "parameters": {"pointerType": "touch"},
-                    "actions": [
-                        {"type": "pointerMove", "duration": 0, "x": x / SCALE_FACTOR, "y": y / SCALE_FACTOR},
-                        {"type": "pointerDown", "button": 0},
-                        {"type": "pause", "duration": duration_ms},
-                        {"type": "pointerUp", "button": 0},
-                    ],
-                }
-            ]
-        }
-
-        requests.post(url, json=actions, timeout=int(duration + 10), verify=False)
+        batch = ActionBatch(SCALE_FACTOR).long_press(x, y, int(duration * 1000))
+        get_wda_session(wda_url, session_id).perform(batch)
 
         time.sleep(delay)
 
@@ -252,16 +170,12 @@ def swipe(
         delay: Delay in seconds after swipe.
     """
     try:
-        import requests
-
         if duration is None:
             # Calculate duration based on distance
             dist_sq = (start_x - end_x) ** 2 + (start_y - end_y) ** 2
             duration = dist_sq / 1000000  # Convert to seconds
             duration = max(0.3, min(duration, 2.0))  # Clamp between 0.3-2 seconds
 
-        url = _get_wda_session_url(wda_url, session_id, "wda/dragfromtoforduration")
-
         # WDA dragfromtoforduration API payload
         payload = {
             "fromX": start_x / SCALE_FACTOR,
@@ -271,7 +185,9 @@ def swipe(
             "duration": duration,
         }
 
-        requests.post(url, json=payload, timeout=int(duration + 10), verify=False)
+        get_wda_session(wda_url, session_id).post(
+            "wda/dragfromtoforduration", json=payload, timeout=int(duration + 10)
+        )
 
         time.sleep(delay)
 
@@ -299,10 +215,6 @@ def back(
         by swiping from the left edge of the screen.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "wda/dragfromtoforduration")
-
         # Swipe from left edge to simulate back gesture
         payload = {
             "fromX": 0,
@@ -312,7 +224,9 @@ def back(
             "duration": 0.3,
         }
 
-        requests.post(url, json=payload, timeout=10, verify=False)
+        get_wda_session(wda_url, session_id).post(
+            "wda/dragfromtoforduration", json=payload, timeout=10
+        )
 
         time.sleep(delay)
 
@@ -336,11 +250,9 @@ def home(
         delay: Delay in seconds after pressing home.
     """
     try:
-        import requests
-
         url = f"{wda_url.rstrip('/')}/wda/homescreen"
 
-        requests.post(url, timeout=10, verify=False)
+        get_wda_client(wda_url).post(url, timeout=10, verify=False)
 
         time.sleep(delay)
 
@@ -372,13 +284,9 @@ def launch_app(
         return False
 
     try:
-        import requests
-
         bundle_id = APP_PACKAGES[app_name]
-        url = _get_wda_session_url(wda_url, session_id, "wda/apps/launch")
-
-        response = requests.post(
-            url, json={"bundleId": bundle_id}, timeout=10, verify=False
+        response = get_wda_session(wda_url, session_id).post(
+            "wda/apps/launch", json={"bundleId": bundle_id}, timeout=10
         )
 
         time.sleep(delay)
@@ -406,11 +314,7 @@ def get_screen_size(
         Tuple of (width, height). Returns (375, 812) as default if unable to fetch.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "window/size")
-
-        response = requests.get(url, timeout=5, verify=False)
+        response = get_wda_session(wda_url, session_id).get("window/size", timeout=5)
 
         if response.status_code == 200:
             data = response.json()
@@ -444,11 +348,9 @@ def press_button(
         delay: Delay in seconds after pressing.
     """
     try:
-        import requests
-
         url = f"{wda_url.rstrip('/')}/wda/pressButton"
 
-        requests.post(url, json={"name": button_name}, timeout=10, verify=False)
+        get_wda_client(wda_url).post(url, json={"name": button_name}, timeout=10, verify=False)
 
         time.sleep(delay)
 
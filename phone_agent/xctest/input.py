@@ -2,25 +2,8 @@
 
 import time
 
-
-def _get_wda_session_url(wda_url: str, session_id: str | None, endpoint: str) -> str:
-    """
-    Get the correct WDA URL for a session endpoint.
-
-    Args:
-        wda_url: Base WDA URL.
-        session_id: Optional session ID.
-        endpoint: The endpoint path.
-
-    Returns:
-        Full URL for the endpoint.
-    """
-    base = wda_url.rstrip("/")
-    if session_id:
-        return f"{base}/session/{session_id}/{endpoint}"
-    else:
-        # Try to use WDA endpoints without session when possible
-        return f"{base}/{endpoint}"
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.session import get_wda_session
 
 
 def type_text(
@@ -43,13 +26,9 @@ def type_text(
         Use tap() to focus on the input field first.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "wda/keys")
-
         # Send text to WDA
-        response = requests.post(
-            url, json={"value": list(text), "frequency": frequency}, timeout=30, verify=False
+        response = get_wda_session(wda_url, session_id).post(
+            "wda/keys", json={"value": list(text), "frequency": frequency}, timeout=30
         )
 
         if response.status_code not in (200, 201):
@@ -77,12 +56,9 @@ def clear_text(
         The input field must be focused before calling this function.
     """
     try:
-        import requests
-
         # First, try to get the active element
-        url = _get_wda_session_url(wda_url, session_id, "element/active")
-
-        response = requests.get(url, timeout=10, verify=False)
+        session = get_wda_session(wda_url, session_id)
+        response = session.get("element/active", timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -90,8 +66,7 @@ def clear_text(
 
             if element_id:
                 # Clear the element
-                clear_url = _get_wda_session_url(wda_url, session_id, f"element/{element_id}/clear")
-                requests.post(clear_url, timeout=10, verify=False)
+                session.post(f"element/{element_id}/clear", timeout=10)
                 return
 
         # Fallback: send backspace commands
@@ -117,17 +92,12 @@ def _clear_with_backspace(
         max_backspaces: Maximum number of backspaces to send.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "wda/keys")
-
         # Send backspace character multiple times
         backspace_char = "\u0008"  # Backspace Unicode character
-        requests.post(
-            url,
+        get_wda_session(wda_url, session_id).post(
+            "wda/keys",
             json={"value": [backspace_char] * max_backspaces},
             timeout=10,
-            verify=False,
         )
 
     except Exception as e:
@@ -152,11 +122,9 @@ def send_keys(
         >>> send_keys(["\n"])  # Send enter key
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "wda/keys")
-
-        requests.post(url, json={"value": keys}, timeout=10, verify=False)
+        get_wda_session(wda_url, session_id).post(
+            "wda/keys", json={"value": keys}, timeout=10
+        )
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -193,11 +161,9 @@ def hide_keyboard(
         session_id: Optional WDA session ID.
     """
     try:
-        import requests
-
         url = f"{wda_url.rstrip('/')}/wda/keyboard/dismiss"
 
-        requests.post(url, timeout=10, verify=False)
+        get_wda_client(wda_url).post(url, timeout=10, verify=False)
 
     except ImportError:
         print("Error: requests library required. Install: pip install requests")
@@ -220,11 +186,9 @@ def is_keyboard_shown(
         True if keyboard is shown, False otherwise.
     """
     try:
-        import requests
-
-        url = _get_wda_session_url(wda_url, session_id, "wda/keyboard/shown")
-
-        response = requests.get(url, timeout=5, verify=False)
+        response = get_wda_session(wda_url, session_id).get(
+            "wda/keyboard/shown", timeout=5
+        )
 
         if response.status_code == 200:
             data = response.json()
@@ -254,11 +218,9 @@ def set_pasteboard(
         After setting pasteboard, you can simulate paste gesture.
     """
     try:
-        import requests
-
         url = f"{wda_url.rstrip('/')}/wda/setPasteboard"
 
-        requests.post(
+        get_wda_client(wda_url).post(
             url, json={"content": text, "contentType": "plaintext"}, timeout=10, verify=False
         )
 
@@ -281,11 +243,9 @@ def get_pasteboard(
         Pasteboard content or None if failed.
     """
     try:
-        import requests
-
         url = f"{wda_url.rstrip('/')}/wda/getPasteboard"
 
-        response = requests.post(url, timeout=10, verify=False)
+        response = get_wda_client(wda_url).post(url, timeout=10, verify=False)
 
         if response.status_code == 200:
             data = response.json()
@@ -0,0 +1,221 @@
+"""Background reader for the WebDriverAgent MJPEG screen stream."""
+
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator
+
+from phone_agent.imaging import get_image_size
+
+# WDA serves the stream on this port (mjpegServerPort capability)
+DEFAULT_MJPEG_PORT = 9100
+
+_JPEG_END = b"\xff\xd9"
+
+_streams: dict[str, "MJPEGStream"] = {}
+_streams_lock = threading.Lock()
+
+
+@dataclass
+class MJPEGFrame:
+    """One JPEG frame from the stream."""
+
+    data: bytes
+    timestamp: float  # time.time() when the frame was received
+    width: int
+    height: int
+
+
+class MJPEGStream:
+    """
+    Keep the latest frame of an MJPEG stream in memory.
+
+    A daemon thread reads the multipart stream and replaces the latest
+    frame as each JPEG arrives, so a screenshot is a memory read instead of
+    a server-side PNG encode, a base64 JSON payload and a full decode. The
+    thread reconnects after errors. While disconnected no frame is
+    returned, so callers fall back to their own capture path.
+
+    Args:
+        url: MJPEG stream URL, e.g. http://localhost:9100.
+        timeout: Socket timeout in seconds for connecting and reading.
+        reconnect_delay: Seconds to wait before reconnecting after an error.
+
+    Example:
+        >>> stream = MJPEGStream("http://localhost:9100").start()
+        >>> frame = stream.wait_for_frame(after=time.time(), timeout=2.0)
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0, reconnect_delay: float = 1.0):
+        self.url = url
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self._frame: MJPEGFrame | None = None
+        self._connected = False
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the stream is currently connected."""
+        return self._connected
+
+    def start(self) -> "MJPEGStream":
+        """Start the reader thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="mjpeg-stream", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the reader thread and drop the latest frame."""
+        self._stop.set()
+        with self._condition:
+            self._frame = None
+            self._condition.notify_all()
+
+    def latest(self) -> MJPEGFrame | None:
+        """
+        Get the latest frame.
+
+        Returns:
+            The newest frame, or None if the stream is not connected or has
+            not delivered a frame yet.
+        """
+        with self._condition:
+            return self._frame if self._connected else None
+
+    def wait_for_frame(
+        self, after: float | None = None, timeout: float = 1.0
+    ) -> MJPEGFrame | None:
+        """
+        Wait for a frame received after a point in time.
+
+        Args:
+            after: time.time() value the frame must be newer than. Defaults
+                to now, i.e. the next frame.
+            timeout: Maximum time to wait in seconds.
+
+        Returns:
+            The frame, or None if none arrived in time.
+        """
+        if after is None:
+            after = time.time()
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                frame = self._frame if self._connected else None
+                if frame is not None and frame.timestamp > after:
+                    return frame
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    return None
+                self._condition.wait(remaining)
+
+    def _run(self) -> None:
+        error = None
+        while not self._stop.is_set():
+            try:
+                with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+                    for data in iter_jpeg_frames(response):
+                        if self._stop.is_set():
+                            return
+                        self._publish(data)
+                        error = None
+            except Exception as e:
+                # Report each distinct failure once, not every reconnect
+                if str(e) != error:
+                    error = str(e)
+                    print(f"MJPEG stream {self.url} failed: {e}")
+            finally:
+                with self._condition:
+                    self._connected = False
+                    self._frame = None
+            self._stop.wait(self.reconnect_delay)
+
+    def _publish(self, data: bytes) -> None:
+        width, height = get_image_size(data)
+        frame = MJPEGFrame(data, time.time(), width, height)
+        with self._condition:
+            self._frame = frame
+            self._connected = True
+            self._condition.notify_all()
+
+
+def iter_jpeg_frames(stream: BinaryIO) -> Iterator[bytes]:
+    """
+    Split a multipart/x-mixed-replace body into JPEG frames.
+
+    Each part is read by its Content-Length header. Parts without one are
+    read up to the JPEG end-of-image marker.
+
+    Args:
+        stream: File-like object positioned at the start of the body.
+
+    Yields:
+        The JPEG bytes of each part.
+    """
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        if not line.startswith(b"--"):
+            continue
+
+        headers = {}
+        while True:
+            line = stream.readline()
+            if not line:
+                return
+            line = line.strip()
+            if not line:
+                break
+            name, _, value = line.partition(b":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = headers.get(b"content-length")
+        if length:
+            data = stream.read(int(length))
+            if len(data) < int(length):
+                return
+        else:
+            data = b""
+            while _JPEG_END not in data:
+                line = stream.readline()
+                if not line:
+                    return
+                data += line
+            data = data[: data.index(_JPEG_END) + len(_JPEG_END)]
+
+        if data:
+            yield data
+
+
+def get_mjpeg_stream(url: str) -> MJPEGStream:
+    """
+    Get the shared, running stream reader for an MJPEG URL.
+
+    Args:
+        url: MJPEG stream URL.
+
+    Returns:
+        The started MJPEGStream for that URL.
+    """
+    with _streams_lock:
+        stream = _streams.get(url)
+        if stream is None:
+            stream = _streams[url] = MJPEGStream(url)
+        return stream.start()
+
+
+def close_mjpeg_streams() -> None:
+    """Stop all shared stream readers."""
+    with _streams_lock:
+        for stream in _streams.values():
+            stream.stop()
+        _streams.clear()
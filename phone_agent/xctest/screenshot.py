@@ -10,6 +10,21 @@ from io import BytesIO
 
 from PIL import Image
 
+from phone_agent.imaging import (
+    get_base64_image_size,
+    get_black_png_base64,
+    get_image_mime_type,
+    get_image_size,
+)
+from phone_agent.xctest.client import get_wda_client
+from phone_agent.xctest.mjpeg import get_mjpeg_stream
+
+# Fallback image size until a capture succeeded (iPhone 14 Pro)
+DEFAULT_SCREEN_SIZE = (1179, 2556)
+
+# Size of the last successful capture per WDA URL, used for fallback images
+_screen_sizes: dict[str, tuple[int, int]] = {}
+
 
 @dataclass
 class Screenshot:
@@ -19,6 +34,8 @@ class Screenshot:
     width: int
     height: int
     is_sensitive: bool = False
+    mime_type: str = "image/png"
+    timestamp: float | None = None  # Receive time of an MJPEG stream frame
 
 
 def get_screenshot(
@@ -26,6 +43,7 @@ def get_screenshot(
     session_id: str | None = None,
     device_id: str | None = None,
     timeout: int = 10,
+    mjpeg_url: str | None = None,
 ) -> Screenshot:
     """
     Capture a screenshot from the connected iOS device.
@@ -35,26 +53,62 @@ def get_screenshot(
         session_id: Optional WDA session ID.
         device_id: Optional device UDID (for idevicescreenshot fallback).
         timeout: Timeout in seconds for screenshot operations.
+        mjpeg_url: Optional WDA MJPEG stream URL, e.g. http://localhost:9100.
 
     Returns:
         Screenshot object containing base64 data and dimensions.
 
     Note:
-        Tries WebDriverAgent first, falls back to idevicescreenshot if available.
-        If both fail, returns a black fallback image.
+        With mjpeg_url, returns the latest stream frame (JPEG) without a
+        request. Otherwise, or while the stream has no frame, tries the
+        WebDriverAgent screenshot endpoint, then idevicescreenshot if
+        available. If all fail, returns a black fallback image.
     """
+    screenshot = None
+    if mjpeg_url:
+        screenshot = _get_screenshot_mjpeg(mjpeg_url)
+
     # Try WebDriverAgent first (preferred method)
-    screenshot = _get_screenshot_wda(wda_url, session_id, timeout)
-    if screenshot:
-        return screenshot
+    if not screenshot:
+        screenshot = _get_screenshot_wda(wda_url, session_id, timeout)
 
     # Fallback to idevicescreenshot
-    screenshot = _get_screenshot_idevice(device_id, timeout)
+    if not screenshot:
+        screenshot = _get_screenshot_idevice(device_id, timeout)
+
     if screenshot:
+        _screen_sizes[wda_url.rstrip("/")] = (screenshot.width, screenshot.height)
         return screenshot
 
     # Return fallback black image
-    return _create_fallback_screenshot(is_sensitive=False)
+    return _create_fallback_screenshot(is_sensitive=False, wda_url=wda_url)
+
+
+def _get_screenshot_mjpeg(mjpeg_url: str) -> Screenshot | None:
+    """
+    Take the latest frame from the WDA MJPEG stream.
+
+    The stream reader is started on first use, so the first call usually
+    has no frame yet.
+
+    Args:
+        mjpeg_url: WDA MJPEG stream URL.
+
+    Returns:
+        Screenshot object or None if no frame is available.
+    """
+    frame = get_mjpeg_stream(mjpeg_url).latest()
+    if frame is None:
+        return None
+
+    return Screenshot(
+        base64_data=base64.b64encode(frame.data).decode("utf-8"),
+        width=frame.width,
+        height=frame.height,
+        is_sensitive=False,
+        mime_type="image/jpeg",
+        timestamp=frame.timestamp,
+    )
 
 
 def _get_screenshot_wda(
@@ -72,27 +126,28 @@ def _get_screenshot_wda(
         Screenshot object or None if failed.
     """
     try:
-        import requests
-
         url = f"{wda_url.rstrip('/')}/screenshot"
 
-        response = requests.get(url, timeout=timeout, verify=False)
+        response = get_wda_client(wda_url).get(url, timeout=timeout, verify=False)
 
         if response.status_code == 200:
             data = response.json()
             base64_data = data.get("value", "")
 
             if base64_data:
-                # Decode to get dimensions
-                img_data = base64.b64decode(base64_data)
-                img = Image.open(BytesIO(img_data))
-                width, height = img.size
+                # Read dimensions from the image header, no full decode needed
+                width, height = get_base64_image_size(base64_data)
+                mime_type = (
+                    get_image_mime_type(base64.b64decode(base64_data[:16]))
+                    or "image/png"
+                )
 
                 return Screenshot(
                     base64_data=base64_data,
                     width=width,
                     height=height,
                     is_sensitive=False,
+                    mime_type=mime_type,
                 )
 
     except ImportError:
@@ -131,19 +186,34 @@ def _get_screenshot_idevice(
         )
 
         if result.returncode == 0 and os.path.exists(temp_path):
-            # Read and encode image
-            img = Image.open(temp_path)
-            width, height = img.size
-
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+            with open(temp_path, "rb") as f:
+                data = f.read()
 
             # Cleanup
             os.remove(temp_path)
 
+            mime_type = get_image_mime_type(data)
+            if mime_type in ("image/png", "image/jpeg"):
+                # Pass the file through untouched
+                width, height = get_image_size(data)
+            else:
+                # Older iOS versions produce TIFF, convert it to PNG
+                img = Image.open(BytesIO(data))
+                width, height = img.size
+
+                buffered = BytesIO()
+                img.save(buffered, format="PNG")
+                data = buffered.getvalue()
+                mime_type = "image/png"
+
+            base64_data = base64.b64encode(data).decode("utf-8")
+
             return Screenshot(
-                base64_data=base64_data, width=width, height=height, is_sensitive=False
+                base64_data=base64_data,
+                width=width,
+                height=height,
+                is_sensitive=False,
+                mime_type=mime_type,
             )
 
     except FileNotFoundError:
@@ -156,28 +226,28 @@ def _get_screenshot_idevice(
     return None
 
 
-def _create_fallback_screenshot(is_sensitive: bool) -> Screenshot:
+def _create_fallback_screenshot(
+    is_sensitive: bool, wda_url: str | None = None
+) -> Screenshot:
     """
     Create a black fallback image when screenshot fails.
 
     Args:
         is_sensitive: Whether the failure was due to sensitive content.
+        wda_url: WebDriverAgent URL of the device. The image gets the size
+            of its last successful capture, so coordinates stay correct.
 
     Returns:
         Screenshot object with black image.
     """
-    # Default iPhone screen size (iPhone 14 Pro)
-    default_width, default_height = 1179, 2556
-
-    black_img = Image.new("RGB", (default_width, default_height), color="black")
-    buffered = BytesIO()
-    black_img.save(buffered, format="PNG")
-    base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    width, height = DEFAULT_SCREEN_SIZE
+    if wda_url:
+        width, height = _screen_sizes.get(wda_url.rstrip("/"), DEFAULT_SCREEN_SIZE)
 
     return Screenshot(
-        base64_data=base64_data,
-        width=default_width,
-        height=default_height,
+        base64_data=get_black_png_base64(width, height),
+        width=width,
+        height=height,
         is_sensitive=is_sensitive,
     )
 
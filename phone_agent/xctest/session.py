@@ -0,0 +1,256 @@
+"""WebDriverAgent session management and W3C action batching."""
+
+import threading
+from typing import Any
+
+from phone_agent.xctest.client import get_wda_client
+
+# WebDriver normalized key value of the Enter key, for /actions key sources
+ENTER_KEY = "\ue007"
+
+_sessions: dict[str, "WDASession"] = {}
+_sessions_lock = threading.Lock()
+
+
+class ActionBatch:
+    """
+    Sequence of W3C pointer and key actions sent in one /actions request.
+
+    The pointer and keyboard input sources advance in lockstep ticks, so
+    every action on one source is paired with a zero-length pause on the
+    other. That keeps the actions in the order they were added.
+
+    Args:
+        scale_factor: Divisor converting screenshot pixels to WDA points.
+
+    Example:
+        >>> batch = ActionBatch(scale_factor=3).tap(540, 300).type("hello")
+        >>> get_wda_session(wda_url).perform(batch.key(ENTER_KEY))
+    """
+
+    def __init__(self, scale_factor: float = 1):
+        self.scale_factor = scale_factor
+        self._pointer: list[dict[str, Any]] = []
+        self._keys: list[dict[str, Any]] = []
+
+    def tap(self, x: int, y: int, hold_ms: int = 100) -> "ActionBatch":
+        """Tap at (x, y) in screenshot pixels."""
+        return self.move(x, y).down().pause(hold_ms).up()
+
+    def double_tap(self, x: int, y: int, interval_ms: int = 100) -> "ActionBatch":
+        """Double tap at (x, y) in screenshot pixels."""
+        self.tap(x, y, hold_ms=interval_ms)
+        return self.pause(interval_ms).down().pause(interval_ms).up()
+
+    def long_press(self, x: int, y: int, duration_ms: int = 3000) -> "ActionBatch":
+        """Press and hold at (x, y) in screenshot pixels."""
+        return self.tap(x, y, hold_ms=duration_ms)
+
+    def move(self, x: int, y: int, duration_ms: int = 0) -> "ActionBatch":
+        """Move the finger to (x, y) in screenshot pixels."""
+        return self._add_pointer(
+            {
+                "type": "pointerMove",
+                "duration": duration_ms,
+                "x": x / self.scale_factor,
+                "y": y / self.scale_factor,
+            }
+        )
+
+    def down(self) -> "ActionBatch":
+        """Put the finger down."""
+        return self._add_pointer({"type": "pointerDown", "button": 0})
+
+    def up(self) -> "ActionBatch":
+        """Lift the finger."""
+        return self._add_pointer({"type": "pointerUp", "button": 0})
+
+    def pause(self, duration_ms: int) -> "ActionBatch":
+        """Wait before the next action."""
+        self._pointer.append({"type": "pause", "duration": duration_ms})
+        self._keys.append({"type": "pause", "duration": 0})
+        return self
+
+    def key(self, value: str) -> "ActionBatch":
+        """Press and release a single key, e.g. ENTER_KEY."""
+        self._add_key({"type": "keyDown", "value": value})
+        return self._add_key({"type": "keyUp", "value": value})
+
+    def type(self, text: str) -> "ActionBatch":
+        """Type text into the focused element, one key per character."""
+        for char in text:
+            self.key(ENTER_KEY if char == "\n" else char)
+        return self
+
+    def payload(self) -> dict[str, Any]:
+        """Build the /actions request body."""
+        sources = []
+        if any(action["type"] != "pause" for action in self._pointer):
+            sources.append(
+                {
+                    "type": "pointer",
+                    "id": "finger1",
+                    "parameters": {"pointerType": "touch"},
+                    "actions": self._pointer,
+                }
+            )
+        if any(action["type"] != "pause" for action in self._keys):
+            sources.append({"type": "key", "id": "keyboard", "actions": self._keys})
+        return {"actions": sources}
+
+    def duration(self) -> float:
+        """Total time the batch takes to run on the device, in seconds."""
+        return sum(action.get("duration", 0) for action in self._pointer) / 1000
+
+    def _add_pointer(self, action: dict[str, Any]) -> "ActionBatch":
+        self._pointer.append(action)
+        self._keys.append({"type": "pause", "duration": 0})
+        return self
+
+    def _add_key(self, action: dict[str, Any]) -> "ActionBatch":
+        self._keys.append(action)
+        self._pointer.append({"type": "pause", "duration": 0})
+        return self
+
+
+class WDASession:
+    """
+    One reusable WebDriverAgent session.
+
+    The session is created on first use and kept for every later request.
+    It is not checked up front: when WDA answers a request with "invalid
+    session id" (e.g. after WDA restarted), a new session is created and
+    the request is retried once. Use get_wda_session() to share one
+    session per WDA URL.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        session_id: Optional existing session ID to start with.
+    """
+
+    def __init__(self, wda_url: str, session_id: str | None = None):
+        self.wda_url = wda_url.rstrip("/")
+        self._session_id = session_id
+        self._expired: set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def session_id(self) -> str:
+        """The current session ID, creating a session if there is none."""
+        with self._lock:
+            if self._session_id is None:
+                self._session_id = self._create()
+            return self._session_id
+
+    def adopt(self, session_id: str) -> None:
+        """
+        Use a session created elsewhere, unless it is known to be expired.
+
+        Args:
+            session_id: WDA session ID.
+        """
+        with self._lock:
+            if session_id not in self._expired:
+                self._session_id = session_id
+
+    def url(self, endpoint: str) -> str:
+        """Full URL of an endpoint within the current session."""
+        return f"{self.wda_url}/session/{self.session_id}/{endpoint.lstrip('/')}"
+
+    def get(self, endpoint: str, **kwargs: Any):
+        """Send a GET request to a session endpoint."""
+        return self.request("get", endpoint, **kwargs)
+
+    def post(self, endpoint: str, **kwargs: Any):
+        """Send a POST request to a session endpoint."""
+        return self.request("post", endpoint, **kwargs)
+
+    def request(self, method: str, endpoint: str, **kwargs: Any):
+        """
+        Send a request to a session endpoint, recreating an expired session.
+
+        Args:
+            method: HTTP method name, e.g. "post".
+            endpoint: Endpoint path relative to the session.
+            **kwargs: Passed on to the HTTP client.
+
+        Returns:
+            The HTTP response.
+        """
+        client = get_wda_client(self.wda_url)
+        session_id = self.session_id
+        response = getattr(client, method)(
+            f"{self.wda_url}/session/{session_id}/{endpoint.lstrip('/')}", **kwargs
+        )
+        if not _is_invalid_session(response):
+            return response
+
+        self._expire(session_id)
+        return getattr(client, method)(self.url(endpoint), **kwargs)
+
+    def perform(self, batch: ActionBatch, timeout: float | None = None):
+        """
+        Run an action batch in a single /actions request.
+
+        Args:
+            batch: The actions to run.
+            timeout: Request timeout in seconds. Defaults to the batch
+                duration plus 10 seconds.
+
+        Returns:
+            The HTTP response.
+        """
+        if timeout is None:
+            timeout = batch.duration() + 10
+        return self.post("actions", json=batch.payload(), timeout=timeout)
+
+    def _expire(self, session_id: str) -> None:
+        with self._lock:
+            self._expired.add(session_id)
+            if self._session_id == session_id:
+                self._session_id = None
+
+    def _create(self) -> str:
+        response = get_wda_client(self.wda_url).post(
+            f"{self.wda_url}/session", json={"capabilities": {}}, timeout=30
+        )
+        data = response.json()
+        session_id = data.get("sessionId") or (data.get("value") or {}).get("sessionId")
+        if response.status_code not in (200, 201) or not session_id:
+            raise RuntimeError(f"Failed to start WDA session: {response.text}")
+        return session_id
+
+
+def _is_invalid_session(response) -> bool:
+    """Check whether WDA rejected a request because the session is gone."""
+    if response.status_code != 404:
+        return False
+    try:
+        value = response.json().get("value")
+    except ValueError:
+        return False
+    return isinstance(value, dict) and value.get("error") == "invalid session id"
+
+
+def get_wda_session(
+    wda_url: str = "http://localhost:8100", session_id: str | None = None
+) -> WDASession:
+    """
+    Get the shared session for a WDA URL.
+
+    Args:
+        wda_url: WebDriverAgent URL.
+        session_id: Optional session ID from the caller. It is adopted
+            unless it already expired and was replaced.
+
+    Returns:
+        The WDASession for that URL.
+    """
+    key = wda_url.rstrip("/")
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = WDASession(key, session_id)
+    if session_id and session_id != session._session_id:
+        session.adopt(session_id)
+    return session
@@ -0,0 +1,85 @@
+import argparse
+import statistics
+import time
+
+from phone_agent.adb import (
+    ADBTransport,
+    close_shells,
+    run_shell_command,
+    set_adb_transport,
+)
+
+
+def benchmark_transport(
+    transport: ADBTransport, device_id: str | None, command: list[str], iterations: int
+) -> list[float]:
+    """Time a shell command repeatedly through one transport."""
+    set_adb_transport(transport)
+    run_shell_command(command, device_id)  # Warm up (starts the persistent shell)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run_shell_command(command, device_id)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare per-command latency of ADB shell transports",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Usage examples:
+  python scripts/benchmark_adb_shell.py
+  python scripts/benchmark_adb_shell.py --device-id emulator-5554 --iterations 100
+  python scripts/benchmark_adb_shell.py --command "input keyevent 0"
+        """,
+    )
+
+    parser.add_argument(
+        "--device-id", type=str, default=None, help="ADB device ID (default: any)"
+    )
+
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=50,
+        help="Commands per transport (default: 50)",
+    )
+
+    parser.add_argument(
+        "--command",
+        type=str,
+        default="true",
+        help='Shell command to run (default: "true")',
+    )
+
+    args = parser.parse_args()
+    command = args.command.split()
+
+    results = {}
+    for transport in ADBTransport:
+        results[transport] = benchmark_transport(
+            transport, args.device_id, command, args.iterations
+        )
+    close_shells()
+
+    print("=" * 60)
+    print(f"Command: {args.command} ({args.iterations} iterations)")
+    print("-" * 60)
+    print(f"{'transport':<12} {'mean':>10} {'median':>10} {'p90':>10}")
+    for transport, timings in results.items():
+        timings.sort()
+        p90 = timings[min(len(timings) - 1, int(len(timings) * 0.9))]
+        print(
+            f"{transport.value:<12} {statistics.mean(timings) * 1000:>8.1f}ms "
+            f"{statistics.median(timings) * 1000:>8.1f}ms {p90 * 1000:>8.1f}ms"
+        )
+
+    baseline = statistics.median(results[ADBTransport.SUBPROCESS])
+    for transport, timings in results.items():
+        if transport != ADBTransport.SUBPROCESS:
+            saved = baseline - statistics.median(timings)
+            print(f"Saved per command with {transport.value}: {saved * 1000:.1f}ms")
+    print("=" * 60)
@@ -0,0 +1,126 @@
+"""
+Benchmark ADB screenshot capture modes on connected devices.
+
+Compares `screencap -p` over exec-out, `screencap -p` via a device file and
+`adb pull`, the screenrecord stream (needs PyAV), and raw `screencap`
+framebuffers encoded on the host as PNG, JPEG or WebP. For each device it
+prints mean, median and p90 latency, payload size and resolution.
+
+Usage:
+    python scripts/benchmark_screenshot.py [--device-id ID] [--iterations N]
+        [--variants exec-out pull stream raw-png raw-jpeg raw-webp]
+"""
+
+import argparse
+import base64
+import statistics
+import time
+
+from phone_agent.adb import ADBConnection
+from phone_agent.adb.screenshot import get_screenshot, get_screenshot_raw
+
+# Capture variants by label; raw variants differ only in host-side encoding
+CAPTURE_VARIANTS = {
+    "exec-out": lambda device_id: get_screenshot(device_id, mode="exec-out"),
+    "pull": lambda device_id: get_screenshot(device_id, mode="pull"),
+    "stream": lambda device_id: get_screenshot(device_id, mode="stream"),
+    "raw-png": lambda device_id: get_screenshot_raw(device_id, 10, "PNG"),
+    "raw-jpeg": lambda device_id: get_screenshot_raw(device_id, 10, "JPEG"),
+    "raw-webp": lambda device_id: get_screenshot_raw(device_id, 10, "WEBP"),
+}
+
+
+def benchmark_device(device_id: str, variants: list[str], iterations: int) -> dict:
+    """Time each capture variant on one device."""
+    results = {}
+    for variant in variants:
+        capture = CAPTURE_VARIANTS[variant]
+        capture(device_id)  # Warm up
+
+        timings = []
+        payload_size = 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            screenshot = capture(device_id)
+            timings.append(time.perf_counter() - start)
+            payload_size = len(base64.b64decode(screenshot.base64_data))
+
+        timings.sort()
+        results[variant] = {
+            "mean": statistics.mean(timings),
+            "median": statistics.median(timings),
+            "p90": timings[min(len(timings) - 1, int(len(timings) * 0.9))],
+            "size_kb": payload_size / 1024,
+            "resolution": f"{screenshot.width}x{screenshot.height}",
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare ADB screenshot capture modes per device model",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Usage examples:
+  python scripts/benchmark_screenshot.py
+  python scripts/benchmark_screenshot.py --device-id emulator-5554 --iterations 20
+  python scripts/benchmark_screenshot.py --variants exec-out raw-png raw-jpeg
+        """,
+    )
+
+    parser.add_argument(
+        "--device-id",
+        type=str,
+        action="append",
+        help="Device to benchmark (repeatable, default: all connected devices)",
+    )
+
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=10,
+        help="Captures per variant (default: 10)",
+    )
+
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=list(CAPTURE_VARIANTS),
+        default=list(CAPTURE_VARIANTS),
+        help="Capture variants to compare (default: all)",
+    )
+
+    args = parser.parse_args()
+
+    devices = [d for d in ADBConnection().list_devices() if d.status == "device"]
+    if args.device_id:
+        devices = [d for d in devices if d.device_id in args.device_id]
+
+    if not devices:
+        print("No devices available for benchmarking.")
+        raise SystemExit(1)
+
+    for device in devices:
+        model = device.model or "unknown model"
+        print("=" * 72)
+        print(f"{model} ({device.device_id})")
+        print("-" * 72)
+        print(
+            f"{'variant':<10} {'mean':>9} {'median':>9} {'p90':>9} "
+            f"{'size':>10} {'resolution':>12}"
+        )
+
+        results = benchmark_device(device.device_id, args.variants, args.iterations)
+        baseline = results.get("exec-out", {}).get("median")
+        for variant, stats in results.items():
+            speedup = (
+                f"  x{baseline / stats['median']:.2f}"
+                if baseline and stats["median"]
+                else ""
+            )
+            print(
+                f"{variant:<10} {stats['mean'] * 1000:>7.0f}ms "
+                f"{stats['median'] * 1000:>7.0f}ms {stats['p90'] * 1000:>7.0f}ms "
+                f"{stats['size_kb']:>8.0f}KB {stats['resolution']:>12}{speedup}"
+            )
+    print("=" * 72)
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+
+from phone_agent.agent import AgentConfig
+from phone_agent.device_factory import DeviceFactory, DeviceType
+from phone_agent.fleet import FleetDevice, FleetRunner, TaskRecord
+from phone_agent.model import ModelConfig
+
+
+def parse_device(value: str) -> FleetDevice:
+    """Parse "serial" or "type:serial" (type is adb or hdc)."""
+    device_type, sep, device_id = value.partition(":")
+    if sep and device_type in ("adb", "hdc"):
+        return FleetDevice(device_id, DeviceType(device_type))
+    return FleetDevice(value)
+
+
+def discover_devices(device_type: DeviceType) -> list[FleetDevice]:
+    """List connected, ready devices of one type."""
+    return [
+        FleetDevice(d.device_id, device_type)
+        for d in DeviceFactory(device_type).list_devices()
+        if d.status == "device"
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a queue of tasks across many devices",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Usage examples:
+  python scripts/run_fleet.py --tasks tasks.txt
+  python scripts/run_fleet.py --tasks tasks.txt --device emulator-5554 --device hdc:FMR0223
+  python scripts/run_fleet.py --tasks tasks.txt --max-concurrent-requests 2 --output results.jsonl
+        """,
+    )
+
+    parser.add_argument(
+        "--tasks",
+        type=str,
+        required=True,
+        help="File with one task per line",
+    )
+
+    parser.add_argument(
+        "--device",
+        type=str,
+        action="append",
+        help="Device as serial or type:serial (repeatable, default: all ADB devices)",
+    )
+
+    parser.add_argument(
+        "--base-url",
+        type=str,
+        default=os.getenv("PHONE_AGENT_BASE_URL", "http://localhost:8000/v1"),
+        help="Model API base URL",
+    )
+
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=os.getenv("PHONE_AGENT_MODEL", "autoglm-phone-9b"),
+        help="Model name",
+    )
+
+    parser.add_argument(
+        "--apikey",
+        type=str,
+        default=os.getenv("PHONE_AGENT_API_KEY", "EMPTY"),
+        help="API key for model authentication",
+    )
+
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=int(os.getenv("PHONE_AGENT_MAX_STEPS", "100")),
+        help="Maximum steps per task",
+    )
+
+    parser.add_argument(
+        "--max-concurrent-requests",
+        type=int,
+        default=4,
+        help="Maximum simultaneous model requests across devices (default: 4)",
+    )
+
+    parser.add_argument(
+        "--lang",
+        type=str,
+        choices=["cn", "en"],
+        default=os.getenv("PHONE_AGENT_LANG", "cn"),
+        help="Language for system prompt (default: cn)",
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Write result records to this JSONL file",
+    )
+
+    args = parser.parse_args()
+
+    with open(args.tasks, encoding="utf-8") as f:
+        tasks = [line.strip() for line in f if line.strip()]
+
+    if args.device:
+        devices = [parse_device(value) for value in args.device]
+    else:
+        devices = discover_devices(DeviceType.ADB)
+
+    if not devices:
+        print("No devices available.")
+        raise SystemExit(1)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+
+    def report(record: TaskRecord) -> None:
+        status = "OK" if record.success else "FAILED"
+        print(
+            f"[{record.device_id}] {status} {record.task!r} "
+            f"({record.steps} steps, {record.duration:.1f}s): "
+            f"{record.error or record.message}"
+        )
+        if output:
+            output.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+            output.flush()
+
+    runner = FleetRunner(
+        devices,
+        ModelConfig(
+            base_url=args.base_url,
+            model_name=args.model,
+            api_key=args.apikey,
+            lang=args.lang,
+        ),
+        AgentConfig(max_steps=args.max_steps, lang=args.lang, verbose=False),
+        max_concurrent_requests=args.max_concurrent_requests,
+        on_result=report,
+    )
+
+    print(f"Running {len(tasks)} tasks on {len(devices)} devices...")
+    records = runner.run(tasks)
+    succeeded = sum(record.success for record in records)
+    print(f"Done: {succeeded}/{len(records)} tasks succeeded")
+
+    if output:
+        output.close()
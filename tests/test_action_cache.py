@@ -0,0 +1,59 @@
+"""Tests for the observation-keyed action cache."""
+
+import base64
+import json
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from phone_agent import action_cache
+from phone_agent.action_cache import ActionCache, dhash
+
+ACTION = {"_metadata": "do", "action": "Tap", "element": [500, 300]}
+ANSWER = 'do(action="Tap", element=[500, 300])'
+
+
+def _screenshot(mirrored: bool = False) -> str:
+    img = Image.new("RGB", (270, 600), "white")
+    draw = ImageDraw.Draw(img)
+    for i in range(9):
+        draw.rectangle([i * 30, 0, i * 30 + 30, 600], fill=(i * 28,) * 3)
+    if mirrored:
+        img = img.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def test_lookup_matches_stored_hash():
+    cache = ActionCache()
+    screen_hash = dhash(_screenshot())
+    assert cache.lookup("task", 1, "Home", screen_hash) is None
+
+    cache.store("task", 1, "Home", screen_hash, ACTION, ANSWER)
+    # One answer is not confirmed yet
+    assert cache.lookup("task", 1, "Home", screen_hash) is None
+
+    cache.store("task", 1, "Home", screen_hash, ACTION, ANSWER)
+    entry = cache.lookup("task", 1, "Home", screen_hash)
+    assert entry is not None and entry.action == ACTION
+    assert cache.lookup("task", 2, "Home", screen_hash) is None
+    assert cache.lookup("task", 1, "Home", dhash(_screenshot(mirrored=True))) is None
+
+
+def test_stores_are_written_on_flush(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = ActionCache(str(path))
+    cache.store("task", 1, "Home", dhash(_screenshot()), ACTION, ANSWER)
+    assert not path.exists()
+
+    cache.flush()
+    assert [entry["answer"] for entry in json.loads(path.read_text())] == [ANSWER]
+    assert ActionCache(str(path)).stats()["entries"] == 1
+
+
+def test_store_writes_after_save_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(action_cache, "SAVE_INTERVAL", 0)
+    path = tmp_path / "cache.json"
+    ActionCache(str(path)).store("task", 1, "Home", 0, ACTION, ANSWER)
+    assert len(json.loads(path.read_text())) == 1
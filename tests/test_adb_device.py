@@ -0,0 +1,74 @@
+"""Tests for the Android foreground app probes."""
+
+import subprocess
+
+import pytest
+
+from phone_agent.adb import device
+
+FOCUS = "  mCurrentFocus=Window{1a2b u0 com.android.settings/.Settings}\n"
+
+
+@pytest.fixture
+def shell(monkeypatch):
+    """Fake shell: the activities probe is silent, the window probes answer."""
+    calls = []
+
+    def run_shell_command(command, device_id=None):
+        calls.append(command[:3])
+        stdout = FOCUS if command[1] == "window" else ""
+        return subprocess.CompletedProcess(command, 0, stdout=stdout, stderr="")
+
+    monkeypatch.setattr(device, "run_shell_command", run_shell_command)
+    monkeypatch.setattr(device, "_current_apps", {})
+    monkeypatch.setattr(device, "_first_probe", {})
+    return calls
+
+
+def test_silent_probe_is_skipped_then_retried(shell, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(device.time, "monotonic", lambda: now[0])
+
+    device.get_current_app("emulator-5554")
+    assert shell == [
+        ["dumpsys", "activity", "activities"],
+        ["dumpsys", "window", "displays"],
+    ]
+
+    shell.clear()
+    device.invalidate_current_app("emulator-5554")
+    device.get_current_app("emulator-5554")
+    assert shell == [["dumpsys", "window", "displays"]]
+
+    shell.clear()
+    device.invalidate_current_app("emulator-5554")
+    now[0] += device.PROBE_RETRY_INTERVAL
+    device.get_current_app("emulator-5554")
+    assert shell[0] == ["dumpsys", "activity", "activities"]
+
+
+def test_current_app_is_cached_until_invalidated(shell):
+    first = device.get_current_app()
+    assert device.get_current_app() == first
+    assert len(shell) == 2
+
+    device.invalidate_current_app()
+    device.get_current_app()
+    assert len(shell) == 3
+
+
+def test_system_dialog_focus_falls_through_to_focused_app(monkeypatch):
+    output = (
+        "  mCurrentFocus=Window{3c4d u0 com.android.systemui/"
+        "com.android.systemui.media.MediaProjectionPermissionActivity}\n"
+        "  mFocusedApp=ActivityRecord{5e6f u0 com.tencent.mm/.ui.LauncherUI t12}\n"
+    )
+
+    def run_shell_command(command, device_id=None):
+        stdout = output if command[1] == "window" else ""
+        return subprocess.CompletedProcess(command, 0, stdout=stdout, stderr="")
+
+    monkeypatch.setattr(device, "run_shell_command", run_shell_command)
+    monkeypatch.setattr(device, "_current_apps", {})
+    monkeypatch.setattr(device, "_first_probe", {})
+    assert device.get_current_app() == "微信"
@@ -0,0 +1,220 @@
+"""Wire protocol tests for ADBServerClient against a fake ADB server."""
+
+import socket
+import struct
+import threading
+
+import pytest
+
+from phone_agent.adb.protocol import ADBProtocolError, ADBServerClient
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return bytes(data)
+
+
+def _read_request(conn: socket.socket) -> str:
+    length = int(_recv_exact(conn, 4), 16)
+    return _recv_exact(conn, length).decode("utf-8")
+
+
+def _okay(conn: socket.socket, payload: bytes | None = None) -> None:
+    reply = b"OKAY"
+    if payload is not None:
+        reply += f"{len(payload):04x}".encode("ascii") + payload
+    conn.sendall(reply)
+
+
+def _fail(conn: socket.socket, message: str) -> None:
+    payload = message.encode("utf-8")
+    conn.sendall(b"FAIL" + f"{len(payload):04x}".encode("ascii") + payload)
+
+
+class FakeADBServer:
+    """
+    Minimal ADB server speaking the host, shell, exec and sync services.
+
+    Every request is recorded in `requests`, sync packets as "SYNC <id> <arg>".
+    """
+
+    def __init__(self, features: str = "shell_v2,cmd"):
+        self.features = features
+        self.files: dict[str, bytes] = {"/sdcard/hello.txt": b"hello world"}
+        self.requests: list[str] = []
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self) -> None:
+        self._server.close()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        with conn:
+            try:
+                self._handle(conn)
+            except (EOFError, OSError):
+                pass
+
+    def _handle(self, conn: socket.socket) -> None:
+        request = _read_request(conn)
+        self.requests.append(request)
+
+        if request == "host:version":
+            _okay(conn, b"0029")
+            return
+        if request == "host:devices":
+            _okay(conn, b"emulator-5554\tdevice\nR58M\toffline\n")
+            return
+        if request in ("host:features", "host-serial:emulator-5554:features"):
+            _okay(conn, self.features.encode("ascii"))
+            return
+        if request == "host:transport:missing":
+            _fail(conn, "device 'missing' not found")
+            return
+        if request not in ("host:transport-any", "host:transport:emulator-5554"):
+            _fail(conn, f"unknown request {request}")
+            return
+
+        _okay(conn)
+        service = _read_request(conn)
+        self.requests.append(service)
+
+        if service.startswith("shell,v2,raw:"):
+            _okay(conn)
+            command = service.partition(":")[2]
+            conn.sendall(struct.pack("<BI", 1, 4) + b"out\n")
+            conn.sendall(struct.pack("<BI", 2, 4) + b"err\n")
+            conn.sendall(struct.pack("<BI", 3, 1) + bytes([len(command) % 256]))
+        elif service.startswith("shell:"):
+            _okay(conn)
+            conn.sendall(b"legacy output\n")
+        elif service.startswith("exec:"):
+            _okay(conn)
+            conn.sendall(bytes(range(256)) * 1024)
+        elif service == "sync:":
+            _okay(conn)
+            self._sync(conn)
+        else:
+            _fail(conn, f"unknown service {service}")
+
+    def _sync(self, conn: socket.socket) -> None:
+        while True:
+            packet_id, length = struct.unpack("<4sI", _recv_exact(conn, 8))
+            if packet_id == b"QUIT":
+                self.requests.append("SYNC QUIT")
+                return
+            argument = _recv_exact(conn, length).decode("utf-8")
+            self.requests.append(f"SYNC {packet_id.decode()} {argument}")
+
+            if packet_id == b"RECV":
+                data = self.files.get(argument)
+                if data is None:
+                    message = b"No such file or directory"
+                    conn.sendall(struct.pack("<4sI", b"FAIL", len(message)) + message)
+                    continue
+                for offset in range(0, len(data), 5):
+                    chunk = data[offset : offset + 5]
+                    conn.sendall(struct.pack("<4sI", b"DATA", len(chunk)) + chunk)
+                conn.sendall(struct.pack("<4sI", b"DONE", 0))
+            elif packet_id == b"SEND":
+                path = argument.rpartition(",")[0]
+                data = bytearray()
+                while True:
+                    chunk_id, chunk_length = struct.unpack("<4sI", _recv_exact(conn, 8))
+                    if chunk_id == b"DONE":
+                        break
+                    data += _recv_exact(conn, chunk_length)
+                self.files[path] = bytes(data)
+                conn.sendall(struct.pack("<4sI", b"OKAY", 0))
+
+
+@pytest.fixture
+def server():
+    server = FakeADBServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(server):
+    client = ADBServerClient(port=server.port)
+    yield client
+    client.close()
+
+
+def test_host_queries(client):
+    assert client.version() == 0x29
+    assert client.devices() == [("emulator-5554", "device"), ("R58M", "offline")]
+    assert client.features() == {"shell_v2", "cmd"}
+
+
+def test_features_are_cached(client, server):
+    client.features("emulator-5554")
+    client.features("emulator-5554")
+    assert server.requests.count("host-serial:emulator-5554:features") == 1
+
+
+def test_shell_v2_splits_streams_and_reports_exit_code(client, server):
+    returncode, stdout, stderr = client.shell("emulator-5554", "echo hi")
+    assert (returncode, stdout, stderr) == (len("echo hi"), "out\n", "err\n")
+    assert "host:transport:emulator-5554" in server.requests
+    assert "shell,v2,raw:echo hi" in server.requests
+
+
+def test_shell_falls_back_to_legacy_service(server):
+    server.features = "cmd"
+    client = ADBServerClient(port=server.port)
+    assert client.shell(None, "echo hi") == (0, "legacy output\n", "")
+    assert "host:transport-any" in server.requests
+    assert "shell:echo hi" in server.requests
+
+
+def test_exec_out_returns_binary_output(client):
+    assert client.exec_out(None, "screencap -p") == bytes(range(256)) * 1024
+
+
+def test_server_failure_raises(client):
+    with pytest.raises(ADBProtocolError, match="device 'missing' not found"):
+        client.exec_out("missing", "true")
+
+
+def test_pull_and_push_reuse_one_sync_connection(client, server):
+    assert client.pull(None, "/sdcard/hello.txt") == b"hello world"
+
+    data = bytes(range(256)) * 600  # spans several DATA packets
+    client.push(None, data, "/sdcard/out.bin", mode=0o600)
+    assert server.files["/sdcard/out.bin"] == data
+    assert f"SYNC SEND /sdcard/out.bin,{0o100600}" in server.requests
+
+    assert server.requests.count("sync:") == 1
+
+
+def test_pull_failure_reconnects_sync(client, server):
+    with pytest.raises(ADBProtocolError, match="No such file"):
+        client.pull(None, "/sdcard/missing.txt")
+    assert client.pull(None, "/sdcard/hello.txt") == b"hello world"
+    assert server.requests.count("sync:") == 2
+
+
+def test_close_quits_sync_connection(client, server):
+    client.pull(None, "/sdcard/hello.txt")
+    client.close()
+    for _ in range(100):
+        if "SYNC QUIT" in server.requests:
+            break
+        threading.Event().wait(0.01)
+    assert "SYNC QUIT" in server.requests
@@ -0,0 +1,42 @@
+"""Tests for decoding raw `screencap` framebuffers."""
+
+import struct
+import sys
+from io import BytesIO
+
+import pytest
+
+from phone_agent.adb.screenshot import decode_raw_framebuffer
+
+WIDTH, HEIGHT = 3, 2
+
+# Pixel format, bytes of one (10, 20, 30) pixel with full alpha
+FORMATS = [
+    (1, bytes([10, 20, 30, 255])),  # RGBA_8888
+    (2, bytes([10, 20, 30, 0])),  # RGBX_8888
+    (5, bytes([30, 20, 10, 255])),  # BGRA_8888
+]
+
+
+def _framebuffer(pixel_format: int, pixel: bytes) -> bytes:
+    header = struct.pack("<IIII", WIDTH, HEIGHT, pixel_format, 0)
+    return header + pixel * (WIDTH * HEIGHT)
+
+
+@pytest.mark.parametrize("without_numpy", [False, True])
+@pytest.mark.parametrize("pixel_format, pixel", FORMATS)
+def test_decodes_to_rgb(pixel_format, pixel, without_numpy, monkeypatch):
+    if without_numpy:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+
+    img = decode_raw_framebuffer(_framebuffer(pixel_format, pixel))
+    assert img.mode == "RGB"
+    assert img.size == (WIDTH, HEIGHT)
+    assert img.getpixel((WIDTH - 1, HEIGHT - 1)) == (10, 20, 30)
+    img.save(BytesIO(), format="JPEG")
+
+
+def test_rgb_565_requires_numpy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    with pytest.raises(ValueError, match="numpy"):
+        decode_raw_framebuffer(_framebuffer(4, bytes(2)))
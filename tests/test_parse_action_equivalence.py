@@ -0,0 +1,225 @@
+"""Differential tests of parse_action against the previous ast-based parser."""
+
+import ast
+import json
+import random
+from typing import Any
+
+import pytest
+
+from phone_agent.actions.handler import parse_action
+
+
+def reference_parse_action(response: str) -> dict[str, Any]:
+    """The ast-based parse_action this parser replaced, kept as the oracle."""
+    try:
+        response = response.strip()
+        if response.startswith('do(action="Type"') or response.startswith(
+            'do(action="Type_Name"'
+        ):
+            text = response.split("text=", 1)[1][1:-2]
+            action = {"_metadata": "do", "action": "Type", "text": text}
+            return action
+        elif response.startswith("do"):
+            try:
+                response = response.replace("\n", "\\n")
+                response = response.replace("\r", "\\r")
+                response = response.replace("\t", "\\t")
+
+                tree = ast.parse(response, mode="eval")
+                if not isinstance(tree.body, ast.Call):
+                    raise ValueError("Expected a function call")
+
+                call = tree.body
+                action = {"_metadata": "do"}
+                for keyword in call.keywords:
+                    key = keyword.arg
+                    value = ast.literal_eval(keyword.value)
+                    action[key] = value
+
+                return action
+            except (SyntaxError, ValueError) as e:
+                raise ValueError(f"Failed to parse do() action: {e}")
+
+        elif response.startswith("finish"):
+            action = {
+                "_metadata": "finish",
+                "message": response.replace("finish(message=", "")[1:-2],
+            }
+        else:
+            raise ValueError(f"Failed to parse action: {response}")
+        return action
+    except Exception as e:
+        raise ValueError(f"Failed to parse action: {e}")
+
+
+# Free text alphabet: quotes, brackets, escapes, whitespace, CJK and emoji.
+# "=" is left out: free text containing `", key=` reads as the next argument
+# in the new parser, while the old one split Type text at the first "text=".
+_FREE_TEXT_CHARS = list("abcxyz 019,.:;!?-_/()[]{}'\"\\\n\t") + list(
+    "搜索美食攻略，。：“”「」😀é"
+)
+_VALUE_CHARS = _FREE_TEXT_CHARS + ["="]
+_ACTIONS = ["Tap", "Swipe", "Launch", "Back", "Home", "Long Press", "Wait"]
+
+
+def _random_text(rng: random.Random, chars: list[str], max_length: int) -> str:
+    return "".join(rng.choice(chars) for _ in range(rng.randint(0, max_length)))
+
+
+def _random_value(rng: random.Random, depth: int = 0) -> Any:
+    kind = rng.choice(["int", "float", "str", "bool", "list", "tuple", "dict"])
+    if depth >= 2 and kind in ("list", "tuple", "dict"):
+        kind = "int"
+    if kind == "int":
+        return rng.randint(-1000, 1000)
+    if kind == "float":
+        return round(rng.uniform(-10, 10), 3)
+    if kind == "str":
+        return _random_text(rng, _VALUE_CHARS, 12)
+    if kind == "bool":
+        return rng.choice([True, False, None])
+    if kind == "list":
+        return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    if kind == "tuple":
+        return tuple(_random_value(rng, depth + 1) for _ in range(rng.randint(2, 3)))
+    return {
+        _random_text(rng, _VALUE_CHARS, 5): _random_value(rng, depth + 1)
+        for _ in range(rng.randint(0, 2))
+    }
+
+
+def _format_value(value: Any) -> str:
+    """Write a value the way the model does, double-quoted strings."""
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, list):
+        return "[" + ", ".join(_format_value(item) for item in value) + "]"
+    if isinstance(value, tuple):
+        return "(" + ", ".join(_format_value(item) for item in value) + ")"
+    if isinstance(value, dict):
+        items = (f"{_format_value(k)}: {_format_value(v)}" for k, v in value.items())
+        return "{" + ", ".join(items) + "}"
+    return repr(value)
+
+
+def _random_action(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.25:
+        action = rng.choice(["Type", "Type_Name"])
+        text = _random_text(rng, _FREE_TEXT_CHARS, 30)
+        return f'do(action="{action}", text="{text}")'
+    if kind < 0.4:
+        return f'finish(message="{_random_text(rng, _FREE_TEXT_CHARS, 30)}")'
+
+    arguments = [f'action="{rng.choice(_ACTIONS)}"']
+    for key in rng.sample(["element", "app", "duration", "message", "extra"], 2):
+        arguments.append(f"{key}={_format_value(_random_value(rng))}")
+    return f"do({', '.join(arguments)})"
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_reference_on_random_actions(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        response = _random_action(rng)
+        assert parse_action(response) == reference_parse_action(response), response
+
+
+# Well-formed edge cases, checked against the reference and a fixed result
+EDGE_CASES = [
+    (
+        'do(action="Tap", element=[500, 300])',
+        {"_metadata": "do", "action": "Tap", "element": [500, 300]},
+    ),
+    (
+        'do(action="Launch", app="设置")',
+        {"_metadata": "do", "action": "Launch", "app": "设置"},
+    ),
+    (
+        'do(action="Type", text="搜索 \\"美食\\" 攻略 😀")',
+        {"_metadata": "do", "action": "Type", "text": '搜索 \\"美食\\" 攻略 😀'},
+    ),
+    (
+        'do(action="Type", text="say "hi") and (bye)")',
+        {"_metadata": "do", "action": "Type", "text": 'say "hi") and (bye)'},
+    ),
+    (
+        'do(action="Type_Name", text="C:\\new\\table")',
+        {"_metadata": "do", "action": "Type", "text": "C:\\new\\table"},
+    ),
+    (
+        'do(action="Note", message="a \\"quoted\\" [word]", extra=[[1, [2]], {"k": (3, 4)}])',
+        {
+            "_metadata": "do",
+            "action": "Note",
+            "message": 'a "quoted" [word]',
+            "extra": [[1, [2]], {"k": (3, 4)}],
+        },
+    ),
+    (
+        "do(action='Swipe', start=[1, 2], end=[3, 4], duration=\"0.5 seconds\")",
+        {
+            "_metadata": "do",
+            "action": "Swipe",
+            "start": [1, 2],
+            "end": [3, 4],
+            "duration": "0.5 seconds",
+        },
+    ),
+    (
+        'finish(message="完成了，已打开「设置」")',
+        {"_metadata": "finish", "message": "完成了，已打开「设置」"},
+    ),
+    (
+        'finish(message="line one\nline "two")")',
+        {"_metadata": "finish", "message": 'line one\nline "two")'},
+    ),
+    (
+        '  do(action="Back")\n',
+        {"_metadata": "do", "action": "Back"},
+    ),
+]
+
+
+@pytest.mark.parametrize("response, expected", EDGE_CASES)
+def test_edge_cases(response, expected):
+    assert parse_action(response) == expected
+    assert reference_parse_action(response) == expected
+
+
+MALFORMED = [
+    "",
+    "tap(500, 300)",
+    "do(",
+    'do(action="Tap"',
+    'do(action="Tap", element=[500, 300)',
+    'do(action="Tap", element=[500, 300]]',
+    "do(action=Tap)",
+    'do(action="Tap", element=[500, 300]) extra',
+    'do(action="Launch", app="设置)',
+]
+
+
+@pytest.mark.parametrize("response", MALFORMED)
+def test_malformed_input_is_rejected(response):
+    with pytest.raises(ValueError):
+        reference_parse_action(response)
+    with pytest.raises(ValueError):
+        parse_action(response)
+
+
+def test_intended_differences():
+    # Positional arguments were silently dropped, they are an error now
+    assert reference_parse_action('do("Tap")') == {"_metadata": "do"}
+    with pytest.raises(ValueError):
+        parse_action('do("Tap")')
+
+    # Type without text failed on the missing "text=", it types nothing now
+    with pytest.raises(ValueError):
+        reference_parse_action('do(action="Type")')
+    assert parse_action('do(action="Type")') == {
+        "_metadata": "do",
+        "action": "Type",
+        "text": "",
+    }
@@ -0,0 +1,102 @@
+"""Tests for action call parsing and early dispatch of streamed calls."""
+
+import pytest
+
+from phone_agent.actions.parser import complete_call, parse_call
+from phone_agent.model.client import StreamParser
+
+
+def _stream(text: str, chunks: list[int]) -> str | None:
+    """Feed text split at the given offsets, return the dispatched action."""
+    parser = StreamParser(echo=False)
+    dispatched = []
+
+    def on_action(action: str) -> bool:
+        dispatched.append(action)
+        return True
+
+    start = 0
+    for end in [*chunks, len(text)]:
+        parser.feed(text[start:end])
+        start = end
+        if parser.dispatch(on_action):
+            break
+    return dispatched[0] if dispatched else None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('do(action="Tap", element=[500, 300])', ("do", {"action": "Tap"})),
+        ('finish(message="done")', ("finish", {"message": "done"})),
+        ('do(action="Type", text="f(x)")', ("do", {"text": "f(x)"})),
+        ('do(action="Type", text="say ") now")', ("do", {"text": 'say ") now'})),
+        ('do(action="Type", text="a \\"b\\" c")', ("do", {"text": 'a \\"b\\" c'})),
+        ('do(action="Tap", message="a \\"b\\"")', ("do", {"message": 'a "b"'})),
+    ],
+)
+def test_parse_call(text, expected):
+    name, kwargs = parse_call(text)
+    assert name == expected[0]
+    assert expected[1].items() <= kwargs.items()
+
+
+def test_complete_call_waits_for_whole_call():
+    assert complete_call('do(action="Tap", element=[500') is None
+    assert complete_call('do(action="Tap", element=[500, 300])') == (
+        'do(action="Tap", element=[500, 300])'
+    )
+    assert complete_call('do(action="Tap", element=[1, 2])\n</answer>') == (
+        'do(action="Tap", element=[1, 2])'
+    )
+
+
+def test_complete_call_rejects_quote_paren_inside_text():
+    # `")` followed by more text is not the end of the call
+    assert complete_call('do(action="Type", text="say ") now') is None
+    # It may be the end, the end of the answer tells
+    assert complete_call('do(action="Type", text="say ")') is None
+    assert complete_call('do(action="Type", text="say ")</answer>') == (
+        'do(action="Type", text="say ")'
+    )
+    assert complete_call('do(action="Type", text="say ")\n') == (
+        'do(action="Type", text="say ")'
+    )
+    assert complete_call('do(action="Type", text="say ")', final=True) == (
+        'do(action="Type", text="say ")'
+    )
+
+
+@pytest.mark.parametrize(
+    "action",
+    [
+        'do(action="Type", text="f(x) = (a)")',
+        'do(action="Type", text="say ") now")',
+        'do(action="Type", text="she said \\"hi\\")")',
+        'finish(message="打开了\\"设置\\")，完成")',
+        'do(action="Type", text="a"), b")',
+    ],
+)
+@pytest.mark.parametrize("step", [1, 2, 3, 7])
+def test_dispatch_never_cuts_free_text(action, step):
+    text = f"<think>look</think><answer>{action}</answer>"
+    chunks = list(range(step, len(text), step))
+    dispatched = _stream(text, chunks)
+    assert dispatched == action
+
+
+def test_dispatch_waits_for_call_end():
+    text = 'thinking do(action="Tap", element=[500, 300])'
+    assert _stream(text, [len(text) - 1]) == 'do(action="Tap", element=[500, 300])'
+
+
+def test_dispatch_free_text_without_closing_tag():
+    action = 'do(action="Type", text="hello (world)")'
+    text = f"<think>type it</think><answer>{action}\nextra tokens"
+    # Dispatched once the newline after the call is streamed
+    assert _stream(text, list(range(1, len(text)))) == action
+
+    parser = StreamParser(echo=False)
+    parser.feed(f"<answer>{action}")
+    assert not parser.dispatch(lambda call: True)
+    assert parser.dispatch(lambda call: call == action, final=True)
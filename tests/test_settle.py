@@ -0,0 +1,92 @@
+"""Tests for frame-diff settle detection."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from phone_agent.settle import wait_for_settle, wait_for_stream_settle
+
+
+def test_settles_on_unchanged_frames():
+    frame = Image.new("RGB", (1080, 2400), "white")
+    settled, elapsed = wait_for_settle(
+        lambda: frame, timeout=1.0, min_wait=0, poll_interval=0
+    )
+    assert settled
+    assert elapsed < 1.0
+
+
+def test_times_out_while_frames_change():
+    colors = iter(range(10**6))
+
+    def grab_frame():
+        return Image.new("L", (100, 200), next(colors) * 40 % 256)
+
+    settled, _ = wait_for_settle(
+        grab_frame, timeout=0.2, min_wait=0, poll_interval=0.01
+    )
+    assert not settled
+
+
+def test_capture_failure_is_raised_not_settled():
+    frames = [Image.new("RGB", (100, 200), "white")]
+
+    def grab_frame():
+        if frames:
+            return frames.pop()
+        raise ValueError("Screenshot refused")
+
+    with pytest.raises(ValueError, match="refused"):
+        wait_for_settle(grab_frame, timeout=1.0, min_wait=0, poll_interval=0)
+
+
+class FakeStream:
+    """Frame stream that decodes the given frames at offsets from a start."""
+
+    def __init__(self, start: float, frames: list[tuple[float, Image.Image]]):
+        self.frames = [
+            SimpleNamespace(timestamp=start + offset, image=image)
+            for offset, image in frames
+        ]
+
+    def wait_for_frame(self, after: float, timeout: float):
+        deadline = time.time() + timeout
+        for frame in self.frames:
+            if frame.timestamp > after:
+                time.sleep(max(0.0, min(frame.timestamp, deadline) - time.time()))
+                return frame if frame.timestamp <= deadline else None
+        time.sleep(timeout)
+        return None
+
+
+def test_stream_waits_for_frames_after_the_action():
+    since = time.time()
+    stream = FakeStream(
+        since,
+        [
+            (0.05, Image.new("L", (100, 200), 0)),
+            (0.15, Image.new("L", (100, 200), 255)),
+        ],
+    )
+    settled, elapsed = wait_for_stream_settle(
+        stream.wait_for_frame, since, timeout=1.0, min_wait=0, quiet=0.1
+    )
+    assert settled
+    # Settles a quiet period after the last changed frame, not before it
+    assert 0.25 <= elapsed < 0.5
+
+
+def test_stream_without_changes_settles_after_min_wait():
+    since = time.time()
+    stream = FakeStream(since, [])
+    settled, elapsed = wait_for_stream_settle(
+        stream.wait_for_frame, since, timeout=1.0, min_wait=0.2, quiet=0.1
+    )
+    assert settled and 0.2 <= elapsed < 0.4
+
+
+def test_stopped_stream_is_raised():
+    with pytest.raises(ValueError, match="stopped"):
+        wait_for_stream_settle(lambda after, timeout: None, time.time(), timeout=1.0)
@@ -0,0 +1,32 @@
+"""Tests for the timing profile store."""
+
+import json
+
+from phone_agent import timing_profiles
+from phone_agent.timing_profiles import TimingProfileStore
+
+
+def test_record_is_written_on_flush(tmp_path):
+    path = tmp_path / "profiles.json"
+    store = TimingProfileStore(str(path))
+    for seconds in (0.5, 0.7, 0.6):
+        store.record("Settings", "Tap", seconds)
+    assert not path.exists()
+
+    store.flush()
+    assert json.loads(path.read_text()) == {"Settings": {"Tap": [0.5, 0.7, 0.6]}}
+    assert TimingProfileStore(str(path)).get_delay("Settings", "Tap", 1.0) == 0.7
+
+
+def test_record_writes_after_save_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(timing_profiles, "SAVE_INTERVAL", 0)
+    path = tmp_path / "profiles.json"
+    TimingProfileStore(str(path)).record("Settings", "Back", 0.4)
+    assert json.loads(path.read_text()) == {"Settings": {"Back": [0.4]}}
+
+
+def test_reset_is_written_immediately(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"Settings": {"Tap": [0.5]}}))
+    TimingProfileStore(str(path)).reset("Settings")
+    assert json.loads(path.read_text()) == {}
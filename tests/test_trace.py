@@ -0,0 +1,69 @@
+"""Tests for recording and replaying agent traces."""
+
+import base64
+
+from phone_agent.actions.handler import ActionResult
+from phone_agent.trace import TraceWriter, read_trace, replay_trace
+
+SCREENSHOT = base64.b64encode(b"\x89PNG fake").decode("ascii")
+
+
+class RecordingHandler:
+    """Action handler stand-in that records what it was asked to run."""
+
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, action, width, height):
+        self.calls.append((action["action"], width, height))
+        return ActionResult(success=True, should_finish=False)
+
+
+def _write_run(trace_dir: str) -> None:
+    with TraceWriter(trace_dir) as trace:
+        trace.start_task("open settings", device_id="emulator-5554")
+        trace.write_step(
+            1,
+            screenshot_base64=SCREENSHOT,
+            mime_type="image/png",
+            width=1080,
+            height=2400,
+            current_app="System Home",
+            raw_output='do(action="Tap", element=[500, 500])',
+            action={"_metadata": "do", "action": "Tap", "element": [500, 500]},
+            result=ActionResult(success=True, should_finish=False),
+            timings={"capture": 0.1, "model": 1.0, "execute": 0.2},
+        )
+        trace.write_error(
+            2,
+            screenshot_base64=SCREENSHOT,
+            mime_type="image/png",
+            width=1080,
+            height=2400,
+            current_app="Settings",
+            error="Model error: timed out",
+            timings={"capture": 0.1, "model": 30.0},
+        )
+
+
+def test_error_steps_are_recorded(tmp_path):
+    _write_run(str(tmp_path))
+    [run] = read_trace(str(tmp_path))
+    assert [record["type"] for record in run] == ["task", "step", "error"]
+    assert run[2]["error"] == "Model error: timed out"
+    assert run[1]["screenshot"] == run[2]["screenshot"]
+
+
+def test_replay_uses_current_screen_size(tmp_path):
+    _write_run(str(tmp_path))
+    handler = RecordingHandler()
+    results = replay_trace(str(tmp_path), handler, get_screen_size=lambda: (720, 1600))
+    assert len(results) == 1
+    assert handler.calls == [("Tap", 720, 1600)]
+
+
+def test_replay_defaults_to_recorded_size(tmp_path):
+    _write_run(str(tmp_path))
+    handler = RecordingHandler()
+    replay_trace(str(tmp_path), handler)
+    assert handler.calls == [("Tap", 1080, 2400)]
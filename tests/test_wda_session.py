@@ -0,0 +1,91 @@
+"""Tests for WDA session reuse and W3C action batches."""
+
+from phone_agent.xctest import session as wda_session
+from phone_agent.xctest.session import ENTER_KEY, ActionBatch, WDASession
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self._data = data
+        self.text = str(data)
+
+    def json(self) -> dict:
+        return self._data
+
+
+class FakeWDA:
+    """HTTP client stand-in for WDA, with one session expiring once."""
+
+    def __init__(self):
+        self.requests = []
+        self.created = 0
+        self.expired = {"s1"}
+
+    def post(self, url, **kwargs):
+        self.requests.append(("post", url, kwargs.get("json")))
+        if url.endswith("/session"):
+            self.created += 1
+            return FakeResponse(200, {"sessionId": f"s{self.created}"})
+        return self._session_reply(url)
+
+    def get(self, url, **kwargs):
+        self.requests.append(("get", url, None))
+        return self._session_reply(url)
+
+    def _session_reply(self, url):
+        session_id = url.split("/session/")[1].split("/")[0]
+        if session_id in self.expired:
+            self.expired.discard(session_id)
+            return FakeResponse(404, {"value": {"error": "invalid session id"}})
+        return FakeResponse(200, {"value": None})
+
+
+def test_batch_keeps_pointer_and_keys_in_order():
+    batch = ActionBatch(scale_factor=2).tap(100, 200).type("a\n").key(ENTER_KEY)
+    pointer, keys = batch.payload()["actions"]
+
+    assert [a["type"] for a in pointer["actions"]] == [
+        "pointerMove",
+        "pointerDown",
+        "pause",
+        "pointerUp",
+        *["pause"] * 6,
+    ]
+    assert pointer["actions"][0]["x"] == 50 and pointer["actions"][0]["y"] == 100
+    assert [(a["type"], a.get("value")) for a in keys["actions"][4:]] == [
+        ("keyDown", "a"),
+        ("keyUp", "a"),
+        ("keyDown", ENTER_KEY),
+        ("keyUp", ENTER_KEY),
+        ("keyDown", ENTER_KEY),
+        ("keyUp", ENTER_KEY),
+    ]
+    assert len(pointer["actions"]) == len(keys["actions"])
+    assert batch.duration() == 0.1
+
+
+def test_batch_without_keys_sends_pointer_only():
+    payload = ActionBatch().long_press(10, 10, duration_ms=500).payload()
+    assert [source["type"] for source in payload["actions"]] == ["pointer"]
+
+
+def test_session_is_reused_and_recreated_once_expired(monkeypatch):
+    wda = FakeWDA()
+    monkeypatch.setattr(wda_session, "get_wda_client", lambda url: wda)
+    session = WDASession("http://localhost:8100/")
+
+    assert session.get("window/size").status_code == 200
+    assert session.perform(ActionBatch().tap(1, 1)).status_code == 200
+    assert wda.created == 2  # s1 expired on first use
+    assert [url for _, url, _ in wda.requests] == [
+        "http://localhost:8100/session",
+        "http://localhost:8100/session/s1/window/size",
+        "http://localhost:8100/session",
+        "http://localhost:8100/session/s2/window/size",
+        "http://localhost:8100/session/s2/actions",
+    ]
+
+    # An expired session handed in again is not adopted
+    session.adopt("s1")
+    assert session.session_id == "s2"